@@ -1,6 +1,6 @@
 ## core ##
 from .nfelo import __version__
-from .nfelo import update_nfelo
+from .nfelo import update_nfelo, snapshot_nfelodcm
 ## dev ##
 from .nfelo import optimize_nfelo_core, optimize_nfelo_base, optimize_nfelo_mr, optimize_all, optimize_base_with_k
 from .nfelo import market_resist_explore
\ No newline at end of file
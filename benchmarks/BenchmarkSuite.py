@@ -0,0 +1,264 @@
+import copy
+import dataclasses
+import datetime
+import json
+import pathlib
+import platform
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy
+import pandas as pd
+
+from .SyntheticLeague import SyntheticLeague
+
+
+@dataclasses.dataclass
+class BenchmarkResult:
+    '''
+    Timings of one benchmark over its repeats.
+    '''
+    name: str
+    seconds: List[float]
+    rows: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'seconds': self.seconds,
+            'min': min(self.seconds),
+            'median': statistics.median(self.seconds),
+            'mean': statistics.mean(self.seconds),
+            'rows': self.rows,
+            'median_per_row': (
+                statistics.median(self.seconds) / self.rows if self.rows else None
+            ),
+        }
+
+
+class BenchmarkSuite():
+    '''
+    Times the pipeline stages against a synthetic league: the DataLoader
+    helpers, Nfelo.run, NfeloGrader, SeasonSimulator, NfeloFormatter, and a
+    single optimizer eval. Everything writes to a temp dir, so the suite runs offline and
+    leaves the repo untouched.
+    '''
+
+    def __init__(self, league: SyntheticLeague, repeat: int = 3, config: Dict[str, Any] = None):
+        self.league = league
+        self.repeat = repeat
+        self.repo_root = pathlib.Path(__file__).parent.parent.resolve()
+        if config is None:
+            with open(self.repo_root / 'config.json', 'r') as fp:
+                config = json.load(fp)['models']['nfelo']
+        ## synthetic teams start at league average ##
+        self.config = copy.deepcopy(config)
+        self.config['beginning_elo'] = league.beginning_elos()
+        self.results: List[BenchmarkResult] = []
+
+    def time(self, name: str, func: Callable[[], Any], setup: Callable[[], Any] = None) -> BenchmarkResult:
+        '''
+        Times func over the repeats. setup runs before each repeat, untimed,
+        and its return value is passed to func. If func returns a DataFrame,
+        or an object with an updated_file or current_file, its rows are recorded.
+        '''
+        seconds = []
+        out = None
+        for _ in range(self.repeat):
+            arg = setup() if setup is not None else None
+            start = time.perf_counter()
+            out = func(arg) if setup is not None else func()
+            seconds.append(time.perf_counter() - start)
+        rows = None
+        if isinstance(out, pd.DataFrame):
+            rows = len(out)
+        else:
+            for attr in ['updated_file', 'current_file', 'graded_games']:
+                df = getattr(out, attr, None)
+                if isinstance(df, pd.DataFrame):
+                    rows = len(df)
+                    break
+        result = BenchmarkResult(name=name, seconds=seconds, rows=rows)
+        self.results.append(result)
+        print('     {0}: median {1:.3f}s over {2}'.format(
+            name, statistics.median(seconds), self.repeat
+        ))
+        return result
+
+    def run(self) -> Dict[str, Any]:
+        '''
+        Runs every benchmark and returns the results document
+        '''
+        from nfelo.Data import DataLoader
+        from nfelo.Model import Nfelo
+        from nfelo.Performance import NfeloGrader
+        from nfelo.Formatting import NfeloFormatter
+        from nfelo.Simulation import SeasonSimulator
+        from nfelo.Optimizer.Primitives.NfeloOptimizerBase import NfeloOptimizerBase
+
+        self.results = []
+        league = self.league
+        tables = league.generate()
+        print('Running benchmarks on {0} games...'.format(len(tables['games'])))
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = pathlib.Path(tmp)
+            for folder in ['intermediate', 'formatted', 'external', 'results']:
+                (tmp / folder).mkdir()
+
+            def build_loader(*args):
+                return DataLoader.from_tables(
+                    league.dcm_tables(),
+                    league.last_completed_season, league.last_completed_week,
+                    tables['dvoa_projections'].copy(), str(tmp / 'intermediate'),
+                )
+
+            ## data loader ##
+            self.time('DataLoader.build', build_loader)
+            data = build_loader()
+            self.time('DataLoader.format_market_data', data.format_market_data)
+            self.time('DataLoader.gen_current_file', data.gen_current_file)
+            ## model ##
+            def new_model(*args):
+                return Nfelo(data=data, config=copy.deepcopy(self.config))
+
+            def run_model(model):
+                model.run()
+                return model
+
+            self.time('Nfelo.run', run_model, setup=new_model)
+            model = run_model(new_model())
+            ## grader ##
+            self.time('NfeloGrader', lambda: NfeloGrader(model.updated_file))
+            graded = NfeloGrader(model.updated_file)
+            ## season simulation of the unplayed weeks ##
+            self.time('SeasonSimulator.simulate', lambda: SeasonSimulator(model).simulate(
+                n_sims=10000, seed=0
+            ))
+            ## formatter, seeded with an empty historic projections file ##
+            model.project_spreads()
+            pd.DataFrame(columns=['game_id']).to_csv(
+                tmp / 'external' / 'historic_projected_spreads.csv'
+            )
+            self.time('NfeloFormatter', lambda: NfeloFormatter(
+                data=data, model=model, graded=graded,
+                output_loc=str(tmp / 'formatted'),
+                external_folder=str(tmp / 'external'),
+            ))
+            ## optimizer eval ##
+            features = ['k', 'b', 'market_regression']
+
+            def new_optimizer(*args):
+                return NfeloOptimizerBase(
+                    'benchmark', new_model(), features, 'nfelo_brier_close',
+                    results_dir=str(tmp / 'results'),
+                )
+
+            def eval_optimizer(optimizer):
+                optimizer.obj_func(optimizer.best_guesses)
+                return optimizer.nfelo_model
+
+            self.time('NfeloOptimizerBase.obj_func', eval_optimizer, setup=new_optimizer)
+        return self.document()
+
+    def run_scaling(self, team_counts: List[int]) -> Dict[str, Any]:
+        '''
+        Times DataLoader.build and Nfelo.run on copies of the league with each
+        team count (every team playing every week). Per game cost should stay
+        flat as the league grows.
+        '''
+        from nfelo.Data import DataLoader
+        from nfelo.Model import Nfelo
+
+        self.results = []
+        base_league = self.league
+        with tempfile.TemporaryDirectory() as tmp:
+            for teams in team_counts:
+                league = dataclasses.replace(base_league, teams=teams, games_per_week=None)
+                tables = league.generate()
+                print('Scaling benchmark at {0} teams, {1} games...'.format(
+                    teams, len(tables['games'])
+                ))
+                config = copy.deepcopy(self.config)
+                config['beginning_elo'] = league.beginning_elos()
+
+                def build_loader(*args):
+                    return DataLoader.from_tables(
+                        league.dcm_tables(),
+                        league.last_completed_season, league.last_completed_week,
+                        tables['dvoa_projections'].copy(), tmp,
+                    )
+
+                def new_model(*args):
+                    return Nfelo(data=data, config=copy.deepcopy(config))
+
+                def run_model(model):
+                    model.run()
+                    return model
+
+                self.time('DataLoader.build[teams={0}]'.format(teams), build_loader)
+                data = build_loader()
+                self.time('Nfelo.run[teams={0}]'.format(teams), run_model, setup=new_model)
+        return self.document()
+
+    def document(self) -> Dict[str, Any]:
+        '''
+        Results with enough meta to judge whether two runs are comparable
+        '''
+        return {
+            'meta': {
+                'created_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'league': {
+                    k: v for k, v in dataclasses.asdict(self.league).items()
+                },
+                'games': len(self.league.generate()['games']),
+                'repeat': self.repeat,
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'numpy': numpy.__version__,
+                'machine': platform.machine(),
+                'processor': platform.processor(),
+            },
+            'benchmarks': {r.name: r.to_dict() for r in self.results},
+        }
+
+    @staticmethod
+    def write(document: Dict[str, Any], path: str) -> pathlib.Path:
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as fp:
+            json.dump(document, fp, indent=2)
+        return path
+
+    @staticmethod
+    def read(path: str) -> Dict[str, Any]:
+        with open(path, 'r') as fp:
+            return json.load(fp)
+
+    @staticmethod
+    def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.10) -> pd.DataFrame:
+        '''
+        Compares median timings to a baseline. A benchmark regresses when its
+        median exceeds the baseline median by more than tolerance.
+
+        Returns:
+        * comparison (DataFrame): benchmark, baseline and current medians,
+          ratio, and a regression flag
+        '''
+        if current['meta'].get('league') != baseline['meta'].get('league'):
+            print('     Warning -- the leagues differ, timings may not be comparable')
+        rows = []
+        for name, rec in current['benchmarks'].items():
+            base = baseline['benchmarks'].get(name)
+            base_median = base['median'] if base is not None else numpy.nan
+            ratio = rec['median'] / base_median if base is not None else numpy.nan
+            rows.append({
+                'benchmark': name,
+                'baseline_median': base_median,
+                'current_median': rec['median'],
+                'ratio': ratio,
+                'regression': bool(ratio > 1 + tolerance) if base is not None else False,
+            })
+        return pd.DataFrame(rows, columns=[
+            'benchmark', 'baseline_median', 'current_median', 'ratio', 'regression'
+        ])
@@ -0,0 +1,373 @@
+import dataclasses
+from typing import Any, Dict, List
+
+import numpy
+import pandas as pd
+from scipy.stats import norm
+
+
+@dataclasses.dataclass
+class SyntheticLeague:
+    '''
+    Generates a synthetic league in the shape of the nfelodcm tables the
+    DataLoader consumes (games, market_data, wepa, filmmargins, hfa, qbelo,
+    wt_ratings, logos) plus dvoa projections, so the full pipeline can run
+    without network access.
+
+    Team strength (in elo points) follows a weekly random walk with partial
+    reversion between seasons. Margins are drawn around the strength
+    difference plus hfa with an NFL-like 13.5 point sd. Market lines, wepa,
+    pff margins, projections, and 538 values are noisy views of the same
+    underlying strength so the model sees realistic signal.
+    '''
+    seasons: int = 4
+    teams: int = 32
+    ## games per week defaults to every team playing ##
+    games_per_week: int = None
+    weeks: int = 17
+    ## trailing weeks of the final season left unplayed ##
+    unplayed_weeks: int = 2
+    first_season: int = 2009
+    seed: int = 0
+    ## generating process ##
+    strength_sd: float = 90.0
+    weekly_drift_sd: float = 8.0
+    season_carryover: float = 0.65
+    margin_sd: float = 13.5
+    hfa_points: float = 1.75
+    market_noise: float = 1.25
+
+    def __post_init__(self):
+        if self.games_per_week is None:
+            self.games_per_week = self.teams // 2
+        if self.games_per_week * 2 > self.teams:
+            raise ValueError('games_per_week cannot exceed half the number of teams')
+        self.rng = numpy.random.default_rng(self.seed)
+        self.team_names = self.gen_team_names()
+        self.tables = None
+
+    @property
+    def last_completed_season(self) -> int:
+        return self.first_season + self.seasons - 1
+
+    @property
+    def last_completed_week(self) -> int:
+        return self.weeks - self.unplayed_weeks
+
+    def gen_team_names(self) -> List[str]:
+        '''
+        Three letter codes for up to 26^3 teams
+        '''
+        letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        return [
+            '{0}{1}{2}'.format(
+                letters[(i // 676) % 26], letters[(i // 26) % 26], letters[i % 26]
+            ) for i in range(self.teams)
+        ]
+
+    def beginning_elos(self) -> Dict[str, float]:
+        '''
+        Starting elos for an Nfelo config, all teams at league average
+        '''
+        return {team : 1505 for team in self.team_names}
+
+    def generate(self) -> Dict[str, Any]:
+        '''
+        Generates every table. Results are cached on the instance
+
+        Returns:
+        * tables (dict): dcm style tables plus 'dvoa_projections'
+        '''
+        if self.tables is not None:
+            return self.tables
+        games, team_seasons = self.gen_games()
+        self.tables = {
+            'games' : games,
+            'market_data' : self.gen_market_data(games),
+            'wepa' : self.gen_wepa(games),
+            'filmmargins' : self.gen_filmmargins(games),
+            'hfa' : self.gen_hfa(games),
+            'qbelo' : self.gen_qbelo(games),
+            'wt_ratings' : self.gen_wt_ratings(team_seasons),
+            'logos' : self.gen_logos(),
+            'rosters' : pd.DataFrame(),
+            'dvoa_projections' : self.gen_dvoa_projections(team_seasons),
+        }
+        return self.tables
+
+    def gen_games(self):
+        '''
+        Schedule, true strengths, and scores
+        '''
+        n_teams = self.teams
+        strength = self.rng.normal(0, self.strength_sd, n_teams)
+        rows = []
+        team_seasons = []
+        for season in range(self.first_season, self.first_season + self.seasons):
+            ## offseason reversion toward the mean ##
+            if season > self.first_season:
+                strength = (
+                    self.season_carryover * strength +
+                    self.rng.normal(0, self.strength_sd * (1 - self.season_carryover ** 2) ** 0.5, n_teams)
+                )
+            for i, team in enumerate(self.team_names):
+                team_seasons.append({'team' : team, 'season' : season, 'strength' : strength[i]})
+            for week in range(1, self.weeks + 1):
+                order = self.rng.permutation(n_teams)[:self.games_per_week * 2]
+                home = order[0::2]
+                away = order[1::2]
+                expected = (strength[home] - strength[away]) / 25 + self.hfa_points
+                rows.append(pd.DataFrame({
+                    'season' : season,
+                    'week' : week,
+                    'home_idx' : home,
+                    'away_idx' : away,
+                    'home_strength' : strength[home],
+                    'away_strength' : strength[away],
+                    'expected_margin' : expected,
+                    'margin' : numpy.round(self.rng.normal(expected, self.margin_sd)),
+                }))
+                strength = strength + self.rng.normal(0, self.weekly_drift_sd, n_teams)
+        games = pd.concat(rows).reset_index(drop=True)
+        names = numpy.array(self.team_names)
+        games['home_team'] = names[games['home_idx']]
+        games['away_team'] = names[games['away_idx']]
+        games['game_id'] = (
+            games['season'].astype(str) + '_' +
+            games['week'].map('{0:02d}'.format) + '_' +
+            games['away_team'] + '_' + games['home_team']
+        )
+        ## scores that sum to a realistic total ##
+        total = numpy.maximum(
+            numpy.round(self.rng.normal(44, 10, len(games))), numpy.abs(games['margin'])
+        )
+        games['home_score'] = numpy.round((total + games['margin']) / 2)
+        games['away_score'] = total - games['home_score']
+        unplayed = (
+            (games['season'] == self.last_completed_season) &
+            (games['week'] > self.last_completed_week)
+        )
+        games.loc[unplayed, ['home_score', 'away_score', 'margin']] = numpy.nan
+        games['game_type'] = 'REG'
+        games['gameday'] = (
+            games['season'].astype(str) + '-09-01'
+        )
+        games['weekday'] = 'Sunday'
+        games['stadium'] = games['home_team'] + ' Stadium'
+        games['stadium_id'] = games['home_team'] + '00'
+        games['old_game_id'] = (
+            games['season'] * 1000000 + games.index.to_series() % 1000000
+        ).astype(str)
+        return games, pd.DataFrame(team_seasons)
+
+    def dcm_games(self) -> pd.DataFrame:
+        '''
+        The games table with only the dcm columns
+        '''
+        return self.generate()['games'][[
+            'game_id', 'game_type', 'season', 'week',
+            'home_team', 'away_team', 'home_score', 'away_score',
+            'gameday', 'weekday', 'stadium', 'stadium_id', 'old_game_id',
+        ]]
+
+    def american(self, prob):
+        '''
+        American odds for a (hold inclusive) probability
+        '''
+        return numpy.where(
+            prob >= 0.5,
+            -100 * prob / (1 - prob),
+            100 * (1 - prob) / prob
+        ).round()
+
+    def gen_market_data(self, games):
+        '''
+        Spreads, moneylines, and totals priced off of a noisy view of the
+        expected margin
+        '''
+        n = len(games)
+        market_margin = games['expected_margin'] + self.rng.normal(0, self.market_noise, n)
+        close = -numpy.round(market_margin * 2) / 2
+        opening = close + numpy.round(self.rng.normal(0, 1, n) * 2) / 2
+        home_prob = norm.cdf(market_margin / self.margin_sd)
+        hold = 1.045
+        total = numpy.round(self.rng.normal(44, 4, n) * 2) / 2
+        market = pd.DataFrame({
+            'game_id' : games['game_id'],
+            'season' : games['season'],
+            'week' : games['week'],
+            'home_team' : games['home_team'],
+            'away_team' : games['away_team'],
+            'home_spread_open' : opening,
+            'home_spread_open_price' : -110,
+            'away_spread_open_price' : -110,
+            'home_spread_last' : close,
+            'home_spread_last_price' : -110 + self.rng.choice([-5, 0, 5], n),
+            'away_spread_last_price' : -110 + self.rng.choice([-5, 0, 5], n),
+            'home_spread_tickets_pct' : self.rng.uniform(0.2, 0.8, n),
+            'home_ml_open' : self.american(numpy.clip(home_prob * hold, 0.02, 0.98)),
+            'away_ml_open' : self.american(numpy.clip((1 - home_prob) * hold, 0.02, 0.98)),
+            'total_line_open' : total,
+            'under_price_open' : -110,
+            'over_price_open' : -110,
+            'total_line_last' : total + numpy.round(self.rng.normal(0, 0.75, n) * 2) / 2,
+            'under_price_last' : -110,
+            'over_price_last' : -110,
+        })
+        market['home_ml_last'] = market['home_ml_open']
+        market['away_ml_last'] = market['away_ml_open']
+        return market
+
+    def flatten(self, games):
+        '''
+        One row per team per played game with the team's margin
+        '''
+        played = games[~pd.isnull(games['margin'])]
+        return pd.concat([
+            pd.DataFrame({
+                'game_id' : played['game_id'], 'team' : played['home_team'],
+                'margin' : played['margin'],
+            }),
+            pd.DataFrame({
+                'game_id' : played['game_id'], 'team' : played['away_team'],
+                'margin' : -played['margin'],
+            }),
+        ]).reset_index(drop=True)
+
+    def gen_wepa(self, games):
+        '''
+        Per team wepa and epa, correlated with margin
+        '''
+        flat = self.flatten(games)
+        n = len(flat)
+        flat['wepa_net'] = 0.7 * flat['margin'] + self.rng.normal(0, 6, n)
+        flat['wepa'] = flat['wepa_net'] / 2 + self.rng.normal(0, 2, n)
+        flat['d_wepa'] = flat['wepa'] - flat['wepa_net']
+        flat['epa_net'] = 0.6 * flat['margin'] + self.rng.normal(0, 7, n)
+        flat['epa'] = flat['epa_net'] / 2 + self.rng.normal(0, 2, n)
+        flat['epa_against'] = flat['epa'] - flat['epa_net']
+        return flat.drop(columns=['margin'])
+
+    def gen_filmmargins(self, games):
+        '''
+        Per team pff film margins, correlated with margin
+        '''
+        flat = self.flatten(games)
+        flat['film_margin'] = 0.8 * flat['margin'] + self.rng.normal(0, 5, len(flat))
+        return flat.drop(columns=['margin'])
+
+    def gen_hfa(self, games):
+        '''
+        Game level hfa model output
+        '''
+        n = len(games)
+        hfa = pd.DataFrame({
+            'game_id' : games['game_id'],
+            'home_bye' : (self.rng.uniform(size=n) < 0.05).astype(int),
+            'away_bye' : (self.rng.uniform(size=n) < 0.05).astype(int),
+            'gametime' : '13:00',
+            'location' : numpy.where(self.rng.uniform(size=n) < 0.01, 'Neutral', 'Home'),
+            'roof' : self.rng.choice(['outdoors', 'dome', 'closed'], n),
+            'surface' : self.rng.choice(['grass', 'fieldturf'], n),
+            'temp' : numpy.round(self.rng.normal(60, 15, n)),
+            'wind' : numpy.round(numpy.abs(self.rng.normal(6, 4, n))),
+            'home_time_advantage' : self.rng.choice([-3, 0, 0, 0, 3], n),
+            'dif_surface' : (self.rng.uniform(size=n) < 0.3).astype(int),
+            'div_game' : (self.rng.uniform(size=n) < 0.35).astype(int),
+            'hfa_base' : self.hfa_points + self.rng.normal(0, 0.1, n),
+        })
+        hfa['home_bye_adj'] = 0.25 * hfa['home_bye']
+        hfa['away_bye_adj'] = -0.25 * hfa['away_bye']
+        hfa['home_time_advantage_adj'] = 0.1 * hfa['home_time_advantage']
+        hfa['dif_surface_adj'] = 0.15 * hfa['dif_surface']
+        hfa['div_game_adj'] = -0.2 * hfa['div_game']
+        hfa['hfa_adj'] = (
+            hfa['hfa_base'] + hfa['home_bye_adj'] + hfa['away_bye_adj'] +
+            hfa['home_time_advantage_adj'] + hfa['dif_surface_adj'] + hfa['div_game_adj']
+        )
+        return hfa
+
+    def gen_qbelo(self, games):
+        '''
+        538 style elo and qb adjustments
+        '''
+        n = len(games)
+        home_elo = 1505 + games['home_strength'] + self.rng.normal(0, 25, n)
+        away_elo = 1505 + games['away_strength'] + self.rng.normal(0, 25, n)
+        home_qb = self.rng.normal(0, 15, n)
+        away_qb = self.rng.normal(0, 15, n)
+        elo_prob = 1 / (1 + 10 ** (-(home_elo - away_elo + 55) / 400))
+        qbelo_prob = 1 / (1 + 10 ** (-(home_elo + home_qb - away_elo - away_qb + 55) / 400))
+        return pd.DataFrame({
+            'game_id' : games['game_id'],
+            'elo1_pre' : home_elo, 'elo1_post' : home_elo + self.rng.normal(0, 10, n),
+            'elo2_pre' : away_elo, 'elo2_post' : away_elo + self.rng.normal(0, 10, n),
+            'qbelo1_pre' : home_elo + home_qb, 'qbelo1_post' : home_elo + home_qb,
+            'qbelo2_pre' : away_elo + away_qb, 'qbelo2_post' : away_elo + away_qb,
+            'qb1' : games['home_team'] + ' QB', 'qb2' : games['away_team'] + ' QB',
+            'qb1_adj' : home_qb, 'qb2_adj' : away_qb,
+            'elo_prob1' : elo_prob, 'qbelo_prob1' : qbelo_prob,
+        })
+
+    def gen_wt_ratings(self, team_seasons):
+        '''
+        Preseason win total ratings, a noisy view of preseason strength
+        '''
+        n = len(team_seasons)
+        wt = team_seasons[['team', 'season']].copy()
+        wt['wt_rating'] = team_seasons['strength'] / 25 + self.rng.normal(0, 1.5, n)
+        wt['wt_rating_elo'] = 25 * wt['wt_rating']
+        wt['sos'] = self.rng.normal(0, 0.5, n)
+        wt['line'] = numpy.round((self.weeks / 2 + wt['wt_rating'] / 3) * 2) / 2
+        wt['over_odds'] = -110
+        wt['under_odds'] = -110
+        wt['line_adj'] = wt['line']
+        wt['over_probability'] = 0.5
+        wt['under_probability'] = 0.5
+        wt['hold'] = 0.045
+        return wt
+
+    def gen_logos(self):
+        '''
+        Team meta used by the formatter
+        '''
+        ## two conferences of four divisions, dealt round robin ##
+        confs = ['AFC', 'NFC']
+        divisions = ['East', 'North', 'South', 'West']
+        return pd.DataFrame({
+            'team_abbr' : self.team_names,
+            'team_nick' : self.team_names,
+            'team_conf' : [confs[i % 2] for i in range(len(self.team_names))],
+            'team_division' : [
+                '{0} {1}'.format(confs[i % 2], divisions[(i // 2) % 4])
+                for i in range(len(self.team_names))
+            ],
+            'team_color' : '#000000',
+            'team_color2' : '#FFFFFF',
+            'team_logo_espn' : '',
+        })
+
+    def gen_dvoa_projections(self, team_seasons):
+        '''
+        Preseason dvoa projections, a noisy view of preseason strength
+        '''
+        return pd.DataFrame({
+            'season' : team_seasons['season'],
+            'team' : team_seasons['team'],
+            'projected_total_dvoa' : (
+                team_seasons['strength'] / 484 +
+                self.rng.normal(0, 0.05, len(team_seasons))
+            ),
+        })
+
+    def dcm_tables(self) -> Dict[str, pd.DataFrame]:
+        '''
+        Copies of the tables in the shape nfelodcm returns them
+        '''
+        tables = self.generate()
+        db = {
+            k : v.copy() for k, v in tables.items()
+            if k not in ['games', 'dvoa_projections']
+        }
+        db['games'] = self.dcm_games().copy()
+        return db
@@ -0,0 +1,2 @@
+from .SyntheticLeague import SyntheticLeague
+from .BenchmarkSuite import BenchmarkSuite, BenchmarkResult
\ No newline at end of file
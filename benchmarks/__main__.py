@@ -0,0 +1,88 @@
+'''
+Offline benchmark suite.
+
+    python -m benchmarks run [--seasons 4 --teams 32 ...] [--out path] [--save-baseline]
+    python -m benchmarks scale [--team-counts 32 130 1000] [--seasons 2] [--out path]
+    python -m benchmarks compare current.json [--baseline path] [--tolerance 0.10]
+
+run writes a results JSON (default benchmarks/results/latest.json). scale
+times the data build and model run as the league grows. compare
+exits 1 if any benchmark regressed against the baseline (default
+benchmarks/results/baseline.json).
+'''
+import argparse
+import pathlib
+import sys
+
+from .SyntheticLeague import SyntheticLeague
+from .BenchmarkSuite import BenchmarkSuite
+
+RESULTS_DIR = pathlib.Path(__file__).parent.resolve() / 'results'
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+    ## run ##
+    run = commands.add_parser('run', help='run the suite on a synthetic league')
+    run.add_argument('--seasons', type=int, default=4)
+    run.add_argument('--teams', type=int, default=32)
+    run.add_argument('--games-per-week', type=int, default=None)
+    run.add_argument('--weeks', type=int, default=17)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--out', default=str(RESULTS_DIR / 'latest.json'))
+    run.add_argument('--save-baseline', action='store_true',
+                     help='also store the results as the baseline')
+    ## scale ##
+    scale = commands.add_parser('scale', help='time the model as the number of teams grows')
+    scale.add_argument('--team-counts', type=int, nargs='+', default=[32, 130, 1000])
+    scale.add_argument('--seasons', type=int, default=2)
+    scale.add_argument('--weeks', type=int, default=17)
+    scale.add_argument('--seed', type=int, default=0)
+    scale.add_argument('--repeat', type=int, default=1)
+    scale.add_argument('--out', default=str(RESULTS_DIR / 'scaling.json'))
+    ## compare ##
+    compare = commands.add_parser('compare', help='flag regressions against a baseline')
+    compare.add_argument('current')
+    compare.add_argument('--baseline', default=str(RESULTS_DIR / 'baseline.json'))
+    compare.add_argument('--tolerance', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        league = SyntheticLeague(
+            seasons=args.seasons, teams=args.teams,
+            games_per_week=args.games_per_week, weeks=args.weeks,
+            seed=args.seed,
+        )
+        document = BenchmarkSuite(league, repeat=args.repeat).run()
+        print('Saved results to {0}'.format(BenchmarkSuite.write(document, args.out)))
+        if args.save_baseline:
+            print('Saved baseline to {0}'.format(
+                BenchmarkSuite.write(document, RESULTS_DIR / 'baseline.json')
+            ))
+        return 0
+
+    if args.command == 'scale':
+        league = SyntheticLeague(seasons=args.seasons, weeks=args.weeks, seed=args.seed)
+        document = BenchmarkSuite(league, repeat=args.repeat).run_scaling(args.team_counts)
+        print('Saved results to {0}'.format(BenchmarkSuite.write(document, args.out)))
+        return 0
+
+    comparison = BenchmarkSuite.compare(
+        BenchmarkSuite.read(args.current),
+        BenchmarkSuite.read(args.baseline),
+        tolerance=args.tolerance,
+    )
+    print(comparison.to_string(index=False))
+    regressions = comparison[comparison['regression']]
+    if len(regressions) > 0:
+        print('{0} benchmark(s) regressed by more than {1:.0%}'.format(
+            len(regressions), args.tolerance
+        ))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
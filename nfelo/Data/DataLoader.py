@@ -2,9 +2,13 @@ import pandas as pd
 import numpy
 import pathlib
 
-import nfelodcm as dcm
-
-from ..Utilities import american_to_hold_adj_prob, prob_to_elo, merge_check
+from ..Utilities import (
+    american_to_hold_adj_prob, prob_to_elo, merge_check,
+    translator_pool, calc_clv_series,
+    compact_frame, frame_memory, memory_report, profiler
+)
+from .. import __version__
+from .Sources import DcmSource
 from .Helpers import (
     market_spread_to_win_prob_series, win_prob_to_model_spread_series,
     blend_spread_ml_win_prob_series,
@@ -12,32 +16,314 @@ from .Helpers import (
 
 class DataLoader:
     '''
-    Loads and formats all data for the model update using nfelodcm
+    Loads and formats all data for the model update. Tables and the season
+    state come from a DataSource, which defaults to nfelodcm. Pass a
+    FixtureSource to run off of a local snapshot instead
+
+    If compact is True, the current file is stored in the compact schema
+    (see Utilities/memory.py) to cut memory in long running optimizations
+
+    If refresh is True, the loader diffs the fresh source tables against the cache
+    of the previous load and only rebuilds games whose inputs or game numbers
+    changed. Without a usable cache it falls back to a full build
     '''
-    def __init__(self):
-        self.package_dir = pathlib.Path(__file__).parent.parent.parent.resolve()
-        self.intermediate_data_loc = '{0}/Intermediate Data'.format(pathlib.Path(__file__).parent.resolve())
-        print('Loading data...')
-        self.last_completed_season, self.last_completed_week = dcm.get_season_state()
-        self.db = dcm.load([
-            'games', 'rosters', 'logos', ## fastr ##
-            'wepa', 'wt_ratings', 'hfa', 'qbelo', ## nfelo models
-            'filmmargins', 'market_data' ## other data
-        ])
+    ## tables pulled from the source ##
+    tables = [
+        'games', 'rosters', 'logos', ## fastr ##
+        'wepa', 'wt_ratings', 'hfa', 'qbelo', ## nfelo models
+        'filmmargins', 'market_data' ## other data
+    ]
+
+    ## game number columns, which can change for a game whose own inputs did not ##
+    ## (ie a new game changes the next game link of each team's prior game) ##
+    game_number_columns = [
+        'all_time_game_number_home', 'game_number_home',
+        'prev_game_id_home', 'next_game_id_home', 'prev_week_home', 'next_week_home',
+        'all_time_game_number_away', 'game_number_away',
+        'prev_game_id_away', 'next_game_id_away', 'prev_week_away', 'next_week_away',
+    ]
+
+    def __init__(self, compact=False, refresh=False, source=None):
+        self.init_state(compact, refresh)
+        self.source = source if source is not None else DcmSource()
+        print('Loading data from {0}...'.format(self.source.describe()))
+        self.last_completed_season, self.last_completed_week = self.source.get_season_state()
+        with profiler.span('load tables'):
+            self.db = self.source.load(self.tables)
         self.dvoa_projections = pd.read_csv(
             '{0}/dvoa_projections.csv'.format(self.intermediate_data_loc),
             index_col=0
         )
-        self.market_data = self.format_market_data()
-        self.current_file = self.gen_current_file()
+        self.build()
+
+    @classmethod
+    def from_tables(cls,
+            db, last_completed_season, last_completed_week,
+            dvoa_projections, intermediate_data_loc,
+            compact=False, refresh=False
+        ):
+        '''
+        Builds a loader from tables already in memory rather than a source. Used
+        by the benchmarks, which run off of a synthetic league
+
+        Parameters:
+        * db (dict): dcm style tables keyed by name ('games', 'market_data', etc)
+        * last_completed_season (int): season of the last completed week
+        * last_completed_week (int): last completed week
+        * dvoa_projections (DataFrame): team, season, projected_total_dvoa
+        * intermediate_data_loc (str): folder the loader writes its csvs and cache to
+        * compact (bool): store the current file in the compact schema
+        * refresh (bool): rebuild only changed games against the cache
+
+        Returns:
+        * loader (DataLoader): a built loader
+        '''
+        loader = cls.__new__(cls)
+        loader.init_state(compact, refresh, intermediate_data_loc)
+        loader.source = None
+        loader.last_completed_season = last_completed_season
+        loader.last_completed_week = last_completed_week
+        loader.db = db
+        loader.dvoa_projections = dvoa_projections
+        loader.build()
+        return loader
+
+    def init_state(self, compact, refresh, intermediate_data_loc=None):
+        '''
+        Sets the load options and output locations
+        '''
+        self.compact = compact
+        self.refresh = refresh
+        ## memory records for each load stage, see memory_report() ##
+        self.memory_records = []
+        self.package_dir = pathlib.Path(__file__).parent.parent.parent.resolve()
+        self.intermediate_data_loc = (
+            intermediate_data_loc if intermediate_data_loc is not None else
+            '{0}/Intermediate Data'.format(pathlib.Path(__file__).parent.resolve())
+        )
+        self.cache_loc = '{0}/refresh_cache.pkl'.format(self.intermediate_data_loc)
 
-    def format_market_data(self):
+    def build(self):
+        '''
+        Builds market data and the current file from the loaded tables
+        '''
+        ## pre-warm a translator for every season. The current file is built off ##
+        ## of games, so this covers every season it will hold ##
+        with profiler.span('translator prewarm'):
+            translator_pool.prewarm(self.db['games']['season'].unique())
+        self.signatures = self.gen_signatures()
+        cache = self.load_cache() if self.refresh else None
+        if cache is None:
+            self.market_data = self.format_market_data()
+            self.memory_records.append(frame_memory(self.market_data, 'market_data'))
+            games = self.gen_current_file()
+        else:
+            games = self.refresh_current_file(cache)
+        self.current_file = self.save_current_file(games)
+
+    def memory_report(self):
+        '''
+        Returns a table of frame memory at each load stage
+        '''
+        return memory_report(self.memory_records)
+
+    @profiler.profile('DataLoader.gen_signatures')
+    def gen_signatures(self):
+        '''
+        Hashes every source input of each game into a single signature so a
+        refresh can tell which games changed since the last load. Team-season
+        inputs (wt ratings, dvoa projections) are mapped onto both teams' games
+
+        Returns:
+        * signatures (Series): uint64 signature indexed by game_id
+        '''
+        games = self.db['games'][['game_id', 'season', 'home_team', 'away_team']]
+        ## per game inputs ##
+        parts = {}
+        for table in ['games', 'market_data', 'wepa', 'filmmargins', 'hfa', 'qbelo']:
+            parts[table] = self.hash_by_game(self.db[table]).reindex(
+                games['game_id'].values, fill_value=0
+            ).values
+        ## team season inputs ##
+        for name, df in [
+            ('wt_ratings', self.db['wt_ratings']),
+            ('dvoa_projections', self.dvoa_projections)
+        ]:
+            team_hashes = pd.Series(
+                pd.util.hash_pandas_object(df, index=False).values,
+                index=pd.MultiIndex.from_arrays([df['team'].values, df['season'].values])
+            ).groupby(level=[0, 1]).sum()
+            for side in ['home', 'away']:
+                parts['{0}_{1}'.format(name, side)] = team_hashes.reindex(
+                    pd.MultiIndex.from_arrays([
+                        games['{0}_team'.format(side)].values, games['season'].values
+                    ]),
+                    fill_value=0
+                ).values
+        ## combine into one signature per game ##
+        return pd.util.hash_pandas_object(
+            pd.DataFrame(parts, index=games['game_id'].values),
+            index=True
+        )
+
+    def hash_by_game(self, df):
+        '''
+        Hashes the rows of a table and sums them by game_id. The sum makes the
+        hash independent of row order within a game (ie home and away rows)
+        '''
+        return pd.Series(
+            pd.util.hash_pandas_object(df, index=False).values,
+            index=df['game_id'].values
+        ).groupby(level=0).sum()
+
+    def load_cache(self):
+        '''
+        Loads the cache of the previous load. Returns None if there is no cache
+        or it cannot be read, in which case the loader does a full build
+        '''
+        if not pathlib.Path(self.cache_loc).exists():
+            print('     No refresh cache found. Running a full build...')
+            return None
+        try:
+            cache = pd.read_pickle(self.cache_loc)
+        except Exception as e:
+            print('     Could not read the refresh cache ({0}). Running a full build...'.format(e))
+            return None
+        if not all(k in cache for k in ['current_file', 'market_data', 'signatures']):
+            print('     Refresh cache is incomplete. Running a full build...')
+            return None
+        ## cached games are only valid for the package version and columns they ##
+        ## were built with. Otherwise unchanged games would be served stale ##
+        if cache.get('version') != self.cache_version():
+            print('     Refresh cache is from a different build. Running a full build...')
+            return None
+        return cache
+
+    def cache_version(self, games=None, market_data=None):
+        '''
+        Version of the refresh cache: the package version and the column lists
+        of a full build. Without frames, the columns come from building no games
+
+        Parameters:
+        * games (DataFrame): a built current file
+        * market_data (DataFrame): built market data
+        '''
+        if market_data is None:
+            market_data = self.format_market_data(game_ids=[])
+        if games is None:
+            ## the games merge market data in. Both builds overwrite it after ##
+            self.market_data = market_data
+            games = self.gen_current_file(game_ids=[])
+        return {
+            'package' : __version__,
+            'current_file' : list(games.columns),
+            'market_data' : list(market_data.columns),
+        }
+
+    def save_cache(self, games):
+        '''
+        Saves the full precision current file, market data, and input signatures
+        for the next refresh
+        '''
+        pd.to_pickle(
+            {
+                'current_file' : games,
+                'market_data' : self.market_data,
+                'signatures' : self.signatures,
+                'version' : self.cache_version(games, self.market_data),
+            },
+            self.cache_loc
+        )
+
+    def changed_game_ids(self, cache):
+        '''
+        Returns the game_ids that need to be rebuilt: new games, games whose
+        input signature changed, and games whose game numbers or prev/next
+        links changed
+        '''
+        ## signature changes, new games show up as NaN on the cached side ##
+        cached_signatures = cache['signatures'].reindex(self.signatures.index)
+        changed = set(self.signatures.index[
+            cached_signatures.isnull().values |
+            (cached_signatures.values != self.signatures.values)
+        ])
+        ## game number changes. Numbering runs off the full schedule, but is cheap ##
+        numbers = self.add_game_numbers(
+            self.db['games'][['game_id', 'season', 'week', 'home_team', 'away_team']].copy()
+        ).set_index('game_id')[self.game_number_columns]
+        cached_numbers = cache['current_file'].set_index('game_id').reindex(
+            numbers.index
+        )[self.game_number_columns]
+        differs = ~(
+            (numbers == cached_numbers) |
+            (numbers.isnull() & cached_numbers.isnull())
+        ).all(axis=1)
+        changed.update(numbers.index[differs.values])
+        return changed
+
+    def splice(self, cached, rebuilt, game_ids):
+        '''
+        Replaces the rebuilt games in a cached frame and orders the result by
+        the passed game_ids. Cached games not in game_ids are dropped
+        '''
+        spliced = pd.concat([
+            cached[
+                ~cached['game_id'].isin(rebuilt['game_id'])
+            ],
+            rebuilt
+        ])
+        spliced = spliced[spliced['game_id'].isin(game_ids)]
+        ## order to match a full build ##
+        order = pd.Series(range(len(game_ids)), index=pd.Index(game_ids))
+        spliced = spliced.iloc[
+            numpy.argsort(order.reindex(spliced['game_id']).values, kind='stable')
+        ].reset_index(drop=True)
+        ## keep a full build's column order ##
+        columns = rebuilt.columns if len(rebuilt) > 0 else cached.columns
+        return spliced[columns]
+
+    @profiler.profile('DataLoader.refresh_current_file')
+    def refresh_current_file(self, cache):
+        '''
+        Rebuilds only the changed games and splices them into the cached market
+        data and current file
+        '''
+        changed = self.changed_game_ids(cache)
+        print('     Refreshing {0} of {1} games...'.format(
+            len(changed), len(self.signatures)
+        ))
+        ## market data ##
+        rebuilt_market = self.format_market_data(game_ids=changed)
+        self.market_data = self.splice(
+            cache['market_data'], rebuilt_market,
+            self.db['market_data']['game_id'].tolist()
+        )
+        self.market_data.to_csv(
+            '{0}/market_data.csv'.format(self.intermediate_data_loc)
+        )
+        self.memory_records.append(frame_memory(self.market_data, 'market_data'))
+        ## games ##
+        rebuilt_games = self.gen_current_file(game_ids=changed)
+        return self.splice(
+            cache['current_file'], rebuilt_games,
+            self.db['games']['game_id'].tolist()
+        )
+
+    @profiler.profile('DataLoader.format_market_data')
+    def format_market_data(self, game_ids=None):
         '''
         Formats market_data and adds probability columns
+
+        Parameters:
+        * game_ids (iterable): optional subset of games to format. The full
+          table is formatted and saved when None
         '''
         print('Formatting market data...')
         ## copy & rename ##
-        market_data = self.db['market_data'][[
+        market_data = self.db['market_data']
+        if game_ids is not None:
+            market_data = market_data[market_data['game_id'].isin(game_ids)]
+        market_data = market_data[[
             ## meta ##
             'game_id', 'season', 'week', 'home_team', 'away_team',
             ## spreads ##
@@ -115,9 +401,10 @@ class DataLoader:
         ## add implied elo dif ##
         market_data['home_implied_elo_dif_open'] = prob_to_elo(market_data['home_implied_win_probability_open'])
         market_data['home_implied_elo_dif_close'] = prob_to_elo(market_data['home_implied_win_probability_close'])
-        market_data.to_csv(
-            '{0}/market_data.csv'.format(self.intermediate_data_loc)
-        )
+        if game_ids is None:
+            market_data.to_csv(
+                '{0}/market_data.csv'.format(self.intermediate_data_loc)
+            )
         ## return ##
         return market_data
 
@@ -183,6 +470,12 @@ class DataLoader:
             on=['game_id'],
             how='left'
         )
+        ## add clv ##
+        ## inputs never change with model config, so calc once here rather than ##
+        ## per row on every model run ##
+        games['home_clv_from_open'], games['away_clv_from_open'] = calc_clv_series(
+            games['home_line_open'], games['home_line_close'], games['season']
+        )
         ## return ##
         return games
     
@@ -472,13 +765,19 @@ class DataLoader:
         ## return ##
         return games
 
-    def gen_current_file(self):
+    @profiler.profile('DataLoader.gen_current_file')
+    def gen_current_file(self, game_ids=None):
         '''
         Wrapper that generates the current file by first formating the games file and then
         merging market data, dvoa, etc etc
+
+        Parameters:
+        * game_ids (iterable): optional subset of games to build
         '''
         ## get games ##
         games = self.format_games()
+        if game_ids is not None:
+            games = games[games['game_id'].isin(game_ids)].reset_index(drop=True)
         ## perform merges ##
         games = merge_check(self.add_game_numbers, games, 'game numbers')
         games = merge_check(self.add_market_info, games, 'market data')
@@ -488,10 +787,25 @@ class DataLoader:
         games = merge_check(self.add_pff_margins, games, 'pff margins')
         games = merge_check(self.add_hfa, games, 'hfa')
         games = merge_check(self.add_qbs, games, 'qbs')
+        ## return ##
+        return games
+
+    @profiler.profile('DataLoader.save_current_file')
+    def save_current_file(self, games):
+        '''
+        Saves the current file and the refresh cache, and compacts the file
+        if requested
+        '''
+        self.memory_records.append(frame_memory(games, 'current_file'))
         ## save ##
         games.to_csv(
             '{0}/current_file.csv'.format(self.intermediate_data_loc)
         )
+        self.save_cache(games)
+        ## compact after the save so the csv is unchanged ##
+        if self.compact:
+            games = compact_frame(games)
+            self.memory_records.append(frame_memory(games, 'current_file_compact'))
         ## return ##
         return games
 
@@ -4,7 +4,8 @@ in DataLoader.format_market_data.
 
 The nfelotranslation Translator is a scalar per-game API, so spread<->WP
 conversion loops over a Series while reusing the per-season fit via
-.update() within a season. Spread/ML blending is logit-space numpy math.
+.update() within a season. Per-season fits come from the shared
+translator_pool. Spread/ML blending is logit-space numpy math.
 
 Sign convention:
     nfelo uses sportsbook spreads (negative = home favored).
@@ -17,12 +18,13 @@ import numpy
 from scipy.special import expit
 from scipy.special import logit
 
-from nfelotranslation import Translator
+from ...Utilities import translator_pool
 
 def _translate_series(values:pd.Series, seasons:pd.Series, input_type:str, in_xform:callable, out_xform:callable):
     '''
     One Translator reused via .update() within a season;
-    rebuilt when the season changes. Pre-2007 seasons clamp to 2007.
+    pulled from translator_pool when the season changes. Pre-2007 seasons
+    clamp to 2007.
     NaN rows pass through as NaN in the output.
 
     Parameters:
@@ -35,8 +37,6 @@ def _translate_series(values:pd.Series, seasons:pd.Series, input_type:str, in_xf
     Returns:
     * series of translated values, index aligned with values
     '''
-    ## clamp to the earliest season of the nfelotranslation package ##
-    _EARLIEST_SEASON = 2007
     ## convert to numpy arrays for speed ##
     season_arr = seasons.to_numpy()
     value_arr = values.to_numpy(dtype=float)
@@ -50,9 +50,9 @@ def _translate_series(values:pd.Series, seasons:pd.Series, input_type:str, in_xf
         if numpy.isnan(value) or pd.isna(season):
             continue
         nt_value = in_xform(value)
-        season_clamped = max(int(season), _EARLIEST_SEASON)
+        season_clamped = translator_pool.clamp_season(season)
         if translator is None or translator_season != season_clamped:
-            translator = Translator(nt_value, input_type, season=season_clamped, side='home')
+            translator = translator_pool.get(nt_value, input_type, season_clamped)
             translator_season = season_clamped
         else:
             translator.update(nt_value, input_type)
@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+
+class DataSource(ABC):
+    '''
+    Interface the DataLoader pulls its tables and season state from
+    '''
+
+    @abstractmethod
+    def get_season_state(self) -> tuple:
+        '''
+        Returns the (season, week) of the last completed week
+        '''
+        pass
+
+    @abstractmethod
+    def load(self, tables:list) -> dict:
+        '''
+        Loads tables by name
+
+        Parameters:
+        * tables (list): names of the tables to load
+
+        Returns:
+        * db (dict): DataFrames keyed by table name
+        '''
+        pass
+
+    def describe(self) -> str:
+        '''
+        Short description of the source for logging
+        '''
+        return self.__class__.__name__
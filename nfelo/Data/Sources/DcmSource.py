@@ -0,0 +1,18 @@
+from .DataSource import DataSource
+
+class DcmSource(DataSource):
+    '''
+    Loads tables and the season state from nfelodcm. nfelodcm is imported on
+    first use, so offline sources do not require it (or its network check)
+    '''
+
+    def __init__(self, state_type:str='last_full_week'):
+        self.state_type = state_type
+
+    def get_season_state(self) -> tuple:
+        import nfelodcm as dcm
+        return dcm.get_season_state(self.state_type)
+
+    def load(self, tables:list) -> dict:
+        import nfelodcm as dcm
+        return dcm.load(tables)
@@ -0,0 +1,123 @@
+import json
+import pathlib
+
+import pandas as pd
+
+from .DataSource import DataSource
+
+## columnar formats, in order of preference ##
+FILE_FORMATS = {
+    'parquet' : '.parquet',
+    'pickle' : '.pkl',
+}
+
+def parquet_available() -> bool:
+    '''
+    Whether pandas has a parquet engine (pyarrow or fastparquet) installed
+    '''
+    for engine in ['pyarrow', 'fastparquet']:
+        try:
+            __import__(engine)
+            return True
+        except ImportError:
+            pass
+    return False
+
+class FixtureSource(DataSource):
+    '''
+    Loads snapshotted tables from a local fixture directory so the pipeline
+    runs offline and deterministically. The directory holds one file per table
+    ({table}.parquet, or {table}.pkl where no parquet engine is installed) and a
+    season_state.json written by snapshot()
+
+    Parameters:
+    * fixture_dir (str): directory of the snapshot
+    * season_state (tuple): optional (season, week) that overrides the snapshot's
+    '''
+
+    def __init__(self, fixture_dir:str, season_state:tuple=None):
+        self.fixture_dir = pathlib.Path(fixture_dir)
+        self.season_state = season_state
+        if not self.fixture_dir.exists():
+            raise FileNotFoundError(
+                'FIXTURE ERROR: {0} does not exist. Create it with snapshot_nfelodcm()'.format(
+                    self.fixture_dir
+                )
+            )
+
+    def describe(self) -> str:
+        return 'FixtureSource({0})'.format(self.fixture_dir)
+
+    def get_season_state(self) -> tuple:
+        if self.season_state is not None:
+            return tuple(self.season_state)
+        with open(self.fixture_dir / 'season_state.json', 'r') as fp:
+            state = json.load(fp)
+        return state['season'], state['week']
+
+    def table_path(self, table:str) -> pathlib.Path:
+        '''
+        Path of a table's snapshot, in whichever format was written
+        '''
+        for ext in FILE_FORMATS.values():
+            path = self.fixture_dir / '{0}{1}'.format(table, ext)
+            if path.exists():
+                return path
+        raise FileNotFoundError('FIXTURE ERROR: {0} has no snapshot of {1}'.format(
+            self.fixture_dir, table
+        ))
+
+    def load(self, tables:list) -> dict:
+        db = {}
+        for table in tables:
+            path = self.table_path(table)
+            if path.suffix == FILE_FORMATS['parquet']:
+                db[table] = pd.read_parquet(path)
+            else:
+                db[table] = pd.read_pickle(path)
+        return db
+
+    @staticmethod
+    def snapshot(source:DataSource, tables:list, fixture_dir:str, file_format:str=None) -> pathlib.Path:
+        '''
+        Writes the tables and season state of a source to a fixture directory
+
+        Parameters:
+        * source (DataSource): the source to snapshot, ie DcmSource()
+        * tables (list): names of the tables to snapshot
+        * fixture_dir (str): directory to write to
+        * file_format (str): 'parquet' or 'pickle'. Defaults to parquet when an
+          engine is installed
+
+        Returns:
+        * fixture_dir (Path): the written directory
+        '''
+        if file_format is None:
+            file_format = 'parquet' if parquet_available() else 'pickle'
+        if file_format not in FILE_FORMATS:
+            raise ValueError('FIXTURE ERROR: {0} is not one of {1}'.format(
+                file_format, ', '.join(FILE_FORMATS.keys())
+            ))
+        fixture_dir = pathlib.Path(fixture_dir)
+        fixture_dir.mkdir(parents=True, exist_ok=True)
+        season, week = source.get_season_state()
+        db = source.load(tables)
+        for table, df in db.items():
+            ## drop stale snapshots of the table in the other format ##
+            for ext in FILE_FORMATS.values():
+                stale = fixture_dir / '{0}{1}'.format(table, ext)
+                if stale.exists():
+                    stale.unlink()
+            path = fixture_dir / '{0}{1}'.format(table, FILE_FORMATS[file_format])
+            if file_format == 'parquet':
+                df.to_parquet(path, index=False)
+            else:
+                df.to_pickle(path)
+        with open(fixture_dir / 'season_state.json', 'w') as fp:
+            json.dump({
+                'season' : int(season),
+                'week' : int(week),
+                'source' : source.describe(),
+                'tables' : list(db.keys()),
+            }, fp, indent=2)
+        return fixture_dir
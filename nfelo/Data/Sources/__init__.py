@@ -0,0 +1,3 @@
+from .DataSource import DataSource
+from .DcmSource import DcmSource
+from .FixtureSource import FixtureSource
\ No newline at end of file
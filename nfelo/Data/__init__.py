@@ -1 +1,2 @@
-from .DataLoader import DataLoader
\ No newline at end of file
+from .DataLoader import DataLoader
+from .Sources import DataSource, DcmSource, FixtureSource
\ No newline at end of file
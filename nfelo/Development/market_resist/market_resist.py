@@ -2,10 +2,8 @@ import pandas as pd
 import numpy
 import pathlib
 
-from nfelotranslation import Translator
-
 from ...Utilities import (
-    elo_to_prob, calc_shift
+    elo_to_prob, calc_shift, translator_pool
 )
 
 ### Explore how the market resist factor responds to different ###
@@ -14,7 +12,7 @@ def market_resist_explore():
     recs = []
     ## per-season MODEL fit used for synthetic exploration; default to the ##
     ## most recent fully-completed season ##
-    translator = Translator(0.5, 'win_prob', season=2024, side='home')
+    translator = translator_pool.get(0.5, 'win_prob', 2024)
     ## construct hypotheticals ##
     for home_elo_dif_model in range(-25,26):
         ## scale up to elo dif ##
@@ -1,10 +1,11 @@
 import pandas as pd
 import pathlib
 import json
+import datetime
 
 from ..Data import DataLoader
 from ..Model import Nfelo
-from ..Optimizer import NfeloOptimizer
+from ..Optimizer import NfeloOptimizer, NfeloSweep
 
 def optimize_nfelo_core():
     '''
@@ -160,3 +161,35 @@ def optimize_base_with_k():
     optimize_base_with_var('z', overrides)
     overrides = [4,5,6,7,8,9]
     optimize_base_with_var('b', overrides)
+
+def sweep_nfelo(grids=None, n_workers=1):
+    '''
+    One at a time sensitivity sweep of the current config (see NfeloSweep),
+    for setting the bounds and best guesses in available_features without
+    launching an optimization per override. Defaults to 25 values across the
+    range of every feature
+
+    The response curves are saved to Optimizer/results/nfelo-sweep-{date}.csv
+    '''
+    ## load config ##
+    config_loc = '{0}/config.json'.format(
+        pathlib.Path(__file__).parent.parent.resolve()
+    )
+    with open(config_loc, 'r') as fp:
+        config = json.load(fp)
+    ## load data ##
+    data = DataLoader()
+    nfelo = Nfelo(
+        data=data,
+        config=config['models']['nfelo']
+    )
+    ## sweep ##
+    sweep = NfeloSweep(nfelo, grids=grids, n_workers=n_workers)
+    results = sweep.run()
+    print(sweep.sensitivity())
+    results_dir = pathlib.Path(__file__).parent.parent.resolve() / 'Optimizer' / 'results'
+    results_dir.mkdir(parents=True, exist_ok=True)
+    results.to_csv(results_dir / 'nfelo-sweep-{0}.csv'.format(
+        datetime.datetime.now().strftime("%Y-%m-%d")
+    ))
+    return sweep
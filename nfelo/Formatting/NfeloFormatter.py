@@ -5,22 +5,26 @@ import pathlib
 from ..Data import DataLoader
 from ..Model import Nfelo
 from ..Performance import NfeloGrader
-from ..Utilities import bet_size
+from ..Utilities import bet_size, profiler
 
 class NfeloFormatter:
     '''
     Class that formats data to be used in downstream pipelines
     '''
 
-    def __init__(self, data:DataLoader, model:Nfelo, graded:NfeloGrader) -> None:
+    def __init__(self,
+            data:DataLoader, model:Nfelo, graded:NfeloGrader,
+            output_loc:str=None, external_folder:str=None
+        ) -> None:
         print('Formatting Output Files...')
         self.data = data
         self.model = model
         self.graded = graded
-        self.output_loc = '{0}/Data/Formatted Data'.format(
+        ## output folders can be overridden (ie the benchmarks write to a temp dir) ##
+        self.output_loc = output_loc if output_loc is not None else '{0}/Data/Formatted Data'.format(
             pathlib.Path(__file__).parent.parent.resolve()
         )
-        self.external_folder = '{0}/output_data'.format(
+        self.external_folder = external_folder if external_folder is not None else '{0}/output_data'.format(
             pathlib.Path(__file__).parent.parent.parent.resolve()
         )
         ## format data ##
@@ -33,6 +37,7 @@ class NfeloFormatter:
         self.gen_cur_w_analytics()
         self.gen_nfelo_games()
  
+    @profiler.profile('NfeloFormatter.gen_rolling_hfa')
     def gen_rolling_hfa(self):
         '''
         Generate a rolling HFA file by season and week
@@ -45,6 +50,7 @@ class NfeloFormatter:
             '{0}/rolling_hfa.csv'.format(self.output_loc)
         )
     
+    @profiler.profile('NfeloFormatter.gen_scored_games')
     def gen_scored_games(self):
         '''
         Formats the grader to produce a "scored individual games" file
@@ -83,6 +89,7 @@ class NfeloFormatter:
             )
         )
 
+    @profiler.profile('NfeloFormatter.gen_wepa_flat')
     def gen_wepa_flat(self):
         '''
         Generates a flattened wepa file
@@ -162,6 +169,7 @@ class NfeloFormatter:
             '{0}/wepa_flat_file.csv'.format(self.output_loc)
         )
     
+    @profiler.profile('NfeloFormatter.gen_wt_ratings')
     def gen_wt_ratings(self):
         '''
         Format the win total ratings to match downstream format
@@ -191,6 +199,7 @@ class NfeloFormatter:
             '{0}/wt_ratings.csv'.format(self.output_loc)
         )
 
+    @profiler.profile('NfeloFormatter.gen_projections')
     def gen_projections(self):
         '''
         Generates projections from the passed Nfelo model
@@ -355,52 +364,17 @@ class NfeloFormatter:
                 '{0}/elo_snapshot.csv'.format(self.external_folder)
             )
 
+    @profiler.profile('NfeloFormatter.gen_most_recent_elo_file')
     def gen_most_recent_elo_file(self):
         '''
         Generates the most recent elo file
         '''
-        df = self.model.updated_file.copy()
-        ## add adjs to the nfelos ##
-        df['nfelo_home'] = df['ending_nfelo_home'] + df['home_538_qb_adj']
-        df['nfelo_starting_home'] = df['starting_nfelo_home'] + df['home_538_qb_adj']
-        df['nfelo_away'] = df['ending_nfelo_away'] + df['away_538_qb_adj']
-        df['nfelo_starting_away'] = df['starting_nfelo_away'] + df['away_538_qb_adj']
-        ## flatten ##
-        flat = pd.concat([
-            ## home ##
-            df[[
-                'home_team', 'game_id', 'season', 'week',
-                'nfelo_home', 'nfelo_starting_home', 'home_538_qb_adj'
-            ]].rename(columns={
-                'home_team' : 'team',
-                'nfelo_home' : 'nfelo',
-                'nfelo_starting_home' : 'nfelo_starting',
-                'home_538_qb_adj' : '538_qb_adj'
-            }),
-            ## away ##
-            df[[
-                'away_team', 'game_id', 'season', 'week',
-                'nfelo_away', 'nfelo_starting_away', 'away_538_qb_adj'
-            ]].rename(columns={
-                'away_team' : 'team',
-                'nfelo_away' : 'nfelo',
-                'nfelo_starting_away' : 'nfelo_starting',
-                'away_538_qb_adj' : '538_qb_adj'
-            })
-        ])
-        ## re-sort ##
-        flat = flat.sort_values(
-            by=['team', 'season', 'week'],
-            ascending=[True, True, True]
-        ).reset_index(drop=True)
-        ## create lags ##
-        flat['nfelo_t_1'] = flat.groupby(['team'])['nfelo'].shift(1)
-        flat['nfelo_soy'] = flat.groupby(['team', 'season'])['nfelo_starting'].transform('first')
-        ## add deltas ##
-        flat['nfelo_wow_delta'] = flat['nfelo'] - flat['nfelo_t_1']
-        flat['nfelo_ytd_delta'] = flat['nfelo'] - flat['nfelo_soy']
-        ## get most recent record of df ##
-        flat = flat.groupby(['team']).tail(1).reset_index(drop=True)
+        ## most recent game of each team, with lags and deltas, from the ratings index ##
+        flat = self.model.ratings.latest()[[
+            'team', 'game_id', 'season', 'week',
+            'nfelo', 'nfelo_starting', '538_qb_adj',
+            'nfelo_t_1', 'nfelo_soy', 'nfelo_wow_delta', 'nfelo_ytd_delta'
+        ]]
         ## save ##
         flat.to_csv(
             '{0}/most_recent_elo_file.csv'.format(
@@ -408,6 +382,7 @@ class NfeloFormatter:
             )
         )
     
+    @profiler.profile('NfeloFormatter.gen_cur_w_analytics')
     def gen_cur_w_analytics(self):
         '''
         Replicates the current_file_w_analytics
@@ -451,6 +426,7 @@ class NfeloFormatter:
             )
         )
 
+    @profiler.profile('NfeloFormatter.gen_nfelo_games')
     def gen_nfelo_games(self):
         '''
         Generates the nfelo games file which is exposed view nfelodcm and powers
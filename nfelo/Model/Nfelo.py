@@ -1,23 +1,51 @@
 import pandas as pd
 import numpy
-import statistics
 import pathlib
-
-from nfelotranslation import Translator
+import time
+import copy
 
 from ..Data import DataLoader
+from .TeamState import TeamState
+from .RatingsIndex import RatingsIndex
+from .RecordBuffer import RecordBuffer
 from ..Utilities import (
-    offseason_regression, elo_to_prob,
-    regress_to_market, prob_to_elo,
-    calc_weighted_shift, calc_clv
+    offseason_regression_vector, elo_to_prob, elo_to_prob_vector,
+    regress_to_market, regress_to_market_vector, prob_to_elo,
+    calc_weighted_shift, translator_pool,
+    compact_frame, float64_upcasts, SectionTimer
 )
 
 class Nfelo:
     '''
     Primary elo model. 
     '''
+    ## hot path sections timed when profiling is enabled, see enable_profiling() ##
+    profile_sections = [
+        ## project_game ##
+        'offseason_regression', 'game_context', 'translate_base',
+        'regress_to_market', 'translate_open', 'translate_close',
+        ## process_game ##
+        'calc_shift', 'state_update', 'elo_records',
+    ]
+    ## config features only read by the market regression, which never feeds ##
+    ## back into the team state (see run_market()) ##
+    market_features = [
+        'market_regression', 'min_mr', 'spread_delta_base', 'rmse_base',
+        'long_line_inflator', 'hook_certainty',
+    ]
+    ## structured records of each team game and each offseason reversion ##
+    elo_record_dtype = [
+        ('team_id', 'int32'), ('season', 'int32'), ('week', 'int32'),
+        ('game_id', 'O'), ('opponent_id', 'int32'),
+    ] + [(field, 'float64') for field in TeamState.numeric_fields[2:]]
+    reversion_record_dtype = [
+        ('team_id', 'int32'), ('season', 'int32'), ('week', 'int32'),
+        ('previous_ending_elo', 'float64'), ('league_elo', 'float64'),
+        ('mean_reverted_elo', 'float64'), ('dvoa_elo', 'float64'),
+        ('wt_elo', 'float64'), ('new_elo', 'float64'),
+    ]
 
-    def __init__(self, data:DataLoader, config:dict):
+    def __init__(self, data:DataLoader, config:dict, record_history:bool=True):
         self.data = data
         self.config = config['nfelo_config']
         self.initial_elos = config['beginning_elo']
@@ -25,54 +53,226 @@ class Nfelo:
         self.current_file = data.current_file[
             data.current_file['season'] >= self.first_season
         ].copy()
-        self.teams = self.current_file['home_team'].unique().tolist()
-        self.current_elos = self.init_elos()
+        ## team universe, in order of first appearance. Teams first seen later ##
+        ## (ie in projections) are added to the state as they appear ##
+        self.teams = pd.unique(
+            self.current_file[['home_team', 'away_team']].to_numpy().ravel()
+        ).tolist()
+        self.state = self.init_elos()
+        ## season the team state is in. Entering a new season regresses every ##
+        ## team with an opener in it at once, see start_season() ##
+        self.state_season = self.first_season
+        self.season_openers = self.gen_season_openers()
+        ## season end elos by season, and their medians once computed ##
         self.yearly_elos = {}
-        self.reversion_records = []
-        self.elo_records = []
+        self.league_medians = {}
+        ## elo and reversion records, preallocated on run. When record_history ##
+        ## is False (ie optimizer evals that never read them) nothing is written ##
+        self.record_history = record_history
+        self.elo_history = RecordBuffer(self.elo_record_dtype)
+        self.reversion_history = RecordBuffer(self.reversion_record_dtype)
+        self._ratings = None
         self.updated_file = None
         self.updated_file_ext = None
         self.projections = None
         ## per-season nfelotranslation Translator, reused across rows via update() ##
-        ## rebuilt only when row season differs from the cached season ##
+        ## swapped for a pooled copy only when row season differs from the cached season ##
         self._translator = None
         self._translator_season = None
+        ## per-section hot path timer. None (the default) disables profiling ##
+        self.section_timer = None
     
     def init_elos(self):
         '''
-        Initiallizes a dictionary that is used
+        Initiallizes the team state that is used
         to look up elo values
         
         The structure always represents a snapshot of the team
         through their most recent game. Since on init there is no recent
         game, we use "week 0"
         '''
-        current_elos = {}
-        for team in self.teams:
-            current_elos[team] = {
-                'team' : team,
-                'season' : self.first_season,
-                'week' : 0,
-                'game_id' : numpy.nan,
-                'opponent' : numpy.nan,
-                'starting_nfelo' : numpy.nan,
-                'ending_nfelo' : self.initial_elos[team],
-                ## rolling error information ##
-                'starting_nfelo_adj' : 0,
-                'ending_nfelo_adj' : 0,
-                'starting_market_se' : 0,
-                'ending_market_se' : 0,
-                'starting_model_se' : 0,
-                'ending_model_se' : 0,
-            }
+        state = TeamState(self.initial_elos, self.first_season)
+        state.add_teams(self.teams)
         ## return ##
-        return current_elos
-    
+        return state
+
+    def gen_season_openers(self):
+        '''
+        The first game of each team in each season after the first, in game
+        order (home then away), with the inputs of the offseason regression
+
+        Returns:
+        * openers (dict): frame of team, week, proj_dvoa and proj_wt_rating
+          by season
+        '''
+        cf = self.current_file
+        sides = []
+        for side_number, side in enumerate(['home', 'away']):
+            mask = (
+                (cf['game_number_{0}'.format(side)] == 1) &
+                (cf['season'] > self.first_season)
+            ).to_numpy()
+            sides.append(pd.DataFrame({
+                'position' : numpy.flatnonzero(mask),
+                'side' : side_number,
+                'team' : cf['{0}_team'.format(side)].to_numpy()[mask],
+                'season' : cf['season'].to_numpy()[mask],
+                'week' : cf['week'].to_numpy()[mask],
+                'proj_dvoa' : cf['{0}_projected_dvoa'.format(side)].to_numpy(dtype='float64')[mask],
+                'proj_wt_rating' : cf['{0}_wt_rating'.format(side)].to_numpy(dtype='float64')[mask],
+            }))
+        openers = pd.concat(sides).sort_values(
+            by=['position', 'side'], kind='mergesort'
+        )
+        return {
+            season : df.drop(columns=['position', 'side', 'season']).reset_index(drop=True)
+            for season, df in openers.groupby('season')
+        }
+
+    def start_season(self, season):
+        '''
+        Regresses every team that opens the season from its previous season
+        ending elo in one array operation, and records the reversions. Called
+        once, when the first game of the season is projected
+        '''
+        self.state_season = season
+        openers = self.season_openers.get(season)
+        if openers is None or len(openers) == 0:
+            return
+        team_ids = numpy.array(
+            [self.state.team_id(team) for team in openers['team']], dtype='int64'
+        )
+        league_elo = self.league_median(season - 1)
+        previous_elo = self.state.ending_nfelo[team_ids].copy()
+        regression = offseason_regression_vector(
+            league_elo = league_elo,
+            previous_elo = previous_elo,
+            proj_dvoa = openers['proj_dvoa'].to_numpy(),
+            proj_wt_rating = openers['proj_wt_rating'].to_numpy(),
+            reversion = self.config['reversion'],
+            dvoa_weight = self.config['dvoa_weight'],
+            wt_weight = self.config['wt_ratings_weight']
+        )
+        ## teams have not played since the end of last season, so the ##
+        ## regressed elo becomes the starting elo of their opener ##
+        self.state.ending_nfelo[team_ids] = regression['new_elo']
+        ## keep track of reversion history ##
+        if self.record_history:
+            self.reversion_history.extend({
+                'team_id' : team_ids,
+                'season' : season,
+                'week' : openers['week'].to_numpy(),
+                'previous_ending_elo' : previous_elo,
+                'league_elo' : league_elo,
+                'mean_reverted_elo' : regression['mean_reverted_elo'],
+                'dvoa_elo' : regression['dvoa_elo'],
+                'wt_elo' : regression['wt_elo'],
+                'new_elo' : regression['new_elo'],
+            })
+
+    @property
+    def current_elos(self):
+        '''
+        Snapshot of every team's state as a dict of team records
+        '''
+        return self.state.to_dict()
+
+    @property
+    def elo_records(self):
+        '''
+        Each team's state after each processed game, two records per game
+        (home then away), as a DataFrame
+        '''
+        records = self.elo_history.to_frame()
+        teams = numpy.asarray(self.state.teams, dtype='object')
+        records.insert(0, 'team', teams[records['team_id'].to_numpy()])
+        records.insert(5, 'opponent', teams[records['opponent_id'].to_numpy()])
+        return records.drop(columns=['team_id', 'opponent_id'])
+
+    @property
+    def reversion_records(self):
+        '''
+        Offseason reversions as a DataFrame
+        '''
+        records = self.reversion_history.to_frame()
+        teams = numpy.asarray(self.state.teams, dtype='object')
+        records.insert(0, 'team', teams[records['team_id'].to_numpy()])
+        return records.drop(columns=['team_id'])
+
+    def reset_history(self, played:pd.DataFrame):
+        '''
+        Clears the elo and reversion records and preallocates them for the
+        played games, two elo records per game and one reversion per team
+        opening a season after the first
+        '''
+        if not self.record_history:
+            self.elo_history.reset()
+            self.reversion_history.reset()
+            return
+        later_seasons = played['season'] > self.first_season
+        self.elo_history.reset(2 * len(played))
+        self.reversion_history.reset(
+            ((played['game_number_home'] == 1) & later_seasons).sum() +
+            ((played['game_number_away'] == 1) & later_seasons).sum()
+        )
+
+    @property
+    def ratings(self):
+        '''
+        Point-in-time RatingsIndex over the elo records, built on first access
+        after a run
+        '''
+        if self._ratings is None:
+            self._ratings = RatingsIndex.from_model(self)
+        return self._ratings
+
+    @property
+    def season_end_week(self):
+        '''
+        Week whose ending elos define the league median for the next offseason
+        '''
+        return self.config.get('season_end_week', 17)
+
+    def league_median(self, season):
+        '''
+        Median season end elo of a season, computed once per season
+        '''
+        median = self.league_medians.get(season)
+        if median is None:
+            median = float(numpy.median(self.yearly_elos[season]))
+            self.league_medians[season] = median
+        return median
+
+    def enable_profiling(self, sample_every=1):
+        '''
+        Turns on per-section timing of project_game and process_game
+
+        Parameters:
+        * sample_every (int): only time every Nth game to limit overhead
+        '''
+        self.section_timer = SectionTimer(sample_every=sample_every)
+
+    def disable_profiling(self):
+        '''
+        Turns off per-section timing
+        '''
+        self.section_timer = None
+
+    def profile_report(self):
+        '''
+        Returns the per-section timing table of the profiled runs, or None if
+        profiling is not enabled
+        '''
+        if self.section_timer is None:
+            return None
+        return self.section_timer.report()
+
     def _set_translator(self, value, input_type, season):
         '''
-        Lazily builds or updates the cached nfelotranslation Translator for
+        Lazily fetches or updates the cached nfelotranslation Translator for
         the given season. Reuses loaded per-season fits via .update() when
-        the row season matches the cached season; rebuilds otherwise.
+        the row season matches the cached season; otherwise pulls the season
+        from the shared translator_pool.
 
         Parameters:
         * value (float): numeric input to translate
@@ -87,7 +287,7 @@ class Nfelo:
         ## convert season (float) to int ##
         season_int = int(season)
         if self._translator is None or self._translator_season != season_int:
-            self._translator = Translator(value, input_type, season=season_int, side='home')
+            self._translator = translator_pool.get(value, input_type, season_int)
             self._translator_season = season_int
         else:
             self._translator.update(value, input_type)
@@ -99,44 +299,20 @@ class Nfelo:
         The update process is split so the same logic can be used to project unplayed
         games
         '''
+        ## section timer for this game, None when not profiled ##
+        timer = self.section_timer
+        if timer is not None and not timer.start():
+            timer = None
+        ## entering a new season regresses every team at once ##
+        if row['season'] > self.state_season:
+            self.start_season(row['season'])
         ## for concision, pull out some local vars from the row ##
-        home_team = row['home_team']
-        away_team = row['away_team']
-        row['starting_nfelo_home'] = self.current_elos[home_team]['ending_nfelo']
-        row['starting_nfelo_away'] = self.current_elos[away_team]['ending_nfelo']
-        ## offseason regression if necessary ##
-        for team_type in ['home', 'away']:
-            if row['game_number_{0}'.format(team_type)] == 1 and row['season'] > self.first_season:
-                ## some data to keep track of conversions ##
-                previous_season_elo = row['starting_nfelo_{0}'.format(team_type)]
-                previous_elo_norm = 1505 + (
-                    previous_season_elo - statistics.median(self.yearly_elos[row['season']-1])
-                )
-                ## actual reversion ##
-                row['starting_nfelo_{0}'.format(team_type)] = offseason_regression(
-                    league_elo = statistics.median(self.yearly_elos[row['season']-1]),
-                    previous_elo = row['starting_nfelo_{0}'.format(team_type)],
-                    proj_dvoa = row['{0}_projected_dvoa'.format(team_type)],
-                    proj_wt_rating = row['{0}_wt_rating'.format(team_type)],
-                    reversion = self.config['reversion'],
-                    dvoa_weight = self.config['dvoa_weight'],
-                    wt_weight = self.config['wt_ratings_weight']
-                )
-                ## keep track of reversion history ##
-                self.reversion_records.append({
-                    'team' : row['{0}_team'.format(team_type)],
-                    'season' : row['season'],
-                    'week' : row['week'],
-                    'previous_ending_elo' : previous_season_elo,
-                    'league_elo' : statistics.median(self.yearly_elos[row['season']-1]),
-                    'mean_reverted_elo' : (
-                        self.config['reversion'] * 1505 +
-                        (1 - self.config['reversion']) * previous_elo_norm
-                    ),
-                    'dvoa_elo' : 1505 + 484 * row['{0}_projected_dvoa'.format(team_type)],
-                    'wt_elo' : 1505 + 24.8 * row['{0}_wt_rating'.format(team_type)],
-                    'new_elo' : row['starting_nfelo_{0}'.format(team_type)]
-                })
+        home_id = self.state.team_id(row['home_team'])
+        away_id = self.state.team_id(row['away_team'])
+        row['starting_nfelo_home'] = self.state.ending_nfelo[home_id]
+        row['starting_nfelo_away'] = self.state.ending_nfelo[away_id]
+        if timer is not None:
+            timer.lap('offseason_regression')
         ## save an unadjusted elo dif ##
         row['nfelo_dif_pre_adjustment'] = row['starting_nfelo_home'] - row['starting_nfelo_away']
         ## create initial elo dif with game context ##
@@ -164,10 +340,14 @@ class Nfelo:
             elo_dif=initial_elo_dif,
             z=self.config['z']
         )
+        if timer is not None:
+            timer.lap('game_context')
         self._set_translator(row['nfelo_home_probability_base'], 'win_prob', row['season'])
         ## negate: nfelotranslation positive=home favored -> nfelo sportsbook ##
         row['nfelo_home_line_base'] = -self._translator.spread.posted
         row['nfelo_spread_delta'] = row['nfelo_home_line_base'] - row['home_line_open']
+        if timer is not None:
+            timer.lap('translate_base')
         ## calc regressions ##
         mr_regression_open = regress_to_market(
             ## elo difs and lines ##
@@ -178,10 +358,10 @@ class Nfelo:
             self.config['spread_delta_base'], self.config['rmse_base'],
             self.config['long_line_inflator'], self.config['hook_certainty'],
             ## errors ##
-            self.current_elos[home_team]['ending_model_se'],
-            self.current_elos[home_team]['ending_market_se'],
-            self.current_elos[away_team]['ending_model_se'],
-            self.current_elos[away_team]['ending_market_se'],
+            self.state.ending_model_se[home_id],
+            self.state.ending_market_se[home_id],
+            self.state.ending_model_se[away_id],
+            self.state.ending_market_se[away_id],
         )
         mr_regression_close = regress_to_market(
             ## elo difs and lines ##
@@ -192,10 +372,10 @@ class Nfelo:
             self.config['spread_delta_base'], self.config['rmse_base'],
             self.config['long_line_inflator'], self.config['hook_certainty'],
             ## errors ##
-            self.current_elos[home_team]['ending_model_se'],
-            self.current_elos[home_team]['ending_market_se'],
-            self.current_elos[away_team]['ending_model_se'],
-            self.current_elos[away_team]['ending_market_se'],
+            self.state.ending_model_se[home_id],
+            self.state.ending_market_se[home_id],
+            self.state.ending_model_se[away_id],
+            self.state.ending_market_se[away_id],
         )
         ## unpack ##
         row['nfelo_dif_base'] = initial_elo_dif
@@ -203,6 +383,8 @@ class Nfelo:
         row['market_regression_factor_open'] = mr_regression_open[1]
         row['nfelo_dif_close'] = mr_regression_close[0]
         row['market_regression_factor_close'] = mr_regression_close[1]
+        if timer is not None:
+            timer.lap('regress_to_market')
         ## translate to spread and win probs, then derive cover/push/loss ##
         ## from the same per-season Translator distribution centered on the ##
         ## model's projected win probability ##
@@ -215,6 +397,8 @@ class Nfelo:
         row['home_loss_prob_open'] = 1 - row['home_cover_prob_open'] - row['home_push_prob_open']
         row['home_open_ev'] = (row['home_cover_prob_open'] - 1.1 * row['home_loss_prob_open']) / 1.1
         row['away_open_ev'] = (row['home_loss_prob_open'] - 1.1 * row['home_cover_prob_open']) / 1.1
+        if timer is not None:
+            timer.lap('translate_open')
         ## Close ##
         row['nfelo_home_probability_close'] = elo_to_prob(row['nfelo_dif_close'])
         self._set_translator(row['nfelo_home_probability_close'], 'win_prob', row['season'])
@@ -228,13 +412,10 @@ class Nfelo:
         row['away_cover_prob_close'] = row['home_loss_prob_close']
         row['home_close_ev'] = (row['home_cover_prob_close'] - 1.1 * row['home_loss_prob_close']) / 1.1
         row['away_close_ev'] = (row['home_loss_prob_close'] - 1.1 * row['home_cover_prob_close']) / 1.1
-        ## calc clvs ##
-        row['home_clv_from_open'], row['away_clv_from_open'] = calc_clv(
-            original_home_spread=row['home_line_open'],
-            current_home_spread=row['home_line_close'],
-            season=row['season'],
-        )
-        ## save some more down stream datapoints ##
+        if timer is not None:
+            timer.lap('translate_close')
+        ## clvs (home_clv_from_open, away_clv_from_open) are precalculated ##
+        ## by the DataLoader since they do not depend on the model config ##
         ## return the row ##
         return row
     
@@ -245,6 +426,12 @@ class Nfelo:
         ## check for result ##
         if pd.isnull(row['home_margin']) or pd.isnull(row['away_margin']):
             raise Exception('NFELO PROCESS ERROR: Attempted to process an unplayed game')
+        ## time this game only if project_game sampled it ##
+        timer = self.section_timer
+        if timer is not None and timer.active:
+            timer.mark()
+        else:
+            timer = None
         ## calculate shifts ##
         ## home ##
         weighted_shift_home = calc_weighted_shift(
@@ -276,6 +463,8 @@ class Nfelo:
             self.config['k'], self.config['b'],
             self.config['market_resist_factor'], False
         )
+        if timer is not None:
+            timer.lap('calc_shift')
         ## apply shift ##
         row['ending_nfelo_home'] = row['starting_nfelo_home'] + weighted_shift_home
         row['ending_nfelo_away'] = row['starting_nfelo_away'] + weighted_shift_away
@@ -283,72 +472,64 @@ class Nfelo:
         row['se_market'] = (row['home_margin'] + row['home_line_close']) ** 2
         row['se_model'] = (row['home_margin'] + row['nfelo_home_line_base']) ** 2
         ## update team records ##
-        ## pull out teams and params for concision ##
-        ht = row['home_team']
-        at = row['away_team']
+        ## pull out params for concision ##
         adj_alpha = 2 / (1 + self.config['nfelo_span'])
         se_alpha = 2 / (1 + self.config['se_span'])
-        ## home ##
-        ## basic ##
-        self.current_elos[ht]['season'] = row['season']
-        self.current_elos[ht]['week'] = row['week']
-        self.current_elos[ht]['game_id'] = row['game_id']
-        self.current_elos[ht]['opponent'] = row['away_team']
-        self.current_elos[ht]['starting_nfelo'] = row['starting_nfelo_home']
-        self.current_elos[ht]['ending_nfelo'] = row['ending_nfelo_home']
-        ## reset rolling info ##
-        self.current_elos[ht]['starting_nfelo_adj'] = self.current_elos[ht]['ending_nfelo_adj']
-        self.current_elos[ht]['starting_model_se'] = self.current_elos[ht]['ending_model_se']
-        self.current_elos[ht]['starting_market_se'] = self.current_elos[ht]['ending_market_se']
-        ## update ##
-        self.current_elos[ht]['ending_nfelo_adj'] = (
-             self.current_elos[ht]['starting_nfelo_adj'] * (1-adj_alpha) +
-             abs(weighted_shift_home) * adj_alpha
-        )
-        self.current_elos[ht]['ending_model_se'] = (
-             self.current_elos[ht]['starting_model_se'] * (1-se_alpha) +
-             abs(row['se_model']) * se_alpha
-        )
-        self.current_elos[ht]['ending_market_se'] = (
-             self.current_elos[ht]['starting_market_se'] * (1-se_alpha) +
-             abs(row['se_market']) * se_alpha
-        )
-        ## away ##
-        ## basic ##
-        self.current_elos[at]['season'] = row['season']
-        self.current_elos[at]['week'] = row['week']
-        self.current_elos[at]['game_id'] = row['game_id']
-        self.current_elos[at]['opponent'] = row['home_team']
-        self.current_elos[at]['starting_nfelo'] = row['starting_nfelo_away']
-        self.current_elos[at]['ending_nfelo'] = row['ending_nfelo_away']
-        ## reset rolling info ##
-        self.current_elos[at]['starting_nfelo_adj'] = self.current_elos[at]['ending_nfelo_adj']
-        self.current_elos[at]['starting_model_se'] = self.current_elos[at]['ending_model_se']
-        self.current_elos[at]['starting_market_se'] = self.current_elos[at]['ending_market_se']
-        ## update ##
-        self.current_elos[at]['ending_nfelo_adj'] = (
-             self.current_elos[at]['starting_nfelo_adj'] * (1-adj_alpha) +
-             abs(weighted_shift_away) * adj_alpha
-        )
-        self.current_elos[at]['ending_model_se'] = (
-             self.current_elos[at]['starting_model_se'] * (1-se_alpha) +
-             abs(row['se_model']) * se_alpha
-        )
-        self.current_elos[at]['ending_market_se'] = (
-             self.current_elos[at]['starting_market_se'] * (1-se_alpha) +
-             abs(row['se_market']) * se_alpha
-        )
+        state = self.state
+        ht = state.team_id(row['home_team'])
+        at = state.team_id(row['away_team'])
+        for team_id, side, opponent, weighted_shift in [
+            (ht, 'home', row['away_team'], weighted_shift_home),
+            (at, 'away', row['home_team'], weighted_shift_away)
+        ]:
+            ## basic ##
+            state.season[team_id] = row['season']
+            state.week[team_id] = row['week']
+            state.game_id[team_id] = row['game_id']
+            state.opponent[team_id] = opponent
+            state.starting_nfelo[team_id] = row['starting_nfelo_{0}'.format(side)]
+            state.ending_nfelo[team_id] = row['ending_nfelo_{0}'.format(side)]
+            ## reset rolling info ##
+            state.starting_nfelo_adj[team_id] = state.ending_nfelo_adj[team_id]
+            state.starting_model_se[team_id] = state.ending_model_se[team_id]
+            state.starting_market_se[team_id] = state.ending_market_se[team_id]
+            ## update ##
+            state.ending_nfelo_adj[team_id] = (
+                 state.starting_nfelo_adj[team_id] * (1-adj_alpha) +
+                 abs(weighted_shift) * adj_alpha
+            )
+            state.ending_model_se[team_id] = (
+                 state.starting_model_se[team_id] * (1-se_alpha) +
+                 abs(row['se_model']) * se_alpha
+            )
+            state.ending_market_se[team_id] = (
+                 state.starting_market_se[team_id] * (1-se_alpha) +
+                 abs(row['se_market']) * se_alpha
+            )
+        if timer is not None:
+            timer.lap('state_update')
         ## save team records ##
-        self.elo_records.append(self.current_elos[ht].copy())
-        self.elo_records.append(self.current_elos[at].copy())
-        ## if it's week 17, append elos to yearly elos for SoS normalization ##
-        if row['week'] == 17:
+        if self.record_history:
+            for team_id, opponent_id in [(ht, at), (at, ht)]:
+                self.elo_history.append((
+                    team_id, state.season[team_id], state.week[team_id],
+                    state.game_id[team_id], opponent_id,
+                    state.starting_nfelo[team_id], state.ending_nfelo[team_id],
+                    state.starting_nfelo_adj[team_id], state.ending_nfelo_adj[team_id],
+                    state.starting_market_se[team_id], state.ending_market_se[team_id],
+                    state.starting_model_se[team_id], state.ending_model_se[team_id],
+                ))
+        ## if it's the season end week, append elos to yearly elos for SoS normalization ##
+        if row['week'] == self.season_end_week:
             ## init if needed ##
             if row['season'] not in self.yearly_elos.keys():
                 self.yearly_elos[row['season']] = []
             ## update ##
             self.yearly_elos[row['season']].append(row['ending_nfelo_home'])
             self.yearly_elos[row['season']].append(row['ending_nfelo_away'])
+            self.league_medians.pop(row['season'], None)
+        if timer is not None:
+            timer.lap('elo_records')
         ## return ##
         return row
     
@@ -363,25 +544,136 @@ class Nfelo:
         ## return ##
         return row
 
-    def run(self):
+    def played_games(self):
         '''
-        Primary function for updating the elo model
+        The current file through the last completed week. float32 columns of
+        a compact current file are upcast so model math runs in full
+        precision. astype() also makes the copy
         '''
-        ## filter current down to last completed week ##
-        played = self.current_file[
+        return self.current_file[
             (
                 (self.current_file['week'] <= self.data.last_completed_week) &
                 (self.current_file['season'] == self.data.last_completed_season)    
             ) |
             (self.current_file['season'] < self.data.last_completed_season)
-        ].copy()
-        self.updated_file = played.apply(self.apply_nfelo, axis=1)
+        ].astype(float64_upcasts(self.current_file))
+
+    def checkpoint(self, season):
+        '''
+        Runs the current config from a clean state through the end of the
+        season before the passed season and snapshots the team state, so later
+        runs can start there with run(checkpoint=...)
+
+        Parameters:
+        * season (int): first season a run from the checkpoint processes
+
+        Returns:
+        * checkpoint (dict): season, team state, state season, and season end
+          elos and medians
+        '''
+        self.update_config({})
+        played = self.played_games()
+        played = played[played['season'] < season]
+        self.reset_history(played)
+        if len(played) > 0:
+            played.apply(self.apply_nfelo, axis=1)
+        checkpoint = {
+            'season' : season,
+            'state' : copy.deepcopy(self.state),
+            'state_season' : self.state_season,
+            'yearly_elos' : {k : list(v) for k, v in self.yearly_elos.items()},
+            'league_medians' : dict(self.league_medians),
+        }
+        self.update_config({})
+        return checkpoint
+
+    def restore(self, checkpoint):
+        '''
+        Sets the team state to a copy of a checkpoint's
+        '''
+        self.state = copy.deepcopy(checkpoint['state'])
+        self.state_season = checkpoint['state_season']
+        self.yearly_elos = {k : list(v) for k, v in checkpoint['yearly_elos'].items()}
+        self.league_medians = dict(checkpoint['league_medians'])
+
+    def run(self, checkpoint=None, through_season=None):
+        '''
+        Primary function for updating the elo model
+
+        Parameters:
+        * checkpoint (dict): optional checkpoint (see checkpoint()) to start
+          from, in which case only games from its season on are run
+        * through_season (int): optional last season to run
+        '''
+        ## filter current down to last completed week ##
+        played = self.played_games()
+        if checkpoint is not None:
+            self.restore(checkpoint)
+            played = played[played['season'] >= checkpoint['season']]
+        if through_season is not None:
+            played = played[played['season'] <= through_season]
+        self.reset_history(played)
+        self._ratings = None
+        if self.section_timer is None:
+            self.updated_file = played.apply(self.apply_nfelo, axis=1)
+        else:
+            ## wall time of the apply lets the report show time outside the sections ##
+            run_start = time.perf_counter()
+            self.updated_file = played.apply(self.apply_nfelo, axis=1)
+            self.section_timer.add_wall(time.perf_counter() - run_start)
+        self.updated_file = self.order_clvs(self.updated_file)
+        if self.data.compact:
+            self.updated_file = compact_frame(self.updated_file)
     
+    def trajectory(self):
+        '''
+        Everything the market regression of the last run read that does not
+        depend on the market_features: the updated file, and each team's
+        rolling squared errors going into each game. Needs a run with
+        record_history, since the errors come from the elo records
+
+        Returns:
+        * trajectory (dict): the updated file and the pre game errors, in
+          updated file order
+        '''
+        if not self.record_history:
+            raise Exception('NFELO ERROR: A trajectory needs a run with record_history')
+        ## two records per game, home then away, in the order games were run ##
+        records = self.elo_history.view()
+        return {
+            'updated_file' : self.updated_file,
+            'model_se_home' : records['starting_model_se'][0::2].copy(),
+            'market_se_home' : records['starting_market_se'][0::2].copy(),
+            'model_se_away' : records['starting_model_se'][1::2].copy(),
+            'market_se_away' : records['starting_market_se'][1::2].copy(),
+        }
+
+    def run_market(self, trajectory):
+        '''
+        Sets the updated file to a trajectory's (see trajectory()) with its
+        market regression and open and close projections redone under the
+        current config. Matches a full run() when only market_features
+        changed since the trajectory was taken
+
+        Parameters:
+        * trajectory (dict): a trajectory of a run
+        '''
+        df = trajectory['updated_file']
+        df = df.astype(float64_upcasts(df)).copy()
+        self._ratings = None
+        self.updated_file = self.project_market(
+            df,
+            trajectory['model_se_home'], trajectory['market_se_home'],
+            trajectory['model_se_away'], trajectory['market_se_away'],
+        )
+        if self.data.compact:
+            self.updated_file = compact_frame(self.updated_file)
+
     def save_reversions(self):
         '''
         Save off season reversions
         '''
-        reversions = pd.DataFrame(self.reversion_records)
+        reversions = self.reversion_records
         reversions.to_csv(
             '{0}/Data/Intermediate Data/offseason_reversions.csv'.format(
                 pathlib.Path(__file__).parent.parent.resolve()
@@ -399,13 +691,15 @@ class Nfelo:
         for k,v in new_config.items():
             self.config[k] = v
         ## reinit class props to ensure clean dataset ##
-        self.current_file = self.data.current_file[
-            self.data.current_file['season'] >= self.first_season
-        ].copy()
-        self.current_elos = self.init_elos()
+        ## current_file is never mutated by run(), so it is reused rather than ##
+        ## re-copied on every optimizer eval ##
+        self.state = self.init_elos()
+        self.state_season = self.first_season
         self.yearly_elos = {}
-        self.reversion_records = []
-        self.elo_records = []
+        self.league_medians = {}
+        self.elo_history.reset()
+        self.reversion_history.reset()
+        self._ratings = None
         self.updated_file = None
 
     def project_week(self, unplayed_df):
@@ -414,20 +708,184 @@ class Nfelo:
         There are currently no checks that the model is updated through the necessary date to make the
         projection
         '''
-        ## project games ##
-        projected_df = unplayed_df.apply(self.project_game, axis=1)
+        ## project games (upcasting any compact float32 columns) ##
+        projected_df = unplayed_df.astype(
+            float64_upcasts(unplayed_df)
+        ).apply(self.project_game, axis=1)
         ## return ##
-        return projected_df
+        return self.order_clvs(projected_df)
+
+    def order_clvs(self, df):
+        '''
+        Moves the clvs, which come in with the current file, to just after the
+        close evs, where they sat when they were calculated per game
+        '''
+        clvs = ['home_clv_from_open', 'away_clv_from_open']
+        if 'away_close_ev' not in df.columns or not all(c in df.columns for c in clvs):
+            return df
+        columns = [c for c in df.columns if c not in clvs]
+        i = columns.index('away_close_ev') + 1
+        return df[columns[:i] + clvs + columns[i:]]
     
+    def unplayed_games(self):
+        '''
+        Unplayed games of the current file in the model's seasons
+        '''
+        return self.data.current_file[
+            (self.data.current_file['season'] >= self.first_season) &
+            (pd.isnull(self.data.current_file['home_margin']))
+        ]
+
+    def project_games(self, games):
+        '''
+        Array version of project_game over a frame of unplayed games. Every game
+        is projected from the current team state, with the offseason reset
+        applied first if the games start a new season. Spreads come from the
+        season's SpreadMapper in one call, and only games with a market line
+        build a margin distribution for cover and push probabilities. Games
+        without a line get NaN open and close projections
+
+        Matches project_game to floating point precision
+
+        Parameters:
+        * games (DataFrame): unplayed current file rows
+
+        Returns:
+        * projections (DataFrame): the games with the project_game columns added
+        '''
+        ## copy consolidates the (often fragmented) input before columns are added ##
+        df = games.astype(float64_upcasts(games)).copy()
+        for season in sorted(df['season'].unique()):
+            if season > self.state_season:
+                self.start_season(season)
+        state = self.state
+        home_ids = numpy.array([state.team_id(t) for t in df['home_team']], dtype='int64')
+        away_ids = numpy.array([state.team_id(t) for t in df['away_team']], dtype='int64')
+        seasons = df['season'].to_numpy()
+        ## starting elos and game context ##
+        df['starting_nfelo_home'] = state.ending_nfelo[home_ids]
+        df['starting_nfelo_away'] = state.ending_nfelo[away_ids]
+        df['nfelo_dif_pre_adjustment'] = df['starting_nfelo_home'] - df['starting_nfelo_away']
+        df['home_net_qb_mod'] = self.config['qb_weight'] * (
+            df['home_538_qb_adj'] - df['away_538_qb_adj']
+        )
+        initial_elo_dif = (
+            df['starting_nfelo_home'] - df['starting_nfelo_away'] +
+            df['hfa_mod'] +
+            df['home_net_qb_mod']
+        ).to_numpy()
+        df['home_net_bye_mod'] = df['home_bye_mod'] - df['away_bye_mod']
+        initial_elo_dif = numpy.where(
+            df['is_playoffs'].to_numpy(dtype='float64') != 0,
+            initial_elo_dif * (1+self.config['playoff_boost']),
+            initial_elo_dif
+        )
+        df['nfelo_home_probability_base'] = elo_to_prob_vector(initial_elo_dif, z=self.config['z'])
+        ## negate: nfelotranslation positive=home favored -> nfelo sportsbook ##
+        df['nfelo_home_line_base'] = -translator_pool.posted_spreads(
+            df['nfelo_home_probability_base'].clip(0.001, 0.999), seasons
+        )
+        df['nfelo_spread_delta'] = df['nfelo_home_line_base'] - df['home_line_open']
+        df['nfelo_dif_base'] = initial_elo_dif
+        return self.project_market(
+            df,
+            state.ending_model_se[home_ids], state.ending_market_se[home_ids],
+            state.ending_model_se[away_ids], state.ending_market_se[away_ids],
+        )
+
+    def project_market(self, df, model_se_home, market_se_home, model_se_away, market_se_away):
+        '''
+        Array version of the market regression and the open and close
+        translations of project_game, over a frame of games that already have
+        their base projection (nfelo_dif_base and nfelo_home_line_base). Only
+        the market_features of the config are read, so a played file can be
+        regressed again under new market features without rerunning the elo
+        pass (see run_market())
+
+        Parameters:
+        * df (DataFrame): games with a base projection. Columns are added in
+          place
+        * model_se_home, market_se_home, model_se_away, market_se_away
+          (ndarray): each team's rolling squared errors going into the game
+
+        Returns:
+        * projections (DataFrame): the games with the regressed projections
+        '''
+        seasons = df['season'].to_numpy()
+        initial_elo_dif = df['nfelo_dif_base'].to_numpy()
+        ## regressions ##
+        for line_type in ['open', 'close']:
+            regressed_dif, factor = regress_to_market_vector(
+                initial_elo_dif, df['market_elo_dif_{0}'.format(line_type)].to_numpy(),
+                df['nfelo_home_line_base'].to_numpy(), df['home_line_{0}'.format(line_type)].to_numpy(),
+                self.config['market_regression'], self.config['min_mr'],
+                self.config['spread_delta_base'], self.config['rmse_base'],
+                self.config['long_line_inflator'], self.config['hook_certainty'],
+                model_se_home, market_se_home, model_se_away, market_se_away,
+            )
+            df['nfelo_dif_{0}'.format(line_type)] = regressed_dif
+            df['market_regression_factor_{0}'.format(line_type)] = factor
+        ## translate, and derive cover/push/loss where there is a line ##
+        for line_type in ['open', 'close']:
+            prob = elo_to_prob_vector(df['nfelo_dif_{0}'.format(line_type)].to_numpy())
+            market_line = df['home_line_{0}'.format(line_type)].to_numpy()
+            df['nfelo_home_probability_{0}'.format(line_type)] = prob
+            df['nfelo_home_line_{0}'.format(line_type)] = -translator_pool.posted_spreads(
+                numpy.clip(prob, 0.001, 0.999), seasons
+            )
+            cover = numpy.full(len(df), numpy.nan)
+            push = numpy.full(len(df), numpy.nan)
+            for i in numpy.flatnonzero(~numpy.isnan(prob) & ~numpy.isnan(market_line)):
+                self._set_translator(prob[i], 'win_prob', seasons[i])
+                cover[i] = self._translator.cover_prob(-market_line[i])
+                push[i] = self._translator.push_prob(-market_line[i])
+            df['home_cover_prob_{0}'.format(line_type)] = cover
+            df['home_push_prob_{0}'.format(line_type)] = push
+            df['home_loss_prob_{0}'.format(line_type)] = 1 - cover - push
+            if line_type == 'close':
+                ## add aways for down stream pipes ##
+                df['away_loss_prob_close'] = df['home_cover_prob_close']
+                df['away_push_prob_close'] = df['home_push_prob_close']
+                df['away_cover_prob_close'] = df['home_loss_prob_close']
+            df['home_{0}_ev'.format(line_type)] = (
+                df['home_cover_prob_{0}'.format(line_type)] -
+                1.1 * df['home_loss_prob_{0}'.format(line_type)]
+            ) / 1.1
+            df['away_{0}_ev'.format(line_type)] = (
+                df['home_loss_prob_{0}'.format(line_type)] -
+                1.1 * df['home_cover_prob_{0}'.format(line_type)]
+            ) / 1.1
+        return self.order_clvs(df)
+
+    def project_remaining(self, season=None):
+        '''
+        Projects every remaining game of a season from the current ratings in
+        one vectorized pass (see project_games())
+
+        Parameters:
+        * season (int): season to project. Defaults to the season of the next
+          unplayed game
+
+        Returns:
+        * projections (DataFrame): remaining games in the projections schema,
+          or None if there are none
+        '''
+        unplayed = self.unplayed_games()
+        if season is None and len(unplayed) > 0:
+            season = unplayed.iloc[0]['season']
+        remaining = unplayed[unplayed['season'] == season]
+        if len(remaining) == 0:
+            print('Warning -- No remaining games to project!')
+            return None
+        print('Projecting the remaining {0} games of {1}'.format(len(remaining), season))
+        return self.project_games(remaining)
+
     def project_spreads(self):
         '''
         Projects the next unplayed week 
         '''
         ## get unplayed weeks ##
-        unplayed = self.data.current_file[
-            (self.data.current_file['season'] >= self.first_season) &
-            (pd.isnull(self.data.current_file['home_margin']))
-        ].groupby(['season', 'week']).head(1)
+        unplayed = self.unplayed_games().groupby(['season', 'week']).head(1)
         ## check that there are games ##
         if len(unplayed) == 0:
             print('Warning -- No unplayed week to project!')
@@ -450,10 +908,7 @@ class Nfelo:
         '''
         ## get next unplayed week if it exists ##
         ## get unplayed weeks ##
-        unplayed = self.data.current_file[
-            (self.data.current_file['season'] >= self.first_season) &
-            (pd.isnull(self.data.current_file['home_margin']))
-        ].groupby(['season', 'week']).head(1)
+        unplayed = self.unplayed_games().groupby(['season', 'week']).head(1)
         ## check that there are games ##
         if len(unplayed) > 0:
             ## get just the current unplayed ##
@@ -0,0 +1,343 @@
+import pandas as pd
+import numpy
+
+from .Nfelo import Nfelo
+from ..Utilities import (
+    offseason_regression_vector, elo_to_prob_vector, regress_to_market_vector,
+    calc_shift_vector, translator_pool, compact_frame, float64_upcasts
+)
+
+class NfeloEnsemble:
+    '''
+    Runs several configs of the nfelo model through the history in one pass.
+    Each member keeps its own team state as a row of (members x teams)
+    arrays, and every game is read once and stepped for all members together
+    with the array versions of the model math, so the cost grows with the
+    games rather than members x games. The market regression and the open and
+    close translations never feed back into the state, so they are done for
+    every game and member at once after the pass.
+
+    A game's ensemble line and probability are the members' means, annotated
+    with their spread across members. Covers, pushes and EVs come from the
+    ensemble probability, as a single model's come from its own. The
+    ensemble's columns are prefixed ensemble_, and NfeloGrader grades them as
+    the nfelo_ensemble models.
+
+    Parameters:
+    * nfelo_model (Nfelo): model whose data, initial elos and config the
+      members share
+    * configs (list): member configs, applied over the model's config. A
+      config may hold only the features it changes
+    '''
+    ## config values that may differ by member ##
+    member_params = [
+        'k', 'z', 'b', 'reversion', 'dvoa_weight', 'wt_ratings_weight',
+        'margin_weight', 'pff_weight', 'wepa_weight', 'market_resist_factor',
+        'se_span', 'qb_weight', 'playoff_boost',
+    ] + Nfelo.market_features
+
+    def __init__(self, nfelo_model:Nfelo, configs:list):
+        if len(configs) == 0:
+            raise Exception('ENSEMBLE ERROR: An ensemble needs at least one config')
+        self.nfelo_model = nfelo_model
+        self.configs = [dict(nfelo_model.config, **config) for config in configs]
+        self.params = {
+            param : numpy.array([float(config[param]) for config in self.configs])
+            for param in self.member_params
+        }
+        self.season_end_week = nfelo_model.season_end_week
+        ## each member's lines and probabilities of the last run, by line type ##
+        self.member_lines = None
+        self.member_probabilities = None
+        self.updated_file = None
+        self.projections = None
+        self.reset()
+
+    def __len__(self):
+        return len(self.configs)
+
+    @classmethod
+    def from_results(cls, nfelo_model:Nfelo, path:str, top:int=10):
+        '''
+        Builds an ensemble of the best distinct configs of an optimizer
+        results CSV (as written by save_to_logs)
+
+        Parameters:
+        * nfelo_model (Nfelo): model the members share
+        * path (str): results CSV path
+        * top (int): number of configs, best achieved_value first
+
+        Returns:
+        * ensemble (NfeloEnsemble)
+        '''
+        df = pd.read_csv(path, index_col=0)
+        df = df.sort_values(by=['achieved_value'], ascending=[False])
+        features = [c for c in df.columns if c in nfelo_model.config]
+        df = df.drop_duplicates(subset=features).head(top)
+        configs = [
+            {f : float(row[f]) for f in features if pd.notnull(row[f])}
+            for _, row in df.iterrows()
+        ]
+        print('Ensembling the top {0} configs of {1}'.format(len(configs), path))
+        return cls(nfelo_model, configs)
+
+    def reset(self):
+        '''
+        Sets every member to the model's initial state
+        '''
+        self.state = self.nfelo_model.init_elos()
+        n_teams = len(self.state)
+        self.elo = numpy.tile(self.state.ending_nfelo[:n_teams], (len(self), 1))
+        self.model_se = numpy.zeros((len(self), n_teams))
+        self.market_se = numpy.zeros((len(self), n_teams))
+        self.state_season = self.nfelo_model.first_season
+        self.yearly_elos = {}
+        self.league_medians = {}
+
+    def team_ids(self, teams) -> numpy.ndarray:
+        '''
+        Ids of teams, adding any not seen yet to every member at its initial
+        state
+        '''
+        ids = numpy.array([self.state.team_id(team) for team in teams], dtype='int64')
+        n_teams = len(self.state)
+        if n_teams > self.elo.shape[1]:
+            new = n_teams - self.elo.shape[1]
+            self.elo = numpy.hstack([
+                self.elo,
+                numpy.tile(self.state.ending_nfelo[self.elo.shape[1]:n_teams], (len(self), 1))
+            ])
+            self.model_se = numpy.hstack([self.model_se, numpy.zeros((len(self), new))])
+            self.market_se = numpy.hstack([self.market_se, numpy.zeros((len(self), new))])
+        return ids
+
+    def league_median(self, season) -> numpy.ndarray:
+        '''
+        Each member's median season end elo of a season
+        '''
+        median = self.league_medians.get(season)
+        if median is None:
+            median = numpy.median(numpy.array(self.yearly_elos[season]), axis=0)
+            self.league_medians[season] = median
+        return median
+
+    def start_season(self, season):
+        '''
+        Regresses every team that opens the season, for every member. See
+        Nfelo.start_season()
+        '''
+        self.state_season = season
+        openers = self.nfelo_model.season_openers.get(season)
+        if openers is None or len(openers) == 0:
+            return
+        team_ids = self.team_ids(openers['team'])
+        league_elo = self.league_median(season - 1)
+        for member in range(len(self)):
+            self.elo[member, team_ids] = offseason_regression_vector(
+                league_elo = league_elo[member],
+                previous_elo = self.elo[member, team_ids],
+                proj_dvoa = openers['proj_dvoa'].to_numpy(),
+                proj_wt_rating = openers['proj_wt_rating'].to_numpy(),
+                reversion = self.params['reversion'][member],
+                dvoa_weight = self.params['dvoa_weight'][member],
+                wt_weight = self.params['wt_ratings_weight'][member]
+            )['new_elo']
+
+    def weighted_shift(self, margins:list, model_line, market_line, is_home:bool) -> numpy.ndarray:
+        '''
+        Each member's weighted shift of a team, skipping missing margins. See
+        calc_weighted_shift()
+        '''
+        product = 0
+        weight = 0
+        for margin, param in margins:
+            shift = calc_shift_vector(
+                margin, model_line, market_line,
+                self.params['k'], self.params['b'],
+                self.params['market_resist_factor'], is_home
+            )
+            valid = ~numpy.isnan(shift)
+            product = product + numpy.where(valid, shift * self.params[param], 0)
+            weight = weight + numpy.where(valid, self.params[param], 0)
+        return product / weight
+
+    def step_games(self, games:pd.DataFrame, process:bool) -> dict:
+        '''
+        Projects each game's base line for every member from the current
+        state, in game order, and if process is set updates the state with
+        the result. Game inputs are pulled from the frame once and shared by
+        every member
+
+        Returns:
+        * base (dict): (members x games) arrays of the base elo dif,
+          probability and line, and the rolling errors going into each game
+        '''
+        n_games = len(games)
+        shape = (len(self), n_games)
+        base = {
+            key : numpy.full(shape, numpy.nan) for key in [
+                'dif', 'probability', 'line',
+                'model_se_home', 'market_se_home', 'model_se_away', 'market_se_away',
+            ]
+        }
+        home_ids = self.team_ids(games['home_team'])
+        away_ids = self.team_ids(games['away_team'])
+        col = lambda c: games[c].to_numpy(dtype='float64')
+        seasons = col('season')
+        weeks = col('week')
+        hfa_mod = col('hfa_mod')
+        qb_dif = col('home_538_qb_adj') - col('away_538_qb_adj')
+        is_playoffs = col('is_playoffs')
+        if process:
+            home_line_close = col('home_line_close')
+            home_margins = [col('home_margin'), col('home_net_wepa_point_margin'), col('home_pff_point_margin')]
+            away_margins = [col('away_margin'), col('away_net_wepa_point_margin'), col('away_pff_point_margin')]
+            se_alpha = 2 / (1 + self.params['se_span'])
+        mapper = None
+        mapper_season = None
+        for i in range(n_games):
+            if seasons[i] > self.state_season:
+                self.start_season(seasons[i])
+            h = home_ids[i]
+            a = away_ids[i]
+            ## game context ##
+            dif = self.elo[:, h] - self.elo[:, a] + hfa_mod[i] + self.params['qb_weight'] * qb_dif[i]
+            if is_playoffs[i]:
+                dif = dif * (1+self.params['playoff_boost'])
+            probability = elo_to_prob_vector(dif, z=self.params['z'])
+            if mapper is None or mapper_season != seasons[i]:
+                mapper = translator_pool.mapper(seasons[i])
+                mapper_season = seasons[i]
+            ## negate: nfelotranslation positive=home favored -> nfelo sportsbook ##
+            line = -mapper.win_prob_to_spread(numpy.clip(probability, 0.001, 0.999)).posted
+            base['dif'][:, i] = dif
+            base['probability'][:, i] = probability
+            base['line'][:, i] = line
+            base['model_se_home'][:, i] = self.model_se[:, h]
+            base['market_se_home'][:, i] = self.market_se[:, h]
+            base['model_se_away'][:, i] = self.model_se[:, a]
+            base['market_se_away'][:, i] = self.market_se[:, a]
+            if not process:
+                continue
+            ## shifts ##
+            shift_home = self.weighted_shift(
+                [(m[i], p) for m, p in zip(home_margins, ['margin_weight', 'wepa_weight', 'pff_weight'])],
+                line, home_line_close[i], True
+            )
+            shift_away = self.weighted_shift(
+                [(m[i], p) for m, p in zip(away_margins, ['margin_weight', 'wepa_weight', 'pff_weight'])],
+                line, home_line_close[i], False
+            )
+            self.elo[:, h] = self.elo[:, h] + shift_home
+            self.elo[:, a] = self.elo[:, a] + shift_away
+            ## errors ##
+            se_market = (home_margins[0][i] + home_line_close[i]) ** 2
+            se_model = (home_margins[0][i] + line) ** 2
+            for team_id in [h, a]:
+                self.model_se[:, team_id] = (
+                    self.model_se[:, team_id] * (1-se_alpha) + numpy.abs(se_model) * se_alpha
+                )
+                self.market_se[:, team_id] = (
+                    self.market_se[:, team_id] * (1-se_alpha) + abs(se_market) * se_alpha
+                )
+            ## season end elos for the next offseason's league median ##
+            if weeks[i] == self.season_end_week:
+                season_elos = self.yearly_elos.setdefault(seasons[i], [])
+                season_elos.append(self.elo[:, h].copy())
+                season_elos.append(self.elo[:, a].copy())
+                self.league_medians.pop(seasons[i], None)
+        return base
+
+    def project(self, games:pd.DataFrame, base:dict) -> pd.DataFrame:
+        '''
+        Regresses every member's base projections to the market, translates
+        them, and adds the ensemble columns to the games
+
+        Returns:
+        * projections (DataFrame): the games with the ensemble columns added
+        '''
+        df = games.astype(float64_upcasts(games)).copy()
+        seasons = df['season'].to_numpy()
+        member_seasons = numpy.tile(seasons, len(self))
+        params = {
+            param : self.params[param][:, None] for param in Nfelo.market_features
+        }
+        probabilities = {'base' : base['probability']}
+        lines = {'base' : base['line']}
+        for line_type in ['open', 'close']:
+            regressed_dif, factor = regress_to_market_vector(
+                base['dif'], df['market_elo_dif_{0}'.format(line_type)].to_numpy(),
+                base['line'], df['home_line_{0}'.format(line_type)].to_numpy(),
+                params['market_regression'], params['min_mr'],
+                params['spread_delta_base'], params['rmse_base'],
+                params['long_line_inflator'], params['hook_certainty'],
+                base['model_se_home'], base['market_se_home'],
+                base['model_se_away'], base['market_se_away'],
+            )
+            probabilities[line_type] = elo_to_prob_vector(regressed_dif)
+            lines[line_type] = -translator_pool.posted_spreads(
+                numpy.clip(probabilities[line_type], 0.001, 0.999).ravel(), member_seasons
+            ).reshape(regressed_dif.shape)
+        ## ensemble means and their spread across members ##
+        for line_type in ['base', 'open', 'close']:
+            df['ensemble_home_probability_{0}'.format(line_type)] = probabilities[line_type].mean(axis=0)
+            df['ensemble_home_probability_{0}_std'.format(line_type)] = probabilities[line_type].std(axis=0)
+            df['ensemble_home_line_{0}'.format(line_type)] = lines[line_type].mean(axis=0)
+            df['ensemble_home_line_{0}_std'.format(line_type)] = lines[line_type].std(axis=0)
+            df['ensemble_home_line_{0}_min'.format(line_type)] = lines[line_type].min(axis=0)
+            df['ensemble_home_line_{0}_max'.format(line_type)] = lines[line_type].max(axis=0)
+        ## covers, pushes and EVs from the ensemble probability ##
+        for line_type in ['open', 'close']:
+            prob = df['ensemble_home_probability_{0}'.format(line_type)].to_numpy()
+            market_line = df['home_line_{0}'.format(line_type)].to_numpy()
+            cover = numpy.full(len(df), numpy.nan)
+            push = numpy.full(len(df), numpy.nan)
+            for i in numpy.flatnonzero(~numpy.isnan(prob) & ~numpy.isnan(market_line)):
+                self.nfelo_model._set_translator(prob[i], 'win_prob', seasons[i])
+                cover[i] = self.nfelo_model._translator.cover_prob(-market_line[i])
+                push[i] = self.nfelo_model._translator.push_prob(-market_line[i])
+            df['ensemble_home_cover_prob_{0}'.format(line_type)] = cover
+            df['ensemble_home_push_prob_{0}'.format(line_type)] = push
+            df['ensemble_home_loss_prob_{0}'.format(line_type)] = 1 - cover - push
+            df['ensemble_home_{0}_ev'.format(line_type)] = (cover - 1.1 * (1 - cover - push)) / 1.1
+            df['ensemble_away_{0}_ev'.format(line_type)] = ((1 - cover - push) - 1.1 * cover) / 1.1
+        self.member_lines = lines
+        self.member_probabilities = probabilities
+        return df
+
+    def run(self):
+        '''
+        Runs every member through the played games from the initial state
+        '''
+        played = self.nfelo_model.played_games()
+        self.reset()
+        base = self.step_games(played, process=True)
+        self.updated_file = self.project(played, base)
+        if self.nfelo_model.data.compact:
+            self.updated_file = compact_frame(self.updated_file)
+
+    def project_spreads(self):
+        '''
+        Projects the next unplayed week for every member from the current
+        state. See Nfelo.project_spreads()
+        '''
+        ## get unplayed weeks ##
+        unplayed = self.nfelo_model.unplayed_games().groupby(['season', 'week']).head(1)
+        ## check that there are games ##
+        if len(unplayed) == 0:
+            print('Warning -- No unplayed week to project!')
+            return
+        ## get just the current unplayed ##
+        current_file = self.nfelo_model.data.current_file
+        current_unplayed = current_file[
+            (current_file['week'] == unplayed.iloc[0]['week']) &
+            (current_file['season'] == unplayed.iloc[0]['season'])
+        ]
+        print('Projecting Week {0}, {1} with {2} configs'.format(
+            unplayed.iloc[0]['week'],
+            unplayed.iloc[0]['season'],
+            len(self)
+        ))
+        current_unplayed = current_unplayed.astype(float64_upcasts(current_unplayed))
+        base = self.step_games(current_unplayed, process=False)
+        self.projections = self.project(current_unplayed, base)
@@ -0,0 +1,241 @@
+import numpy
+import pandas as pd
+
+class RatingsIndex:
+    '''
+    Point-in-time rating history of every team, one entry per team game,
+    stored as numpy arrays sorted by (team_id, season, week)
+
+    Each team's history is a contiguous slice, so a trajectory is O(1) to
+    locate, a team's rating as of a season and week is a binary search
+    within its slice, and the ratings of every team as of a point in time is
+    a single vectorized searchsorted over the combined key. Week over week and
+    year to date deltas are precomputed on build.
+
+    Parameters:
+    * teams (list): team names, where a team's position is its team_id
+    * columns (dict): equal length arrays for team_id, season, week, game_id,
+      opponent and the rating fields, sorted by (team_id, season, week)
+    '''
+    ## rating fields carried from the elo records ##
+    rating_fields = [
+        'starting_nfelo', 'ending_nfelo',
+        'starting_nfelo_adj', 'ending_nfelo_adj',
+        'starting_market_se', 'ending_market_se',
+        'starting_model_se', 'ending_model_se',
+    ]
+    ## a game is keyed as season * week_base + week within a team, and ##
+    ## team_id * team_base + that across teams ##
+    week_base = 100
+    team_base = 10000 * week_base
+
+    def __init__(self, teams:list, columns:dict):
+        self.teams = list(teams)
+        self.team_index = {team : i for i, team in enumerate(self.teams)}
+        self.columns = columns
+        self.n = len(columns['team_id'])
+        ## time key within a team, and the combined key across teams ##
+        self.time_key = (
+            columns['season'].astype('int64') * self.week_base +
+            columns['week'].astype('int64')
+        )
+        self.key = columns['team_id'].astype('int64') * self.team_base + self.time_key
+        ## start of each team's slice, with a trailing end offset ##
+        self.offsets = numpy.searchsorted(
+            columns['team_id'], numpy.arange(len(self.teams) + 1)
+        )
+        ## lags within each team ##
+        first = numpy.zeros(self.n, dtype='bool')
+        first[self.offsets[:-1][self.offsets[:-1] < self.n]] = True
+        nfelo = self.nfelo()
+        self.columns['nfelo_t_1'] = numpy.where(
+            first, numpy.nan, numpy.roll(nfelo, 1)
+        )
+        ## starting elo of each team's first game of the season ##
+        new_season = first | numpy.concatenate([
+            [True], columns['season'][1:] != columns['season'][:-1]
+        ])
+        season_starts = numpy.maximum.accumulate(
+            numpy.where(new_season, numpy.arange(self.n), 0)
+        ) if self.n > 0 else numpy.zeros(0, dtype='int64')
+        self.columns['nfelo_soy'] = self.nfelo_starting()[season_starts]
+        self.columns['nfelo_wow_delta'] = nfelo - self.columns['nfelo_t_1']
+        self.columns['nfelo_ytd_delta'] = nfelo - self.columns['nfelo_soy']
+
+    def __len__(self):
+        return self.n
+
+    def nfelo(self) -> numpy.ndarray:
+        '''
+        Ending nfelo with the 538 qb adjustment
+        '''
+        return self.columns['ending_nfelo'] + self.columns['538_qb_adj']
+
+    def nfelo_starting(self) -> numpy.ndarray:
+        '''
+        Starting nfelo with the 538 qb adjustment
+        '''
+        return self.columns['starting_nfelo'] + self.columns['538_qb_adj']
+
+    @classmethod
+    def from_records(cls, records, qb_adj=None):
+        '''
+        Builds the index from elo records, ie Nfelo.elo_records
+
+        Parameters:
+        * records (list or DataFrame): elo records with team, season, week,
+          game_id, opponent and the rating fields
+        * qb_adj (array): optional 538 qb adjustment aligned with the records.
+          Defaults to 0
+
+        Returns:
+        * index (RatingsIndex)
+        '''
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(
+            records, columns=['team', 'season', 'week', 'game_id', 'opponent'] + cls.rating_fields
+        )
+        ## team ids in name order, so as of frames come out sorted by team ##
+        teams, team_id = numpy.unique(df['team'].to_numpy().astype(str), return_inverse=True)
+        season = df['season'].to_numpy().astype('int32')
+        week = df['week'].to_numpy().astype('int32')
+        order = numpy.lexsort((week, season, team_id))
+        columns = {
+            'team_id' : team_id.astype('int32')[order],
+            'season' : season[order],
+            'week' : week[order],
+            'game_id' : df['game_id'].to_numpy().astype(str)[order],
+            'opponent' : df['opponent'].to_numpy().astype(str)[order],
+        }
+        for field in cls.rating_fields:
+            columns[field] = df[field].to_numpy().astype('float64')[order]
+        columns['538_qb_adj'] = (
+            numpy.zeros(len(df)) if qb_adj is None else
+            numpy.asarray(qb_adj, dtype='float64')[order]
+        )
+        return cls(teams.tolist(), columns)
+
+    @classmethod
+    def from_model(cls, model):
+        '''
+        Builds the index from a run Nfelo model. Elo records are written home
+        then away for each played game, so the 538 qb adjustments are aligned
+        by interleaving the updated file's home and away columns
+
+        Parameters:
+        * model (Nfelo): a model that has been run
+
+        Returns:
+        * index (RatingsIndex)
+        '''
+        if model.updated_file is None:
+            raise Exception('RATINGS INDEX ERROR: The model has not been run')
+        if not model.record_history:
+            raise Exception('RATINGS INDEX ERROR: The model was run with record_history=False')
+        records = model.elo_records
+        games = model.updated_file
+        game_ids = numpy.column_stack([
+            games['game_id'].to_numpy(), games['game_id'].to_numpy()
+        ]).ravel()
+        if len(records) != len(game_ids) or not numpy.array_equal(
+            records['game_id'].to_numpy().astype(str), game_ids.astype(str)
+        ):
+            raise Exception('RATINGS INDEX ERROR: Elo records do not align with the updated file')
+        qb_adj = numpy.column_stack([
+            games['home_538_qb_adj'].to_numpy(dtype='float64'),
+            games['away_538_qb_adj'].to_numpy(dtype='float64')
+        ]).ravel()
+        return cls.from_records(records, qb_adj=qb_adj)
+
+    def _frame(self, rows:numpy.ndarray) -> pd.DataFrame:
+        '''
+        Frame of the passed positions
+        '''
+        df = pd.DataFrame({
+            'team' : numpy.asarray(self.teams, dtype='object')[self.columns['team_id'][rows]]
+        })
+        for col in ['season', 'week', 'game_id', 'opponent'] + self.rating_fields + ['538_qb_adj']:
+            df[col] = self.columns[col][rows]
+        df['nfelo'] = self.nfelo()[rows]
+        df['nfelo_starting'] = self.nfelo_starting()[rows]
+        for col in ['nfelo_t_1', 'nfelo_soy', 'nfelo_wow_delta', 'nfelo_ytd_delta']:
+            df[col] = self.columns[col][rows]
+        return df
+
+    def to_frame(self) -> pd.DataFrame:
+        '''
+        The full history, sorted by team, season and week
+        '''
+        return self._frame(numpy.arange(self.n))
+
+    def team_id(self, team:str) -> int:
+        team_id = self.team_index.get(team)
+        if team_id is None:
+            raise Exception('RATINGS INDEX ERROR: {0} is not in the index'.format(team))
+        return team_id
+
+    def trajectory(self, team:str) -> pd.DataFrame:
+        '''
+        Every game of a team, in order
+        '''
+        team_id = self.team_id(team)
+        return self._frame(numpy.arange(self.offsets[team_id], self.offsets[team_id + 1]))
+
+    def position(self, team:str, season:int, week:int) -> int:
+        '''
+        Position of the team's most recent game at or before the season and week,
+        or -1 if the team had not played yet
+        '''
+        team_id = self.team_id(team)
+        start, end = self.offsets[team_id], self.offsets[team_id + 1]
+        pos = start + numpy.searchsorted(
+            self.time_key[start:end], season * self.week_base + week, side='right'
+        ) - 1
+        return int(pos) if pos >= start else -1
+
+    def rating(self, team:str, season:int, week:int) -> float:
+        '''
+        The team's nfelo (with qb adj) through the season and week. Before a
+        team's first game, this is NaN
+        '''
+        pos = self.position(team, season, week)
+        return float(self.nfelo()[pos]) if pos >= 0 else numpy.nan
+
+    def as_of(self, season:int, week:int) -> pd.DataFrame:
+        '''
+        Every team's most recent game at or before the season and week, one row
+        per team sorted by team. Teams that had not played yet are dropped
+        '''
+        team_ids = numpy.arange(len(self.teams), dtype='int64')
+        targets = team_ids * self.team_base + season * self.week_base + week
+        pos = numpy.searchsorted(self.key, targets, side='right') - 1
+        played = pos >= self.offsets[:-1]
+        return self._frame(pos[played]).reset_index(drop=True)
+
+    def latest(self) -> pd.DataFrame:
+        '''
+        Every team's most recent game
+        '''
+        last = self.offsets[1:] - 1
+        return self._frame(last[last >= self.offsets[:-1]]).reset_index(drop=True)
+
+    def save(self, loc:str):
+        '''
+        Writes the index to a compressed numpy archive
+        '''
+        numpy.savez_compressed(
+            loc, teams=numpy.asarray(self.teams, dtype=str),
+            **{
+                col : self.columns[col] for col in
+                ['team_id', 'season', 'week', 'game_id', 'opponent', '538_qb_adj'] + self.rating_fields
+            }
+        )
+
+    @classmethod
+    def load(cls, loc:str):
+        '''
+        Reads an index written by save()
+        '''
+        with numpy.load(loc, allow_pickle=False) as archive:
+            columns = {k : archive[k] for k in archive.files if k != 'teams'}
+            teams = archive['teams'].tolist()
+        return cls(teams, columns)
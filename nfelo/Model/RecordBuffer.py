@@ -0,0 +1,68 @@
+import numpy
+import pandas as pd
+
+class RecordBuffer:
+    '''
+    Preallocated numpy structured array that records are written into by
+    position, in place of a list of dicts. The buffer doubles if it fills,
+    and records are only materialized to a DataFrame on demand
+
+    Parameters:
+    * dtype (list): structured dtype of a record, ie [('season', 'int32'), ...]
+    * capacity (int): number of records to preallocate
+    '''
+    def __init__(self, dtype:list, capacity:int=0):
+        self.dtype = numpy.dtype(dtype)
+        self.reset(capacity)
+
+    def __len__(self):
+        return self.size
+
+    def reset(self, capacity:int=0):
+        '''
+        Drops all records and preallocates the passed number of slots
+        '''
+        self.records = numpy.zeros(max(int(capacity), 1), dtype=self.dtype)
+        self.size = 0
+
+    def reserve(self, capacity:int):
+        '''
+        Grows the buffer to at least the passed number of slots
+        '''
+        if capacity <= len(self.records):
+            return
+        records = numpy.zeros(max(capacity, len(self.records) * 2), dtype=self.dtype)
+        records[:self.size] = self.records[:self.size]
+        self.records = records
+
+    def append(self, record:tuple):
+        '''
+        Writes a record, as a tuple in dtype field order, to the next slot
+        '''
+        if self.size == len(self.records):
+            self.reserve(self.size + 1)
+        self.records[self.size] = record
+        self.size += 1
+
+    def extend(self, columns:dict):
+        '''
+        Writes a block of records, passed as arrays by field. Fields may also
+        be scalars, as long as the first field is an array
+        '''
+        n = len(next(iter(columns.values())))
+        self.reserve(self.size + n)
+        for field, values in columns.items():
+            self.records[field][self.size:self.size + n] = values
+        self.size += n
+
+    def view(self) -> numpy.ndarray:
+        '''
+        The written records, without a copy
+        '''
+        return self.records[:self.size]
+
+    def to_frame(self) -> pd.DataFrame:
+        '''
+        The written records as a DataFrame
+        '''
+        return pd.DataFrame(self.view())
@@ -0,0 +1,116 @@
+import numpy
+
+class TeamState:
+    '''
+    Dense, growable store of each team's rating state as of its most recent
+    game. Teams are mapped to integer ids on first sight, and every field is
+    a numpy array indexed by team id, so the universe of teams can grow as
+    teams enter (ie a college sized league) without a dict per team.
+
+    Parameters:
+    * initial_elos (dict): starting elo by team. Teams not in the dict start
+      at default_elo
+    * season (int): season new teams are initialized in
+    * default_elo (float): starting elo for teams not in initial_elos
+    * capacity (int): initial number of team slots. Doubles as needed
+    '''
+    ## numeric fields, in the order of the legacy current_elos record ##
+    numeric_fields = [
+        'season', 'week',
+        'starting_nfelo', 'ending_nfelo',
+        'starting_nfelo_adj', 'ending_nfelo_adj',
+        'starting_market_se', 'ending_market_se',
+        'starting_model_se', 'ending_model_se',
+    ]
+    object_fields = ['game_id', 'opponent']
+
+    def __init__(self, initial_elos:dict, season:int, default_elo:float=1505, capacity:int=64):
+        self.initial_elos = initial_elos
+        self.initial_season = season
+        self.default_elo = default_elo
+        self.index = {}
+        self.teams = []
+        self.capacity = max(int(capacity), 1)
+        for field in self.numeric_fields:
+            setattr(self, field, numpy.zeros(self.capacity, dtype='float64'))
+        for field in self.object_fields:
+            setattr(self, field, numpy.full(self.capacity, numpy.nan, dtype='object'))
+
+    def __len__(self):
+        return len(self.teams)
+
+    def grow(self, capacity:int):
+        '''
+        Resizes every field to at least the passed number of slots
+        '''
+        if capacity <= self.capacity:
+            return
+        new_capacity = max(capacity, self.capacity * 2)
+        for field in self.numeric_fields:
+            arr = numpy.zeros(new_capacity, dtype='float64')
+            arr[:self.capacity] = getattr(self, field)
+            setattr(self, field, arr)
+        for field in self.object_fields:
+            arr = numpy.full(new_capacity, numpy.nan, dtype='object')
+            arr[:self.capacity] = getattr(self, field)
+            setattr(self, field, arr)
+        self.capacity = new_capacity
+
+    def add_team(self, team:str) -> int:
+        '''
+        Adds a team at its initial state ("week 0") and returns its id
+        '''
+        team_id = len(self.teams)
+        self.grow(team_id + 1)
+        self.index[team] = team_id
+        self.teams.append(team)
+        self.season[team_id] = self.initial_season
+        self.week[team_id] = 0
+        self.game_id[team_id] = numpy.nan
+        self.opponent[team_id] = numpy.nan
+        self.starting_nfelo[team_id] = numpy.nan
+        self.ending_nfelo[team_id] = self.initial_elos.get(team, self.default_elo)
+        for field in [
+            'starting_nfelo_adj', 'ending_nfelo_adj',
+            'starting_market_se', 'ending_market_se',
+            'starting_model_se', 'ending_model_se',
+        ]:
+            getattr(self, field)[team_id] = 0
+        return team_id
+
+    def team_id(self, team:str) -> int:
+        '''
+        Returns the team's id, adding the team if it has not been seen
+        '''
+        team_id = self.index.get(team)
+        if team_id is None:
+            team_id = self.add_team(team)
+        return team_id
+
+    def add_teams(self, teams):
+        '''
+        Adds every team not yet in the index
+        '''
+        for team in teams:
+            self.team_id(team)
+
+    def record(self, team_id:int) -> dict:
+        '''
+        The team's state as a legacy current_elos style dict
+        '''
+        rec = {'team' : self.teams[team_id]}
+        rec['season'] = self.season[team_id]
+        rec['week'] = self.week[team_id]
+        rec['game_id'] = self.game_id[team_id]
+        rec['opponent'] = self.opponent[team_id]
+        for field in self.numeric_fields[2:]:
+            rec[field] = getattr(self, field)[team_id]
+        return rec
+
+    def to_dict(self) -> dict:
+        '''
+        Every team's state keyed by team, in the legacy current_elos shape
+        '''
+        return {
+            team : self.record(team_id) for team, team_id in self.index.items()
+        }
@@ -1 +1,4 @@
-from .Nfelo import Nfelo
\ No newline at end of file
+from .Nfelo import Nfelo
+from .TeamState import TeamState
+from .RatingsIndex import RatingsIndex
+from .NfeloEnsemble import NfeloEnsemble
\ No newline at end of file
@@ -0,0 +1,166 @@
+import concurrent.futures
+import copy
+import numpy
+import pandas as pd
+
+from ..Performance import NfeloFoldGrader
+from .Primitives.ParallelEvaluator import GradedRecords
+from .Primitives.RecordSchema import FEATURES
+from .Primitives.RecordSchema import extract_performance
+from .Primitives.RecordSchema import performance_columns
+
+
+def validate_config(nfelo_model, base_config, config_id, config, folds):
+    '''
+    Runs the model once with a config and grades every fold from that run.
+    The config is applied over base_config, so configs can be partial
+
+    Returns:
+    * rows (list): a train + test record per fold
+    '''
+    nfelo_model.update_config(dict(base_config, **config))
+    nfelo_model.run()
+    fold_grader = NfeloFoldGrader(nfelo_model.updated_file)
+    seasons = [s for fold in folds for s in fold]
+    rows = []
+    for fold, test_seasons in enumerate(folds, start=1):
+        train_seasons = [s for s in seasons if s not in test_seasons]
+        row = {
+            'config_id' : config_id,
+            'fold' : fold,
+            'test_seasons' : ','.join([str(s) for s in test_seasons]),
+        }
+        row.update(extract_performance(GradedRecords(fold_grader.grade(train_seasons))))
+        ## test columns prefixed test_, as in the optimizer's _test.csv ##
+        for k, v in extract_performance(GradedRecords(fold_grader.grade(test_seasons))).items():
+            row['test_{0}'.format(k)] = v
+        for feature in FEATURES:
+            row[feature] = nfelo_model.config.get(feature)
+        rows.append(row)
+    return rows
+
+
+## each worker's copy of the model and its starting config, set once when ##
+## the worker starts ##
+_worker_model = None
+_worker_config = None
+
+def _init_worker(nfelo_model):
+    global _worker_model, _worker_config
+    _worker_model = nfelo_model
+    _worker_config = copy.deepcopy(nfelo_model.config)
+
+def _validate_in_worker(args):
+    config_id, config, folds = args
+    return validate_config(_worker_model, _worker_config, config_id, config, folds)
+
+
+class NfeloCrossValidator():
+    '''
+    Cross validates a list of configs over seasons. The model always runs
+    the whole history and only grading is split, so each config is run once
+    and every fold's train and test scores come from that one run (see
+    NfeloFoldGrader). Configs are spread across a process pool of n_workers,
+    each holding its own copy of the model.
+
+    Parameters:
+    * nfelo_model (Nfelo): the model. Configs are applied over its config
+    * configs (dict or list): configs to validate, keyed by config_id, or a
+      list whose position is the config_id. A config may hold only the
+      features it changes
+    * folds (str or int): 'season' for leave-one-season-out, or a number of
+      contiguous blocks of seasons
+    * seasons (list): seasons to fold over. Defaults to every played season
+    * n_workers (int): processes to run configs across
+    '''
+
+    def __init__(self, nfelo_model, configs, folds='season', seasons=None, n_workers=1):
+        self.nfelo_model = nfelo_model
+        ## evals only read the updated file ##
+        self.nfelo_model.record_history = False
+        self.configs = configs if isinstance(configs, dict) else dict(enumerate(configs, start=1))
+        if seasons is None:
+            seasons = sorted(nfelo_model.played_games()['season'].unique().tolist())
+        self.seasons = sorted(seasons)
+        self.folds = self.gen_folds(folds)
+        self.n_workers = max(int(n_workers), 1)
+        self.results = None
+
+    def gen_folds(self, folds):
+        '''
+        Test seasons of each fold
+        '''
+        if folds == 'season':
+            return [[s] for s in self.seasons]
+        if not isinstance(folds, int) or folds < 2 or folds > len(self.seasons):
+            raise Exception('CV ERROR: folds must be \'season\' or 2 to {0}'.format(len(self.seasons)))
+        return [
+            [int(s) for s in block]
+            for block in numpy.array_split(numpy.array(self.seasons), folds)
+        ]
+
+    @staticmethod
+    def configs_from_logs(path, top=None):
+        '''
+        Configs of the rows of a results CSV (as written by save_to_logs),
+        keyed by run_id, best achieved_value first
+
+        Parameters:
+        * path (str): results CSV path
+        * top (int): keep only the best top rows
+
+        Returns:
+        * configs (dict): feature values by run_id
+        '''
+        df = pd.read_csv(path, index_col=0)
+        df = df.sort_values(by=['achieved_value'], ascending=[False])
+        if top is not None:
+            df = df.head(top)
+        features = [f for f in FEATURES if f in df.columns]
+        return {
+            row['run_id'] : {f : row[f] for f in features if pd.notnull(row[f])}
+            for _, row in df.iterrows()
+        }
+
+    def run(self):
+        '''
+        Runs and grades every config
+
+        Returns:
+        * results (DataFrame): a row per config and fold with the fold's
+          train scores, its test scores prefixed test_, and the config's
+          features, in RecordSchema column order
+        '''
+        args = [(config_id, config, self.folds) for config_id, config in self.configs.items()]
+        rows = []
+        if self.n_workers == 1:
+            base_config = copy.deepcopy(self.nfelo_model.config)
+            for config_id, config, folds in args:
+                rows.extend(validate_config(self.nfelo_model, base_config, config_id, config, folds))
+            ## leave the model on its own config ##
+            self.nfelo_model.update_config(base_config)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                initializer=_init_worker,
+                initargs=(self.nfelo_model,)
+            ) as pool:
+                for config_rows in pool.map(_validate_in_worker, args):
+                    rows.extend(config_rows)
+        columns = (
+            ['config_id', 'fold', 'test_seasons'] +
+            performance_columns() +
+            ['test_{0}'.format(c) for c in performance_columns()] +
+            FEATURES
+        )
+        self.results = pd.DataFrame(rows, columns=columns)
+        return self.results
+
+    def summary(self, metric='brier_nfelo_close'):
+        '''
+        Mean, spread and range of a test metric across folds by config,
+        highest mean first. Metrics are RecordSchema names ({metric}_{model})
+        '''
+        col = 'test_{0}'.format(metric)
+        summary = self.results.groupby('config_id')[col].agg(['mean', 'std', 'min', 'max'])
+        return summary.sort_values(by=['mean'], ascending=[False])
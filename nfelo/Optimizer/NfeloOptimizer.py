@@ -1,5 +1,12 @@
+import os
+import time
+
 from .Primitives.NfeloOptimizerBase import NfeloOptimizerBase
+from .Primitives.NfeloOptimizerBase import BudgetExhausted
 from .Primitives.RandomStarts import RandomStarts
+from .Primitives.DifferentialEvolution import DifferentialEvolution
+from .Primitives.SurrogateSearch import SurrogateSearch
+from .Primitives.SuccessiveHalving import SuccessiveHalving
 
 
 class NfeloOptimizer():
@@ -8,9 +15,25 @@ class NfeloOptimizer():
     API and composes:
         * NfeloOptimizerBase  -- single SLSQP local optimization that saves on each new best
         * RandomStarts        -- runs many base.optimize() calls if random_starts=True
+        * DifferentialEvolution -- population search, each generation scored in
+          parallel across n_workers, if strategy='differential_evolution'
+        * SurrogateSearch     -- gaussian process / expected improvement search,
+          batches scored in parallel, if strategy='surrogate'
+        * SuccessiveHalving   -- screens candidates at cheaper fidelities (recent
+          seasons from a checkpointed rating state) before full runs, if
+          strategy='successive_halving'. screen_fidelities applies the same
+          screen to the RandomStarts starting points
     Train/test split is handled here: when test_seasons is non-empty the base's
     grader is filtered to train seasons during optimization, and the base writes
     an extra row to {name}_test.csv on every new best (using test_season_filter).
+    With max_seconds set, the optimization stops after the first eval past the
+    budget (see NfeloOptimizerBase.check_budget), saves the best of the current
+    run if it was not saved, and sets base.budget_exhausted.
+    With checkpoint_path set, the run is checkpointed every checkpoint_every
+    evals, and optimize() resumes from the checkpoint if one is already there.
+    Every eval's metrics are logged to {name}_metrics.csv; with
+    pareto_objectives set, the evals not dominated across those objectives
+    are kept in {name}_pareto.csv (see ParetoFront).
     '''
 
     def __init__(self,
@@ -24,8 +47,22 @@ class NfeloOptimizer():
             tol=0.000001, step=0.00001, method='SLSQP',
             random_starts=False,
             niter=30,
+            screen_fidelities=None, eta=3,
+            ## population or surrogate search in place of SLSQP ##
+            ## (see DifferentialEvolution and SurrogateSearch) ##
+            strategy=None, strategy_params={}, n_workers=1,
             ## test/train split ##
             test_seasons=None,
+            ## wall-clock budget of optimize() in seconds ##
+            max_seconds=None,
+            ## checkpoint (and resume from) this path ##
+            checkpoint_path=None, checkpoint_every=10,
+            ## per-section eval timing in the runtime CSV ##
+            profile_sections=False, profile_sample_every=10,
+            ## write elo and reversion records on each eval ##
+            record_history=False,
+            ## keep a pareto front across these objectives ##
+            pareto_objectives=None,
         ):
         ## build the base primitive that runs one SLSQP per call ##
         self.base = NfeloOptimizerBase(
@@ -34,14 +71,39 @@ class NfeloOptimizer():
             bg_overrides=bg_overrides,
             best_guesses=best_guesses, bound=bound,
             tol=tol, step=step, method=method,
+            profile_sections=profile_sections,
+            profile_sample_every=profile_sample_every,
+            record_history=record_history,
+            pareto_objectives=pareto_objectives,
         )
-        ## wrap with random starts if requested ##
-        if random_starts:
-            self.strategy = RandomStarts(self.base, niter=niter)
+        ## wrap with the requested strategy, or random starts if requested ##
+        if strategy == 'differential_evolution':
+            self.strategy = DifferentialEvolution(
+                self.base, n_workers=n_workers, **strategy_params
+            )
+        elif strategy == 'surrogate':
+            self.strategy = SurrogateSearch(
+                self.base, n_workers=n_workers, **strategy_params
+            )
+        elif strategy == 'successive_halving':
+            self.strategy = SuccessiveHalving(
+                self.base, n_workers=n_workers, **strategy_params
+            )
+        elif strategy is not None:
+            raise Exception('OPTIMIZER ERROR: Unknown strategy {0}'.format(strategy))
+        elif random_starts:
+            self.strategy = RandomStarts(
+                self.base, niter=niter,
+                screen_fidelities=screen_fidelities, eta=eta, n_workers=n_workers
+            )
         else:
             self.strategy = self.base
         ## train/test state ##
         self.test_seasons = test_seasons
+        self.max_seconds = max_seconds
+        if checkpoint_path is not None:
+            self.base.checkpoint_path = str(checkpoint_path)
+            self.base.checkpoint_every = checkpoint_every
         ## expose nfelo_model so existing callers (Development/optimization.py) keep working ##
         self.nfelo_model = nfelo_model
 
@@ -73,8 +135,29 @@ class NfeloOptimizer():
             print('Train/test split: train={0} seasons, test={1}'.format(
                 len(train_seasons), self.test_seasons
             ))
+        ## the deadline may also be set on the base directly (ie by a training shard) ##
+        opti_time_start = float(time.time())
+        if self.max_seconds is not None:
+            self.base.deadline = opti_time_start + self.max_seconds
+        self.base.budget_exhausted = False
+        method = self.base.method
+        ## resume from a checkpoint left by an interrupted run ##
+        if self.base.checkpoint_path is not None and not self.base.resume_state:
+            if os.path.exists(self.base.checkpoint_path):
+                self.base.load_checkpoint(self.base.checkpoint_path)
+        self.base.eval_log = list(self.base.resume_state.get('evals', []))
         ## delegate to strategy (base or random starts) ##
-        self.strategy.optimize()
+        try:
+            self.strategy.optimize()
+        except BudgetExhausted as exc:
+            print('     {0}'.format(exc))
+            self.base.flush_best()
+            ## checkpoint the evals since the last one so a resume loses none ##
+            if self.base.checkpoint_path is not None:
+                self.base.save_checkpoint()
+            self.base.method = method
+            self.base.opti_seconds = float(time.time()) - opti_time_start
+        self.base.end_resume()
 
     def save_to_logs(self, file_name=None):
         '''
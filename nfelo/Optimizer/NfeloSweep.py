@@ -0,0 +1,206 @@
+import concurrent.futures
+import copy
+import numpy
+import pandas as pd
+
+from ..Performance import NfeloGrader
+from .Primitives.NfeloOptimizerBase import NfeloOptimizerBase
+from .Primitives.RecordSchema import FEATURES
+from .Primitives.RecordSchema import MODELS
+from .Primitives.RecordSchema import extract_performance
+from .Primitives.RecordSchema import model_metrics
+
+
+def sweep_point(nfelo_model, base_config, feature, value, season_filter=None, trajectory=None):
+    '''
+    Scores the base config with one feature set to a value. Market features
+    are scored from the base config's trajectory when one is passed, rather
+    than rerunning the model
+
+    Returns:
+    * row (dict): the feature, value, and performance columns of the point
+    '''
+    nfelo_model.update_config(dict(base_config, **{feature : value}))
+    if trajectory is not None and feature in nfelo_model.market_features:
+        nfelo_model.run_market(trajectory)
+    else:
+        nfelo_model.run()
+    grader = NfeloGrader(nfelo_model.updated_file, season_filter=season_filter, keep_games=False)
+    row = {'feature' : feature, 'value' : value}
+    row.update(extract_performance(grader))
+    return row
+
+
+## each worker's copy of the model, its starting config and the base ##
+## trajectory, set once when the worker starts ##
+_worker_model = None
+_worker_config = None
+_worker_trajectory = None
+
+def _init_worker(nfelo_model, trajectory):
+    global _worker_model, _worker_config, _worker_trajectory
+    _worker_model = nfelo_model
+    _worker_config = copy.deepcopy(nfelo_model.config)
+    _worker_trajectory = trajectory
+
+def _sweep_in_worker(args):
+    feature, value, season_filter = args
+    return sweep_point(
+        _worker_model, _worker_config, feature, value,
+        season_filter=season_filter, trajectory=_worker_trajectory
+    )
+
+
+class NfeloSweep():
+    '''
+    One at a time sensitivity sweep of the config. Each feature is moved
+    across a grid of values with every other feature held at the base config,
+    and every metric of every model is recorded at each point.
+
+    The base config is run once, recording its trajectory. Market features
+    (Nfelo.market_features) never feed back into the team state, so their
+    grid points only redo the market regression of that trajectory (see
+    Nfelo.run_market()) instead of rerunning the model. The other features
+    need a full run per point, and are spread across a process pool of
+    n_workers, each holding its own copy of the model.
+
+    Parameters:
+    * nfelo_model (Nfelo): the model. Its config is the base config
+    * grids (dict): values to sweep by feature. A number in place of a list
+      spreads that many values evenly across the feature's range in
+      NfeloOptimizerBase.available_features. Defaults to 25 values for every
+      feature in FEATURES
+    * season_filter (list): seasons to grade. Defaults to every season
+    * n_workers (int): processes to run points across
+    '''
+
+    def __init__(self, nfelo_model, grids=None, season_filter=None, n_workers=1):
+        self.nfelo_model = nfelo_model
+        if grids is None:
+            grids = {feature : 25 for feature in FEATURES}
+        self.grids = {feature : self.gen_grid(feature, grid) for feature, grid in grids.items()}
+        self.season_filter = season_filter
+        self.n_workers = max(int(n_workers), 1)
+        self.base_config = copy.deepcopy(nfelo_model.config)
+        self.base_row = None
+        self.results = None
+
+    def gen_grid(self, feature, grid):
+        '''
+        Grid values of a feature
+        '''
+        if feature not in NfeloOptimizerBase.available_features:
+            raise Exception('SWEEP ERROR: Unknown feature {0}'.format(feature))
+        if isinstance(grid, int):
+            feature_info = NfeloOptimizerBase.available_features[feature]
+            return [float(v) for v in numpy.linspace(feature_info['min'], feature_info['max'], grid)]
+        return [float(v) for v in grid]
+
+    def run(self):
+        '''
+        Runs every grid point
+
+        Returns:
+        * results (DataFrame): the tidy response curves, a row per feature,
+          value, model and metric, in RecordSchema order
+        '''
+        ## base run, keeping the trajectory the market features reuse ##
+        record_history = self.nfelo_model.record_history
+        self.nfelo_model.record_history = True
+        self.nfelo_model.update_config(self.base_config)
+        self.nfelo_model.run()
+        trajectory = self.nfelo_model.trajectory()
+        self.nfelo_model.record_history = False
+        self.base_row = extract_performance(NfeloGrader(
+            self.nfelo_model.updated_file, season_filter=self.season_filter, keep_games=False
+        ))
+        ## points at the base value are the base run ##
+        args = []
+        rows = []
+        for feature, grid in self.grids.items():
+            for value in grid:
+                if value == self.base_config.get(feature):
+                    rows.append(dict({'feature' : feature, 'value' : value}, **self.base_row))
+                else:
+                    args.append((feature, value, self.season_filter))
+        print('Sweeping {0} points ({1} from the base trajectory)...'.format(
+            len(args), len([a for a in args if a[0] in self.nfelo_model.market_features])
+        ))
+        if self.n_workers == 1:
+            for feature, value, season_filter in args:
+                rows.append(sweep_point(
+                    self.nfelo_model, self.base_config, feature, value,
+                    season_filter=season_filter, trajectory=trajectory
+                ))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                initializer=_init_worker,
+                initargs=(self.nfelo_model, trajectory)
+            ) as pool:
+                rows.extend(pool.map(_sweep_in_worker, args))
+        ## leave the model on the base config ##
+        self.nfelo_model.record_history = record_history
+        self.nfelo_model.update_config(self.base_config)
+        self.results = self.tidy(rows)
+        return self.results
+
+    def tidy(self, rows):
+        '''
+        Melts a performance row per point into a row per point, model and
+        metric, with the base config's value of the feature flagged
+        '''
+        wide = pd.DataFrame(rows)
+        frames = []
+        for model in MODELS:
+            for metric in model_metrics(model):
+                frame = wide[['feature', 'value']].copy()
+                frame['is_base'] = [
+                    value == self.base_config.get(feature)
+                    for feature, value in zip(wide['feature'], wide['value'])
+                ]
+                frame['model'] = model
+                frame['metric'] = metric
+                frame['score'] = wide['{0}_{1}'.format(metric, model)]
+                frames.append(frame)
+        ## features in grid order, then models and metrics in schema order ##
+        order = {feature : i for i, feature in enumerate(self.grids)}
+        tidy = pd.concat(frames, ignore_index=True)
+        tidy['feature_order'] = tidy['feature'].map(order)
+        tidy = tidy.sort_values(by=['feature_order', 'value'], kind='stable')
+        return tidy.drop(columns=['feature_order']).reset_index(drop=True)
+
+    def curve(self, feature, metric='brier', model='nfelo_close'):
+        '''
+        Response curve of one metric to one feature, indexed by value
+        '''
+        df = self.results[
+            (self.results['feature'] == feature) &
+            (self.results['model'] == model) &
+            (self.results['metric'] == metric)
+        ]
+        return df.set_index('value')['score']
+
+    def sensitivity(self, metric='brier', model='nfelo_close'):
+        '''
+        How far each feature moves a metric across its grid, widest first,
+        with the best value found (the highest score, as brier is sign
+        flipped) next to the base value
+        '''
+        df = self.results[
+            (self.results['model'] == model) &
+            (self.results['metric'] == metric)
+        ]
+        rows = []
+        for feature, curve in df.groupby('feature', sort=False):
+            best = curve.loc[curve['score'].idxmax()] if curve['score'].notna().any() else None
+            rows.append({
+                'feature' : feature,
+                'base_value' : self.base_config.get(feature),
+                'base_score' : self.base_row.get('{0}_{1}'.format(metric, model)),
+                'best_value' : best['value'] if best is not None else numpy.nan,
+                'best_score' : best['score'] if best is not None else numpy.nan,
+                'score_range' : curve['score'].max() - curve['score'].min(),
+            })
+        summary = pd.DataFrame(rows)
+        return summary.sort_values(by=['score_range'], ascending=[False]).reset_index(drop=True)
@@ -0,0 +1,171 @@
+import numpy
+import time
+
+from .ParallelEvaluator import ParallelEvaluator
+
+
+class DifferentialEvolution():
+    '''
+    Composes a NfeloOptimizerBase and runs a differential evolution search in
+    normalized [0,1] space over the optimized features. Unlike RandomStarts,
+    information is shared across the whole search: each generation mutates
+    the population toward its best members, and the objective's
+    non-smoothness does not matter since no gradients are estimated.
+
+    The initial population is a latin hypercube that includes the base's
+    best guesses. Each generation is one batch of trial points scored
+    through a ParallelEvaluator, so it runs across n_workers processes.
+    Every eval is recorded by the base (mid_opti_output and the runtime log)
+    with hop_number set to the generation (the initial population is 1), so
+    its rows are interchangeable with SLSQP rows.
+
+    The search stops when the population's objectives converge (std below
+    tol times the mean's magnitude), after the generations are run, or when
+    max_evals is reached. With polish=True, a final SLSQP runs from the best
+    point.
+
+    DifferentialEvolution does not save anything itself -- base owns the save.
+    '''
+
+    def __init__(self,
+            ## composed primitive ##
+            base,
+            ## search params ##
+            popsize=None, generations=30,
+            mutation=(0.5, 1.0), crossover=0.9,
+            strategy='best1bin',
+            tol=0.001, max_evals=None,
+            polish=False,
+            ## parallel params ##
+            n_workers=1,
+            seed=None,
+        ):
+        if strategy not in ('best1bin', 'rand1bin'):
+            raise Exception('DIFFERENTIAL EVOLUTION ERROR: Unknown strategy {0}'.format(strategy))
+        self.base = base
+        self.n_features = len(base.features)
+        ## default of 4 per feature keeps generations cheap relative to SLSQP stencils ##
+        self.popsize = popsize if popsize is not None else max(4 * self.n_features, 8)
+        self.generations = generations
+        self.mutation = mutation
+        self.crossover = crossover
+        self.strategy = strategy
+        self.tol = tol
+        self.max_evals = max_evals
+        self.polish = polish
+        self.n_workers = n_workers
+        self.rng = numpy.random.default_rng(seed)
+        ## post optimization vars ##
+        self.population = None
+        self.population_obj = None
+        self.best_x = None
+        self.best_obj = None
+        self.n_evals = 0
+
+    def init_population(self):
+        '''
+        Latin hypercube over [0,1] for each feature, with the base's best
+        guesses as the first member
+        '''
+        strata = numpy.column_stack([
+            self.rng.permutation(self.popsize) for _ in range(self.n_features)
+        ])
+        population = (strata + self.rng.uniform(size=strata.shape)) / self.popsize
+        population[0] = numpy.clip(self.base.best_guesses, 0, 1)
+        return population
+
+    def gen_trials(self):
+        '''
+        Mutates and crosses over the population into one trial per member
+        '''
+        n = self.popsize
+        ## dithered mutation factor per generation ##
+        if isinstance(self.mutation, (tuple, list)):
+            f = self.rng.uniform(self.mutation[0], self.mutation[1])
+        else:
+            f = self.mutation
+        ## three distinct donors per member, none the member itself ##
+        donors = numpy.argsort(self.rng.uniform(size=(n, n)) + numpy.eye(n), axis=1)[:, :3]
+        if self.strategy == 'best1bin':
+            base_vectors = self.population[numpy.argmin(self.population_obj)][None, :]
+        else:
+            base_vectors = self.population[donors[:, 2]]
+        mutants = base_vectors + f * (
+            self.population[donors[:, 0]] - self.population[donors[:, 1]]
+        )
+        ## binomial crossover, always taking at least one mutant feature ##
+        cross = self.rng.uniform(size=(n, self.n_features)) < self.crossover
+        cross[numpy.arange(n), self.rng.integers(0, self.n_features, size=n)] = True
+        trials = numpy.where(cross, mutants, self.population)
+        ## features pushed out of bounds are redrawn uniformly ##
+        out = (trials < 0) | (trials > 1)
+        trials[out] = self.rng.uniform(size=out.sum())
+        return trials
+
+    def converged(self):
+        return numpy.std(self.population_obj) <= self.tol * abs(numpy.mean(self.population_obj))
+
+    def evaluate(self, evaluator, xs, generation):
+        '''
+        Scores a batch, trimmed to what is left of max_evals
+        '''
+        if self.max_evals is not None:
+            xs = xs[:max(self.max_evals - self.n_evals, 0)]
+        self.base.hop_number = generation
+        objs = numpy.array(evaluator.evaluate(xs.tolist()), dtype='float64')
+        self.n_evals += len(xs)
+        return objs
+
+    def optimize(self):
+        '''
+        Run the search
+        '''
+        opti_time_start = float(time.time())
+        self.base.reset_run_state()
+        self.base.opti_vals = []
+        self.n_evals = 0
+        method = self.base.method
+        self.base.method = 'DE/{0}'.format(self.strategy)
+        ## a resume redraws the same population and trials (see load_checkpoint) ##
+        self.base.resume_strategy(self.rng)
+        with ParallelEvaluator(self.base, n_workers=self.n_workers) as evaluator:
+            ## initial population ##
+            self.population = self.init_population()
+            self.population_obj = self.evaluate(evaluator, self.population, 1)
+            ## a budget below the population size leaves the unscored members out ##
+            self.population = self.population[:len(self.population_obj)]
+            self.popsize = len(self.population)
+            for generation in range(2, self.generations + 2):
+                if self.popsize < 4 or self.converged():
+                    break
+                if self.max_evals is not None and self.n_evals >= self.max_evals:
+                    break
+                trials = self.gen_trials()
+                trial_obj = self.evaluate(evaluator, trials, generation)
+                ## greedy selection, member by member ##
+                scored = numpy.arange(len(trial_obj))
+                improved = scored[trial_obj <= self.population_obj[scored]]
+                self.population[improved] = trials[improved]
+                self.population_obj[improved] = trial_obj[improved]
+                print('     Generation {0} - best {1}, mean {2}'.format(
+                    generation, numpy.min(self.population_obj), numpy.mean(self.population_obj)
+                ))
+        best = int(numpy.argmin(self.population_obj))
+        self.best_x = self.population[best].tolist()
+        self.best_obj = float(self.population_obj[best])
+        self.base.best_guesses = self.best_x
+        ## a best from the initial population that was never beaten falls ##
+        ## inside the first 15 evals, which mid_opti_output does not write ##
+        self.base.flush_best()
+        self.base.method = method
+        ## optional local polish from the best point ##
+        if self.polish:
+            self.base.hop_number = self.generations + 2
+            self.base.optimize()
+        self.base.opti_seconds = float(time.time()) - opti_time_start
+
+    def save_to_logs(self, file_name=None):
+        '''
+        Pass-through to base. DifferentialEvolution owns no records of its own.
+        '''
+        return self.base.save_to_logs(file_name=file_name)
@@ -0,0 +1,102 @@
+import numpy
+from scipy.optimize import minimize
+from scipy.linalg import cho_factor, cho_solve
+
+
+class GaussianProcess():
+    '''
+    Small Gaussian process regression for surrogate optimization over the
+    normalized [0,1] feature space. Uses a Matern 5/2 kernel with a length
+    scale per feature, a signal variance, and a noise term that absorbs the
+    roughness of the objective. Hyperparameters are fit by maximizing the log
+    marginal likelihood of the standardized targets.
+
+    Parameters:
+    * n_restarts (int): extra random starts of the hyperparameter fit
+    * seed (int): seed for the restarts
+    '''
+    ## log bounds of the hyperparameters ##
+    length_bounds = (numpy.log(0.01), numpy.log(10.0))
+    signal_bounds = (numpy.log(0.01), numpy.log(10.0))
+    noise_bounds = (numpy.log(1e-6), numpy.log(1.0))
+
+    def __init__(self, n_restarts=2, seed=None):
+        self.n_restarts = n_restarts
+        self.rng = numpy.random.default_rng(seed)
+        self.theta = None
+        self.X = None
+        self.y = None
+
+    def kernel(self, a, b, theta):
+        '''
+        Matern 5/2 covariance between the rows of a and b
+        '''
+        d = a.shape[1]
+        length = numpy.exp(theta[:d])
+        signal = numpy.exp(theta[d])
+        dif = (a[:, None, :] - b[None, :, :]) / length
+        r = numpy.sqrt(numpy.maximum((dif ** 2).sum(axis=2), 0))
+        s5r = numpy.sqrt(5) * r
+        return signal * (1 + s5r + 5 / 3 * r ** 2) * numpy.exp(-s5r)
+
+    def neg_log_likelihood(self, theta, X, y):
+        K = self.kernel(X, X, theta) + (numpy.exp(theta[-1]) + 1e-10) * numpy.eye(len(X))
+        try:
+            factor = cho_factor(K, lower=True)
+        except numpy.linalg.LinAlgError:
+            return 1e10
+        alpha = cho_solve(factor, y)
+        return (
+            0.5 * y @ alpha +
+            numpy.log(numpy.diag(factor[0])).sum() +
+            0.5 * len(X) * numpy.log(2 * numpy.pi)
+        )
+
+    def fit(self, X, y, optimize=True):
+        '''
+        Fits the process to points X ([n, d]) and objectives y. With
+        optimize=False the previous hyperparameters are kept, which is how
+        batch points are conditioned on believed values
+        '''
+        X = numpy.asarray(X, dtype='float64')
+        y = numpy.asarray(y, dtype='float64')
+        d = X.shape[1]
+        ## standardize targets ##
+        self.y_mean = y.mean()
+        self.y_std = y.std() if y.std() > 0 else 1.0
+        ys = (y - self.y_mean) / self.y_std
+        bounds = [self.length_bounds] * d + [self.signal_bounds, self.noise_bounds]
+        if optimize or self.theta is None or len(self.theta) != d + 2:
+            starts = [numpy.array([numpy.log(0.3)] * d + [0.0, numpy.log(1e-3)])]
+            if self.theta is not None and len(self.theta) == d + 2:
+                starts.append(self.theta)
+            for _ in range(self.n_restarts):
+                starts.append(numpy.array([self.rng.uniform(lo, hi) for lo, hi in bounds]))
+            best = None
+            for start in starts:
+                result = minimize(
+                    self.neg_log_likelihood, start, args=(X, ys),
+                    method='L-BFGS-B', bounds=bounds
+                )
+                if best is None or result.fun < best.fun:
+                    best = result
+            self.theta = best.x
+        self.X = X
+        self.y = y
+        K = self.kernel(X, X, self.theta) + (numpy.exp(self.theta[-1]) + 1e-10) * numpy.eye(len(X))
+        self.factor = cho_factor(K, lower=True)
+        self.alpha = cho_solve(self.factor, ys)
+        return self
+
+    def predict(self, X):
+        '''
+        Posterior mean and standard deviation at the rows of X, on the scale
+        of the fitted objectives
+        '''
+        X = numpy.asarray(X, dtype='float64')
+        Ks = self.kernel(X, self.X, self.theta)
+        mean = Ks @ self.alpha
+        v = cho_solve(self.factor, Ks.T)
+        var = numpy.exp(self.theta[-2]) - (Ks * v.T).sum(axis=1)
+        std = numpy.sqrt(numpy.maximum(var, 1e-12))
+        return mean * self.y_std + self.y_mean, std * self.y_std
@@ -5,11 +5,24 @@ from scipy.optimize import minimize
 import time
 import pathlib
 import datetime
+import json
+import os
 
 from ...Performance import NfeloGrader
 from .RecordSchema import FEATURES
 from .RecordSchema import extract_performance
 from .RecordSchema import RUNTIME_LOG_COLUMNS
+from .RecordSchema import RUNTIME_SECTION_COLUMNS
+from .RecordSchema import metrics_log_columns
+from .ParetoFront import ParetoFront
+
+
+class BudgetExhausted(Exception):
+    '''
+    Raised by the base once its deadline has passed, after the eval that
+    crossed it was recorded. Stops the optimizer in a controlled way
+    '''
+    pass
 
 
 class NfeloOptimizerBase():
@@ -82,6 +95,9 @@ class NfeloOptimizerBase():
             best_guesses=None, bound=(0,1),
             tol=0.000001, step=0.00001, method='SLSQP',
             results_dir=None,
+            profile_sections=False, profile_sample_every=10,
+            record_history=False,
+            pareto_objectives=None,
         ):
         self.opti_tag = opti_tag
         self.nfelo_model = nfelo_model
@@ -91,6 +107,10 @@ class NfeloOptimizerBase():
         ## opti params ##
         self.bg_overrides = bg_overrides
         self.best_guesses = self.gen_best_guesses()
+        ## cheaper fidelities start from checkpoints run at the initial best ##
+        ## guesses, cached by their first season (see prepare_fidelity) ##
+        self.checkpoint_guesses = list(self.best_guesses)
+        self.fidelity_checkpoints = {}
         self.bounds = tuple((0, 1) for _ in range(len(features))) ## all features are normalized
         self.tol = tol
         self.step = step
@@ -109,6 +129,22 @@ class NfeloOptimizerBase():
         self.best_val = 0
         ## run_id is built per-save inside mid_opti_output (hop_number.total_runs) ##
         self.run_id = None
+        ## best eval not yet written (ie inside the first 15), kept so a stop ##
+        ## on the time budget can still save it (see flush_best) ##
+        self.unsaved_best = None
+        ## optional wall-clock deadline (time.time() seconds); evals past it ##
+        ## raise BudgetExhausted ##
+        self.deadline = None
+        self.budget_exhausted = False
+        ## optional checkpoint of the run every checkpoint_every evals, and the ##
+        ## evals of a loaded checkpoint to replay on resume (see load_checkpoint) ##
+        self.checkpoint_path = None
+        self.checkpoint_every = 10
+        self.eval_log = []
+        self.run_start = None
+        self.checkpoint_state = {}
+        self.resume_state = {}
+        self.replay_cache = {}
         ## post optimization vars ##
         self.opti_vals = []
         self.opti_seconds = 0
@@ -119,6 +155,17 @@ class NfeloOptimizerBase():
         if results_dir is None:
             results_dir = pathlib.Path(__file__).parent.parent.resolve() / 'results'
         self.results_dir = pathlib.Path(results_dir)
+        ## optional per-section timing of each eval, logged to the runtime CSV ##
+        self.profile_sections = profile_sections
+        if profile_sections:
+            self.nfelo_model.enable_profiling(sample_every=profile_sample_every)
+        ## evals only read the updated file, so elo and reversion records are ##
+        ## not written unless asked for ##
+        self.nfelo_model.record_history = record_history
+        ## optional front of full fidelity evals across several objectives, ##
+        ## kept in {tag}-{date}_pareto.csv (see load_pareto_front) ##
+        self.pareto_objectives = pareto_objectives
+        self.pareto_front = None
 
     def _results_path(self, filename):
         '''
@@ -136,9 +183,11 @@ class NfeloOptimizerBase():
             self.opti_date,
         ))
 
-    def _log_eval_runtime(self, eval_seconds, minimized_obj):
+    def _log_eval_runtime(self, eval_seconds, minimized_obj, section_seconds=None, fidelity=None):
         '''
-        Appends one row per objective-function eval to the runtime CSV.
+        Appends one row per objective-function eval to the runtime CSV, with
+        the fidelity it ran at. If section profiling is on, the eval's seconds
+        by section are appended as RUNTIME_SECTION_COLUMNS.
         '''
         row = {
             'optimization_type': self.opti_tag,
@@ -150,11 +199,84 @@ class NfeloOptimizerBase():
             'objective': self.objective,
             'minimized_obj': minimized_obj,
             'achieved_value': self.revert_obj(minimized_obj),
+            'fidelity': self.fidelity_label(fidelity),
         }
+        columns = RUNTIME_LOG_COLUMNS
+        if section_seconds is not None:
+            for section, seconds in section_seconds.items():
+                row['{0}_seconds'.format(section)] = seconds
+            columns = RUNTIME_LOG_COLUMNS + RUNTIME_SECTION_COLUMNS
         log_loc = self._runtime_log_path()
-        new = pd.DataFrame([row], columns=RUNTIME_LOG_COLUMNS)
+        new = pd.DataFrame([row], columns=columns)
+        header = not pathlib.Path(log_loc).exists()
+        new.to_csv(log_loc, mode='a', header=header, index=False)
+
+    def _metrics_log_path(self):
+        '''
+        Path to the per-eval metrics CSV for this optimization tag + date.
+        '''
+        return self._results_path('{0}-{1}_metrics.csv'.format(
+            self.opti_tag,
+            self.opti_date,
+        ))
+
+    def _pareto_path(self):
+        '''
+        Path to the pareto front CSV for this optimization tag + date.
+        '''
+        return self._results_path('{0}-{1}_pareto.csv'.format(
+            self.opti_tag,
+            self.opti_date,
+        ))
+
+    def load_pareto_front(self):
+        '''
+        Builds the pareto front from the metrics already logged under this tag
+        + date (ie by an earlier or resumed run), then keeps it up to date as
+        evals are recorded. Called on the first recorded eval, once the
+        results dir and date are final
+        '''
+        loc = self._metrics_log_path()
+        if pathlib.Path(loc).exists():
+            self.pareto_front = ParetoFront.from_metrics(
+                loc, self.pareto_objectives, obj_functions=self.available_obj_functions
+            )
+        else:
+            self.pareto_front = ParetoFront(
+                self.pareto_objectives, obj_functions=self.available_obj_functions
+            )
+        return self.pareto_front
+
+    def _log_eval_metrics(self, obj, grader, fidelity=None):
+        '''
+        Appends one row per objective-function eval to the metrics CSV, with
+        every canonical performance column and feature of the eval, so any
+        metric of any eval (not just new bests) can be read back later
+
+        Returns:
+        * row (dict): the eval's row
+        '''
+        row = {
+            'optimization_type': self.opti_tag,
+            'opti_date': self.opti_date,
+            'hop_number': self.hop_number,
+            'eval_number': self.total_runs,
+            'run_id': '{0}-{1}'.format(
+                self.hop_number if self.hop_number is not None else 1,
+                self.total_runs
+            ),
+            'fidelity': self.fidelity_label(fidelity),
+            'objective': self.objective,
+            'achieved_value': self.revert_obj(obj),
+        }
+        row.update(extract_performance(grader))
+        for feature in FEATURES:
+            row[feature] = self.nfelo_model.config.get(feature)
+        log_loc = self._metrics_log_path()
+        new = pd.DataFrame([row], columns=metrics_log_columns())
         header = not pathlib.Path(log_loc).exists()
         new.to_csv(log_loc, mode='a', header=header, index=False)
+        return row
 
 
     ## NORMALIZATION FUNCTIONS ##
@@ -250,6 +372,15 @@ class NfeloOptimizerBase():
             metric_name=obj_config['metric']
         )
         ## transform result ##
+        return self.minimize_grade(grade)
+
+    def minimize_grade(self, grade):
+        '''
+        Transforms a metric grade into the minimized obj. Inverse of
+        revert_obj
+        '''
+        ## get obj config ##
+        obj_config = self.available_obj_functions[self.objective]
         grade = grade / obj_config['scale']
         if obj_config['direction'] == 'pos':
             grade *= -1
@@ -269,13 +400,19 @@ class NfeloOptimizerBase():
         ## return ##
         return grade
 
-    def mid_opti_output(self, obj, grader):
+    def mid_opti_output(self, obj, grader, test_grader=None):
         '''
         Saves a stream of optimization results while the optimizer is running
         if conditions are met. Mirrors the original mid_opti_output: tracks
         the running best across obj_func evals and writes a row each time a
         new best is found (skipping the first 15 evals to avoid SLSQP's
         initial convergence noise).
+
+        test_grader may be passed when the test seasons were already graded
+        (ie by a worker process); otherwise it is built from the model.
+
+        A best inside the first 15 evals is held as unsaved_best, so
+        flush_best can still write it if the run is stopped early.
         '''
         ## see if conditions are met ##
         ## update objective function info ##
@@ -289,60 +426,88 @@ class NfeloOptimizerBase():
             self.best_val = obj
         ## full conditions for output ##
         if is_new_best and self.total_runs > 15:
-            ## clear optimization rec ##
-            self.opti_rec = {}
-            ## run_id uses total_runs so each mid-run save is unique ##
-            ## hyphen rather than dot so it isn't parsed as a float in CSV readers ##
-            self.run_id = '{0}-{1}'.format(
-                self.hop_number if self.hop_number is not None else 1,
-                self.total_runs
-            )
-            ## populate rec ##
-            self.opti_rec['optimization_type'] = self.opti_tag
-            self.opti_rec['optimization_method'] = self.method
-            self.opti_rec['optimization_tol'] = self.tol
-            self.opti_rec['optimization_step'] = self.step
-            self.opti_rec['opti_date'] = self.opti_date
-            self.opti_rec['hop_number'] = self.hop_number
-            self.opti_rec['run_id'] = self.run_id
-            self.opti_rec['objective'] = self.objective
-            ## explicit objective model + metric so the schema is unambiguous ##
-            obj_config = self.available_obj_functions[self.objective]
-            self.opti_rec['objective_model'] = obj_config['model']
-            self.opti_rec['objective_metric'] = obj_config['metric']
-            self.opti_rec['achieved_value'] = self.revert_obj(obj)
-            ## populate canonical performance columns from RecordSchema ##
-            self.opti_rec.update(extract_performance(grader))
-            ## populate features in canonical fixed order ##
-            for feature in FEATURES:
-                self.opti_rec[feature] = self.nfelo_model.config.get(feature)
-            ## save ##
-            self.save_to_logs()
-            ## snapshot market + market_open benchmarks once per split (idempotent via file check) ##
-            self._snapshot_market_benchmarks(grader, 'train')
-            ## if a test filter is set, also compute test metrics and append a row to _test.csv ##
-            ## skinny side table: run_id + the same 12 metrics as train, joinable post-hoc ##
-            if self.test_season_filter is not None:
-                test_grader = NfeloGrader(self.nfelo_model.updated_file, season_filter=self.test_season_filter)
-                test_rec = {'run_id': self.run_id}
-                ## canonical performance columns prefixed test_ so train+test ##
-                ## frames join cleanly on run_id with no column renames ##
-                for k, v in extract_performance(test_grader).items():
-                    test_rec['test_{0}'.format(k)] = v
-                test_log_loc = self._results_path('{0}-{1}_test.csv'.format(
-                    self.opti_tag,
-                    self.opti_date,
-                ))
-                try:
-                    existing = pd.read_csv(test_log_loc, index_col=0)
-                except:
-                    existing = None
-                new = pd.DataFrame([test_rec])
-                if existing is not None:
-                    new = pd.concat([existing, new]).reset_index(drop=True)
-                new.to_csv(test_log_loc)
-                ## snapshot test split benchmarks once ##
-                self._snapshot_market_benchmarks(test_grader, 'test')
+            self.write_best(obj, grader, test_grader=test_grader)
+        elif is_new_best or self.total_runs == 1:
+            self.unsaved_best = {
+                'obj' : obj,
+                'grader' : grader,
+                'test_grader' : test_grader,
+                'run_number' : self.total_runs,
+                'hop_number' : self.hop_number,
+                'config' : dict(self.nfelo_model.config),
+                'updated_file' : self.nfelo_model.updated_file,
+            }
+
+    def write_best(self, obj, grader, test_grader=None, run_number=None, config=None, updated_file=None, hop_number=None):
+        '''
+        Writes a new best's row to the logs, and its test row if a test
+        filter is set. The run number, hop, config and updated file default
+        to the eval just recorded
+        '''
+        run_number = self.total_runs if run_number is None else run_number
+        hop_number = self.hop_number if hop_number is None else hop_number
+        config = self.nfelo_model.config if config is None else config
+        updated_file = self.nfelo_model.updated_file if updated_file is None else updated_file
+        self.unsaved_best = None
+        ## clear optimization rec ##
+        self.opti_rec = {}
+        ## run_id uses total_runs so each mid-run save is unique ##
+        ## hyphen rather than dot so it isn't parsed as a float in CSV readers ##
+        self.run_id = '{0}-{1}'.format(
+            hop_number if hop_number is not None else 1,
+            run_number
+        )
+        ## populate rec ##
+        self.opti_rec['optimization_type'] = self.opti_tag
+        self.opti_rec['optimization_method'] = self.method
+        self.opti_rec['optimization_tol'] = self.tol
+        self.opti_rec['optimization_step'] = self.step
+        self.opti_rec['opti_date'] = self.opti_date
+        self.opti_rec['hop_number'] = hop_number
+        self.opti_rec['run_id'] = self.run_id
+        self.opti_rec['objective'] = self.objective
+        ## explicit objective model + metric so the schema is unambiguous ##
+        obj_config = self.available_obj_functions[self.objective]
+        self.opti_rec['objective_model'] = obj_config['model']
+        self.opti_rec['objective_metric'] = obj_config['metric']
+        self.opti_rec['achieved_value'] = self.revert_obj(obj)
+        ## populate canonical performance columns from RecordSchema ##
+        self.opti_rec.update(extract_performance(grader))
+        ## populate features in canonical fixed order ##
+        for feature in FEATURES:
+            self.opti_rec[feature] = config.get(feature)
+        ## save ##
+        self.save_to_logs()
+        ## snapshot market + market_open benchmarks once per split (idempotent via file check) ##
+        self._snapshot_market_benchmarks(grader, 'train')
+        ## if a test filter is set, also compute test metrics and append a row to _test.csv ##
+        ## skinny side table: run_id + the same 12 metrics as train, joinable post-hoc ##
+        if self.test_season_filter is not None:
+            if test_grader is None:
+                test_grader = NfeloGrader(updated_file, season_filter=self.test_season_filter, keep_games=False)
+            test_rec = {'run_id': self.run_id}
+            ## canonical performance columns prefixed test_ so train+test ##
+            ## frames join cleanly on run_id with no column renames ##
+            for k, v in extract_performance(test_grader).items():
+                test_rec['test_{0}'.format(k)] = v
+            test_log_loc = self._results_path('{0}-{1}_test.csv'.format(
+                self.opti_tag,
+                self.opti_date,
+            ))
+            try:
+                existing = pd.read_csv(test_log_loc, index_col=0)
+            except:
+                existing = None
+            ## like the train log, a run_id already written (ie a best flushed ##
+            ## before a resume) is not written again ##
+            if existing is not None and self.run_id in existing['run_id'].astype(str).values:
+                return
+            new = pd.DataFrame([test_rec])
+            if existing is not None:
+                new = pd.concat([existing, new]).reset_index(drop=True)
+            new.to_csv(test_log_loc)
+            ## snapshot test split benchmarks once ##
+            self._snapshot_market_benchmarks(test_grader, 'test')
 
     def _snapshot_market_benchmarks(self, grader, split):
         '''
@@ -384,34 +549,321 @@ class NfeloOptimizerBase():
             new = pd.concat([existing, new]).reset_index(drop=True)
         new.to_csv(bench_loc)
 
-    def obj_func(self, x):
+    ## MULTI-FIDELITY ##
+    ## A fidelity of n runs the model only from the nth to last graded season ##
+    ## through the last graded season, starting from a checkpoint of the ##
+    ## rating state, and grades just those seasons. None is the full history ##
+
+    def fidelity_label(self, fidelity):
         '''
-        Objective function for the optimizer. This will:
+        Label of a fidelity in the runtime log
+        '''
+        return 'full' if fidelity is None else 'last_{0}_seasons'.format(fidelity)
+
+    def fidelity_start(self, fidelity):
+        '''
+        First season run at a fidelity
+        '''
+        cf = self.nfelo_model.current_file
+        seasons = sorted(cf[cf['home_margin'].notna()]['season'].unique().tolist())
+        if self.season_filter is not None:
+            seasons = [s for s in seasons if s in self.season_filter]
+        return seasons[-min(int(fidelity), len(seasons))]
+
+    def prepare_fidelity(self, fidelity):
+        '''
+        Returns the checkpoint a fidelity starts from, building it on first
+        use. Strategies prepare their fidelities before starting workers so
+        each worker's copy of the base has them
+        '''
+        start = self.fidelity_start(fidelity)
+        if start not in self.fidelity_checkpoints:
+            print('     Building the {0} checkpoint...'.format(start))
+            self.update_params(self.checkpoint_guesses)
+            self.fidelity_checkpoints[start] = self.nfelo_model.checkpoint(start)
+        return self.fidelity_checkpoints[start]
+
+    def evaluate(self, x, fidelity=None):
+        '''
+        Scores a point without recording it. This will:
         * Update the model
-        * Rerun the model
+        * Rerun the model, from a checkpoint if a fidelity is passed
         * Grade the model
-        * Return a score to minimize
+
+        Returns:
+        * obj (float): minimizable objective
+        * grader (NfeloGrader): the graded model
+        * eval_seconds (float): wall time of the eval
+        * section_seconds (dict): seconds by section if profiling, else None
         '''
         eval_start = float(time.time())
+        checkpoint = None if fidelity is None else self.prepare_fidelity(fidelity)
         ## update model ##
         self.update_params(x)
         ## rerun model ##
-        self.nfelo_model.run()
+        if self.profile_sections:
+            self.nfelo_model.section_timer.reset()
+        ## a cheaper fidelity also stops at the last graded season ##
+        self.nfelo_model.run(
+            checkpoint=checkpoint,
+            through_season=(
+                max(self.season_filter) if checkpoint is not None and self.season_filter else None
+            )
+        )
         ## create a grader (respects season_filter for train/test) ##
-        grader = NfeloGrader(self.nfelo_model.updated_file, season_filter=self.season_filter)
+        grade_start = time.perf_counter()
+        season_filter = self.season_filter
+        if checkpoint is not None:
+            season_filter = [
+                s for s in self.nfelo_model.updated_file['season'].unique().tolist()
+                if self.season_filter is None or s in self.season_filter
+            ]
+        grader = NfeloGrader(self.nfelo_model.updated_file, season_filter=season_filter, keep_games=False)
+        section_seconds = None
+        if self.profile_sections:
+            report = self.nfelo_model.profile_report()
+            section_seconds = dict(zip(report['section'], report['estimated_seconds']))
+            section_seconds['grade'] = time.perf_counter() - grade_start
         ## get the correct metric and make it minimizable
         obj = self.parse_grade(grader)
+        return obj, grader, float(time.time()) - eval_start, section_seconds
+
+    def record_eval(self, obj, grader, eval_seconds, section_seconds=None, test_grader=None, fidelity=None, x=None):
+        '''
+        Records an evaluated point: counts the run, saves a row on a new best,
+        and appends the runtime row. Evals scored elsewhere (ie in a worker
+        process) are recorded here in the order they were proposed, so their
+        rows are interchangeable with obj_func rows. The model's config must
+        hold the evaluated point
+
+        Cheaper fidelity evals are not comparable to full ones, so they only
+        get a runtime row
+
+        Every eval's metrics are appended to the metrics log, and full
+        fidelity evals are offered to the pareto front if one is kept
+
+        Passing the point x adds the eval to the checkpoint's eval log
+        '''
         ## update run count ##
         self.total_runs += 1
-        print('Run number {0} - {1}'.format(
-            self.total_runs, obj
+        print('Run number {0} - {1}{2}'.format(
+            self.total_runs, obj,
+            '' if fidelity is None else ' ({0})'.format(self.fidelity_label(fidelity))
         ))
         ## mid-run save: write a row whenever a new best is found ##
-        self.mid_opti_output(obj, grader)
-        self._log_eval_runtime(float(time.time()) - eval_start, obj)
+        if fidelity is None:
+            self.mid_opti_output(obj, grader, test_grader=test_grader)
+        self._log_eval_runtime(eval_seconds, obj, section_seconds, fidelity)
+        if self.pareto_objectives is not None and self.pareto_front is None:
+            self.load_pareto_front()
+        metrics = self._log_eval_metrics(obj, grader, fidelity)
+        if self.pareto_front is not None and fidelity is None:
+            if self.pareto_front.add(metrics):
+                self.pareto_front.save(self._pareto_path())
+        if x is not None:
+            self.log_eval(x, obj, fidelity)
+
+    def obj_func(self, x):
+        '''
+        Objective function for the optimizer. This will:
+        * Update the model
+        * Rerun the model
+        * Grade the model
+        * Return a score to minimize
+        '''
+        ## evals already run before a resume are replayed, not rerun ##
+        obj = self.replay_eval(x)
+        if obj is not None:
+            return obj
+        obj, grader, eval_seconds, section_seconds = self.evaluate(x)
+        self.record_eval(obj, grader, eval_seconds, section_seconds, x=x)
+        ## stop here, with this eval recorded, if the time budget is spent ##
+        self.check_budget()
         ## return ##
         return obj
 
+    def check_budget(self):
+        '''
+        Raises BudgetExhausted if the deadline has passed
+        '''
+        if self.deadline is not None and float(time.time()) >= self.deadline:
+            self.budget_exhausted = True
+            raise BudgetExhausted(
+                'Time budget exhausted after {0} evals'.format(self.total_runs)
+            )
+
+    def flush_best(self):
+        '''
+        Writes the best eval of the current run if it has not been saved yet,
+        which is the case when a stop comes inside the first 15 evals
+        '''
+        if self.unsaved_best is not None:
+            pending = self.unsaved_best
+            ## a replayed best has no grader, so its point is run again ##
+            if 'grader' not in pending:
+                obj, grader, eval_seconds, section_seconds = self.evaluate(pending['x'])
+                pending = dict(
+                    pending, grader=grader, test_grader=None,
+                    config=dict(self.nfelo_model.config),
+                    updated_file=self.nfelo_model.updated_file,
+                )
+            self.write_best(
+                pending['obj'], pending['grader'],
+                test_grader=pending['test_grader'],
+                run_number=pending['run_number'],
+                config=pending['config'],
+                updated_file=pending['updated_file'],
+                hop_number=pending['hop_number'],
+            )
+
+    ## CHECKPOINT FUNCTIONS ##
+    ## A resume reruns the strategy from the same start (and rng states), with ##
+    ## every eval it already ran served from the checkpoint, so it continues ##
+    ## exactly where it stopped. SLSQP has no state that could be restored ##
+    ## directly, but given the same values it takes the same steps ##
+
+    def eval_key(self, x, fidelity=None):
+        return (fidelity, tuple(float(v) for v in x))
+
+    def log_eval(self, x, obj, fidelity=None):
+        '''
+        Adds an eval to the eval log, and writes a checkpoint every
+        checkpoint_every evals if a checkpoint_path is set
+        '''
+        self.eval_log.append([fidelity, [float(v) for v in x], float(obj)])
+        if self.checkpoint_path is not None and self.total_runs % self.checkpoint_every == 0:
+            self.save_checkpoint()
+
+    def replay_eval(self, x, fidelity=None):
+        '''
+        Returns the objective of a point run before the resumed checkpoint,
+        advancing the run counters as its eval did, or None if the point has
+        not been run. Replayed evals write no rows and are already in the eval
+        log; they were written the first time
+        '''
+        key = self.eval_key(x, fidelity)
+        if key not in self.replay_cache:
+            return None
+        obj = self.replay_cache[key]
+        self.total_runs += 1
+        if fidelity is None:
+            if self.total_runs == 1 or obj < self.best_val:
+                self.best_val = obj
+                ## a best inside the first 15 was never written, so it is held ##
+                ## like any other, to be rerun if flush_best needs to write it ##
+                if self.total_runs <= 15:
+                    self.unsaved_best = {
+                        'obj' : obj,
+                        'x' : list(x),
+                        'run_number' : self.total_runs,
+                        'hop_number' : self.hop_number,
+                    }
+        return obj
+
+    def save_checkpoint(self):
+        '''
+        Writes the run's state to checkpoint_path: the start and hop of the
+        current optimize() call, the current iterate, the best point, the eval
+        counters, every eval of the run, and any strategy state (ie rng states
+        and completed hops) in checkpoint_state
+        '''
+        full = [e for e in self.eval_log if e[0] is None]
+        best = min(full, key=lambda e: e[2]) if full else None
+        state = {
+            'opti_tag' : self.opti_tag,
+            'opti_date' : self.opti_date,
+            'hop_number' : self.hop_number,
+            'start' : self.run_start,
+            'iterate' : full[-1][1] if full else None,
+            'best_x' : best[1] if best is not None else None,
+            'best_obj' : best[2] if best is not None else None,
+            'total_runs' : self.total_runs,
+            'evals' : self.eval_log,
+            'strategy' : self.checkpoint_state,
+        }
+        ## write then move, so a crash mid-write keeps the last checkpoint ##
+        tmp_loc = '{0}.tmp'.format(self.checkpoint_path)
+        with open(tmp_loc, 'w') as fp:
+            json.dump(state, fp)
+        os.replace(tmp_loc, self.checkpoint_path)
+
+    def load_checkpoint(self, path):
+        '''
+        Loads a checkpoint written by save_checkpoint to resume from. The next
+        optimize() replays its evals, which carry on in the eval log
+        '''
+        with open(path, 'r') as fp:
+            self.resume_state = json.load(fp)
+        self.replay_cache = {
+            self.eval_key(x, fidelity) : obj
+            for fidelity, x, obj in self.resume_state['evals']
+        }
+        print('     Resuming from {0} evals in {1}'.format(len(self.replay_cache), path))
+        self.trim_resumed_logs()
+
+    def trim_resumed_logs(self):
+        '''
+        Drops the log rows of evals run after the resumed checkpoint. Those
+        evals run again on resume and write their rows a second time, which
+        would otherwise double count them in the runtime and metrics logs.
+        The checkpoint is written right after its last eval's rows, so every
+        row after that eval's (hop_number, eval_number) is dropped. The train
+        and test logs skip a run_id they already have, so need no trim
+        '''
+        hop = self.resume_state.get('hop_number')
+        last = self.resume_state.get('total_runs')
+        for loc in [self._runtime_log_path(), self._metrics_log_path()]:
+            if not pathlib.Path(loc).exists():
+                continue
+            ## round trip floats so the kept rows are rewritten unchanged ##
+            df = pd.read_csv(loc, float_precision='round_trip')
+            ## a hop of None is written blank ##
+            at_checkpoint = (
+                (df['hop_number'].isnull() if hop is None else df['hop_number'] == hop) &
+                (df['eval_number'] == last)
+            )
+            if not at_checkpoint.any():
+                continue
+            keep = numpy.arange(len(df)) <= numpy.flatnonzero(at_checkpoint.to_numpy())[-1]
+            if keep.all():
+                continue
+            print('     Dropping {0} rows logged after the checkpoint from {1}'.format(
+                int((~keep).sum()), pathlib.Path(loc).name
+            ))
+            df[keep].to_csv(loc, index=False)
+
+    def resume_strategy(self, *rngs):
+        '''
+        Called by a strategy as it starts. Restores its generators to their
+        starting states from a resumed checkpoint (or records them for the next
+        checkpoint), and returns the strategy state of the resumed checkpoint
+        '''
+        resumed = self.resume_state.get('strategy', {})
+        states = resumed.get('rng_states')
+        if states is not None and len(states) == len(rngs):
+            for rng, state in zip(rngs, states):
+                rng.bit_generator.state = state
+        self.checkpoint_state = {
+            'rng_states' : [rng.bit_generator.state for rng in rngs]
+        }
+        return resumed
+
+    def end_resume(self):
+        '''
+        Drops the resumed checkpoint once the run is over
+        '''
+        self.resume_state = {}
+        self.replay_cache = {}
+
+    def reset_run_state(self):
+        '''
+        Resets new-best tracking and the run counter so the >15 skip applies
+        per optimization
+        '''
+        self.best_val = float('inf')
+        self.total_runs = 0
+        self.unsaved_best = None
+
     def optimize(self):
         '''
         Function that performs the optimization
@@ -420,8 +872,11 @@ class NfeloOptimizerBase():
         ## reset counter ##
         self.opti_round = 0
         ## reset per-call state so new-best tracking and the >15 skip apply per-hop ##
-        self.best_val = float('inf')
-        self.total_runs = 0
+        self.reset_run_state()
+        ## a resumed hop restarts from its original start to replay its evals ##
+        if self.resume_state.get('hop_number') == self.hop_number and self.resume_state.get('start') is not None:
+            self.best_guesses = self.resume_state.pop('start')
+        self.run_start = [float(v) for v in self.best_guesses]
         opti_time_start = float(time.time())
         solution = minimize(
             self.obj_func,
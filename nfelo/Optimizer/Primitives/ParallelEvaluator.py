@@ -0,0 +1,139 @@
+import concurrent.futures
+
+from ...Performance import NfeloGrader
+
+
+class GradedRecords():
+    '''
+    Stand in for an NfeloGrader that carries only the graded_records, which
+    is all the optimizer's logging reads. Lets a worker process send a grade
+    back without the graded games frame.
+    '''
+
+    def __init__(self, graded_records):
+        self.graded_records = graded_records
+
+
+## each worker's copy of the base, set once when the worker starts ##
+_worker_base = None
+
+def _init_worker(base):
+    global _worker_base
+    _worker_base = base
+
+def _evaluate_in_worker(args):
+    '''
+    Scores a point on the worker's model. Full fidelity test seasons are
+    graded here as well, since only the parent knows whether the point is a
+    new best
+    '''
+    x, fidelity = args
+    obj, grader, eval_seconds, section_seconds = _worker_base.evaluate(x, fidelity=fidelity)
+    test_grader = None
+    if _worker_base.test_season_filter is not None and fidelity is None:
+        test_grader = GradedRecords(NfeloGrader(
+            _worker_base.nfelo_model.updated_file,
+            season_filter=_worker_base.test_season_filter,
+            keep_games=False
+        ).graded_records)
+    return obj, GradedRecords(grader.graded_records), eval_seconds, section_seconds, test_grader
+
+
+class ParallelEvaluator():
+    '''
+    Evaluates batches of normalized points for a NfeloOptimizerBase. With
+    n_workers > 1, points are scored across a process pool in which each
+    worker holds its own copy of the base (and its model and data), sent once
+    when the worker starts. Every eval is then recorded by the base in the
+    parent, in the order the points were passed, so new-best saves and
+    runtime rows are the same as from obj_func.
+
+    With n_workers=1, points are scored in process with base.obj_func.
+
+    Use as a context manager, or call close(), to shut the pool down.
+    '''
+
+    def __init__(self,
+            ## composed primitive ##
+            base,
+            ## pool params ##
+            n_workers=1,
+        ):
+        self.base = base
+        self.n_workers = max(int(n_workers), 1)
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def start(self):
+        '''
+        Starts the worker pool if it is not running. Workers copy the base as
+        it is now, so filters and profiling should be set first
+        '''
+        if self.n_workers > 1 and self.pool is None:
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                initializer=_init_worker,
+                initargs=(self.base,)
+            )
+
+    def close(self):
+        '''
+        Shuts the worker pool down
+        '''
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def evaluate(self, xs, fidelity=None):
+        '''
+        Scores and records a batch of points
+
+        Parameters:
+        * xs (list): normalized points
+        * fidelity (int): score at a cheaper fidelity (see
+          NfeloOptimizerBase.evaluate). None is full fidelity
+
+        Returns:
+        * objs (list): minimized objective of each point, in order
+
+        Raises BudgetExhausted (see NfeloOptimizerBase.check_budget) once the
+        base's deadline has passed, after recording what was scored
+        '''
+        if self.n_workers == 1:
+            objs = []
+            for x in xs:
+                ## evals already run before a resume are replayed, not rerun ##
+                obj = self.base.replay_eval(x, fidelity)
+                if obj is None:
+                    obj, grader, eval_seconds, section_seconds = self.base.evaluate(x, fidelity=fidelity)
+                    self.base.record_eval(obj, grader, eval_seconds, section_seconds, fidelity=fidelity, x=x)
+                objs.append(obj)
+                self.base.check_budget()
+            return objs
+        ## only points not run before a resume go to the pool ##
+        replayed = [self.base.eval_key(x, fidelity) in self.base.replay_cache for x in xs]
+        self.start()
+        results = self.pool.map(_evaluate_in_worker, [
+            (list(x), fidelity) for x, cached in zip(xs, replayed) if not cached
+        ])
+        objs = []
+        for x, cached in zip(xs, replayed):
+            if cached:
+                objs.append(self.base.replay_eval(x, fidelity))
+                continue
+            obj, grader, eval_seconds, section_seconds, test_grader = next(results)
+            ## the parent's config carries the point into the saved row ##
+            self.base.update_params(x)
+            self.base.record_eval(
+                obj, grader, eval_seconds, section_seconds,
+                test_grader=test_grader, fidelity=fidelity, x=x
+            )
+            objs.append(obj)
+        ## a batch in flight is recorded in full before the budget stops it ##
+        self.base.check_budget()
+        return objs
@@ -0,0 +1,121 @@
+import numpy
+import pandas as pd
+
+
+class ParetoFront():
+    '''
+    Non-dominated evals across several objectives, updated one eval at a
+    time as evals stream in. An eval joins the front unless a member is at
+    least as good on every objective, and any members it beats on every
+    objective are dropped.
+
+    Objectives are RecordSchema performance columns (ie 'ats_be_nfelo_close'),
+    which are maximized, or names from obj_functions (ie 'nfelo_brier' in
+    NfeloOptimizerBase.available_obj_functions), which carry their model,
+    metric and direction. Pass (column, 'min') to minimize a column instead
+    (ie ('market_correl_nfelo_close', 'min') to prefer lines further from
+    the market).
+
+    Parameters:
+    * objectives (list): objectives to trade off
+    * obj_functions (dict): named objectives, in the available_obj_functions
+      format
+    '''
+
+    def __init__(self, objectives, obj_functions=None):
+        self.objectives = list(objectives)
+        self.obj_functions = obj_functions if obj_functions is not None else {}
+        self.columns = []
+        self.signs = []
+        for objective in self.objectives:
+            column, sign = self.parse_objective(objective)
+            self.columns.append(column)
+            self.signs.append(sign)
+        self.signs = numpy.array(self.signs, dtype='float64')
+        ## front members: signed objective values (larger is better) ##
+        ## and their full records ##
+        self.points = numpy.zeros((0, len(self.columns)))
+        self.records = []
+        self.n_seen = 0
+
+    def parse_objective(self, objective):
+        '''
+        Column and sign (1 maximizes, -1 minimizes) of an objective
+        '''
+        if isinstance(objective, (tuple, list)):
+            column, direction = objective
+            if direction not in ('max', 'min'):
+                raise Exception('PARETO ERROR: Unknown direction {0}'.format(direction))
+            return column, 1.0 if direction == 'max' else -1.0
+        if objective in self.obj_functions:
+            obj_config = self.obj_functions[objective]
+            return (
+                '{0}_{1}'.format(obj_config['metric'], obj_config['model']),
+                1.0 if obj_config['direction'] == 'pos' else -1.0
+            )
+        return objective, 1.0
+
+    def add(self, record):
+        '''
+        Adds an eval's record (a dict holding every objective column) to the
+        front if no member dominates it
+
+        Returns:
+        * added (bool): whether the eval joined the front
+        '''
+        self.n_seen += 1
+        point = numpy.array([
+            numpy.nan if record.get(column) is None else record[column]
+            for column in self.columns
+        ], dtype='float64') * self.signs
+        if numpy.isnan(point).any():
+            return False
+        if len(self.points) > 0:
+            ## a member at least as good everywhere (incl an equal point) ##
+            if numpy.all(self.points >= point, axis=1).any():
+                return False
+            ## members the eval is at least as good as everywhere are beaten ##
+            keep = ~numpy.all(point >= self.points, axis=1)
+            self.points = self.points[keep]
+            self.records = [r for r, k in zip(self.records, keep) if k]
+        self.points = numpy.vstack([self.points, point])
+        self.records.append(dict(record))
+        return True
+
+    def frame(self):
+        '''
+        The front as a DataFrame, best on the first objective first
+        '''
+        df = pd.DataFrame(self.records)
+        if len(df) == 0:
+            return df
+        order = numpy.argsort(-self.points[:, 0], kind='stable')
+        return df.iloc[order].reset_index(drop=True)
+
+    def save(self, path):
+        '''
+        Writes the front to a CSV
+        '''
+        self.frame().to_csv(path)
+
+    @classmethod
+    def from_metrics(cls, metrics, objectives, obj_functions=None):
+        '''
+        Builds a front from a metrics CSV (or frame) as written by the
+        optimizer's per-eval metrics log. Cheaper fidelity rows are skipped
+
+        Parameters:
+        * metrics (str or DataFrame): metrics CSV path, or its frame
+        * objectives (list): objectives to trade off
+        * obj_functions (dict): named objectives, as in the init
+
+        Returns:
+        * front (ParetoFront)
+        '''
+        df = pd.read_csv(metrics, index_col=0) if isinstance(metrics, str) else metrics
+        if 'fidelity' in df.columns:
+            df = df[df['fidelity'].fillna('full') == 'full']
+        front = cls(objectives, obj_functions=obj_functions)
+        for record in df.to_dict('records'):
+            front.add(record)
+        return front
@@ -1,5 +1,8 @@
 import numpy
 
+from .ParallelEvaluator import ParallelEvaluator
+from .SuccessiveHalving import SuccessiveHalving
+
 
 class RandomStarts():
     '''
@@ -11,6 +14,11 @@ class RandomStarts():
     Each hop calls base.optimize() (which auto-saves a row tagged with the
     hop_number set on the base before the call).
 
+    With screen_fidelities set, niter * eta ** len(screen_fidelities) random
+    points are first screened by successive halving at those (cheaper)
+    fidelities, and the best niter become the hop starts. Screening evals
+    only write runtime rows, tagged with their fidelity.
+
     RandomStarts does not save anything itself -- base owns the save.
     '''
 
@@ -19,11 +27,33 @@ class RandomStarts():
             base,
             ## hop loop params ##
             niter=30,
+            ## optional multi-fidelity screen of the starts ##
+            screen_fidelities=None, eta=3, n_workers=1,
         ):
         self.base = base
         self.niter = niter
+        self.screen_fidelities = screen_fidelities
+        self.eta = eta
+        self.n_workers = n_workers
         self.rng = numpy.random.default_rng()
 
+    def gen_starts(self):
+        '''
+        Uniform-random starting points, one entry per OPTIMIZED feature,
+        screened down to niter if screen_fidelities is set
+        '''
+        if not self.screen_fidelities:
+            return self.rng.uniform(0.0, 1.0, size=(self.niter, len(self.base.features)))
+        n = self.niter * self.eta ** len(self.screen_fidelities)
+        candidates = self.rng.uniform(0.0, 1.0, size=(n, len(self.base.features)))
+        halving = SuccessiveHalving(
+            self.base, fidelities=self.screen_fidelities, eta=self.eta,
+            n_workers=self.n_workers
+        )
+        halving.prepare()
+        with ParallelEvaluator(self.base, n_workers=self.n_workers) as evaluator:
+            return halving.screen(candidates, self.niter, evaluator)
+
     def optimize(self):
         '''
         Run the random-restart loop.
@@ -32,14 +62,29 @@ class RandomStarts():
         point in normalized [0,1] space for each OPTIMIZED feature (not the
         full available_features set), set it as base.best_guesses, tag the
         hop number on base, and call base.optimize() which auto-saves a row.
+
+        The starts and completed hops are kept in the base's checkpoint, so a
+        resumed run reruns only the unfinished hop (see
+        NfeloOptimizerBase.load_checkpoint).
         '''
-        for hop in range(1, self.niter + 1):
+        ## a resumed run keeps its starts and skips the hops it completed ##
+        resumed = self.base.resume_strategy(self.rng)
+        if 'starts' in resumed:
+            starts = numpy.array(resumed['starts'])
+        else:
+            starts = self.gen_starts()
+        self.base.checkpoint_state['starts'] = starts.tolist()
+        completed = resumed.get('completed_hops', 0)
+        for hop in range(completed + 1, self.niter + 1):
             ## fresh random start in normalized space, one entry per optimized feature ##
-            x_random = self.rng.uniform(0.0, 1.0, size=len(self.base.features))
+            x_random = starts[hop - 1]
             self.base.best_guesses = x_random.tolist()
             self.base.hop_number = hop
             self.base.opti_vals = []
             self.base.optimize()
+            self.base.checkpoint_state['completed_hops'] = hop
+            if self.base.checkpoint_path is not None:
+                self.base.save_checkpoint()
 
     def save_to_logs(self, file_name=None):
         '''
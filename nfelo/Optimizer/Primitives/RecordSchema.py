@@ -66,8 +66,34 @@ RUNTIME_LOG_COLUMNS = [
     'objective',
     'minimized_obj',
     'achieved_value',
+    ## 'full', or 'last_{n}_seasons' for a multi-fidelity screening eval ##
+    'fidelity',
 ]
 
+## leading columns of the per-eval metrics log, which then holds every ##
+## performance column and feature of each eval (see metrics_log_columns) ##
+METRICS_LOG_COLUMNS = [
+    'optimization_type',
+    'opti_date',
+    'hop_number',
+    'eval_number',
+    'run_id',
+    'fidelity',
+    'objective',
+    'achieved_value',
+]
+
+## per-section columns appended to the runtime log when section profiling is ##
+## on. Mirrors Nfelo.profile_sections, plus model run time outside of the ##
+## sections (unattributed) and grading ##
+RUNTIME_SECTIONS = [
+    'offseason_regression', 'game_context', 'translate_base',
+    'regress_to_market', 'translate_open', 'translate_close',
+    'calc_shift', 'state_update', 'elo_records',
+    'unattributed', 'grade',
+]
+RUNTIME_SECTION_COLUMNS = ['{0}_seconds'.format(s) for s in RUNTIME_SECTIONS]
+
 def model_metrics(schema_model:str) -> list:
     '''
     Metrics exported for a schema model. Market models omit ATS columns.
@@ -87,6 +113,12 @@ def performance_columns() -> list:
         for metric in model_metrics(model)
     ]
 
+def metrics_log_columns() -> list:
+    '''
+    Returns the full column order of the per-eval metrics log
+    '''
+    return METRICS_LOG_COLUMNS + performance_columns() + FEATURES
+
 def extract_performance(grader) -> dict:
     '''
     Pulls the canonical {metric}_{model} performance dict from a graded
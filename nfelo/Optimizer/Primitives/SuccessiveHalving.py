@@ -0,0 +1,129 @@
+import math
+import numpy
+import time
+
+from .ParallelEvaluator import ParallelEvaluator
+
+
+class SuccessiveHalving():
+    '''
+    Composes a NfeloOptimizerBase and screens candidate points with
+    successive halving over model fidelities. Every candidate is scored at
+    the cheapest fidelity (ie only the last 2 graded seasons, run from a
+    checkpointed rating state), the top 1/eta are promoted to the next
+    fidelity, and so on, until the survivors are scored on the full history.
+
+    Cheaper evals only get a runtime row, with their fidelity. Full fidelity
+    evals are recorded as usual (mid_opti_output), so the final rung's rows
+    are interchangeable with SLSQP rows. hop_number is set to the rung.
+
+    screen() runs the cheap rungs alone, which is how RandomStarts picks the
+    starting points worth a full SLSQP hop.
+
+    SuccessiveHalving does not save anything itself -- base owns the save.
+    '''
+
+    def __init__(self,
+            ## composed primitive ##
+            base,
+            ## halving params ##
+            n_candidates=27, fidelities=(2, 4), eta=3,
+            ## parallel params ##
+            n_workers=1,
+            seed=None,
+        ):
+        self.base = base
+        self.n_features = len(base.features)
+        self.n_candidates = n_candidates
+        self.fidelities = list(fidelities)
+        self.eta = eta
+        self.n_workers = n_workers
+        self.rng = numpy.random.default_rng(seed)
+        ## post optimization vars ##
+        self.rungs = []
+        self.best_x = None
+        self.best_obj = None
+
+    def gen_candidates(self, n):
+        '''
+        Latin hypercube over [0,1] for each feature, with the base's best
+        guesses as the first candidate
+        '''
+        strata = numpy.column_stack([
+            self.rng.permutation(n) for _ in range(self.n_features)
+        ])
+        candidates = (strata + self.rng.uniform(size=strata.shape)) / n
+        candidates[0] = numpy.clip(self.base.best_guesses, 0, 1)
+        return candidates
+
+    def screen(self, candidates, keep, evaluator):
+        '''
+        Scores the candidates through the cheap fidelities, keeping the top
+        1/eta at each rung (and at least keep)
+
+        Parameters:
+        * candidates (ndarray): [n, n_features] normalized points
+        * keep (int): number of candidates to return
+        * evaluator (ParallelEvaluator): evaluator to score on
+
+        Returns:
+        * survivors (ndarray): the best keep candidates of the last rung
+        '''
+        survivors = numpy.asarray(candidates, dtype='float64')
+        for rung, fidelity in enumerate(self.fidelities, start=1):
+            self.base.hop_number = rung
+            objs = numpy.array(evaluator.evaluate(survivors.tolist(), fidelity=fidelity))
+            self.rungs.append({
+                'fidelity' : self.base.fidelity_label(fidelity),
+                'n' : len(survivors),
+                'best' : float(objs.min()),
+            })
+            n_keep = max(int(math.ceil(len(survivors) / self.eta)), keep, 1)
+            if rung == len(self.fidelities):
+                n_keep = keep
+            survivors = survivors[numpy.argsort(objs, kind='stable')[:n_keep]]
+            print('     Rung {0} ({1}) - promoted {2} of {3}'.format(
+                rung, self.base.fidelity_label(fidelity), len(survivors), len(objs)
+            ))
+        return survivors
+
+    def prepare(self):
+        '''
+        Builds the fidelity checkpoints before any workers copy the base
+        '''
+        for fidelity in self.fidelities:
+            self.base.prepare_fidelity(fidelity)
+
+    def optimize(self):
+        '''
+        Run the halving, finishing with the survivors at full fidelity
+        '''
+        opti_time_start = float(time.time())
+        self.base.reset_run_state()
+        self.base.opti_vals = []
+        self.rungs = []
+        method = self.base.method
+        self.base.method = 'successive_halving'
+        ## a resume redraws the same candidates (see load_checkpoint) ##
+        self.base.resume_strategy(self.rng)
+        self.prepare()
+        n_full = max(int(self.n_candidates / self.eta ** len(self.fidelities)), 1)
+        with ParallelEvaluator(self.base, n_workers=self.n_workers) as evaluator:
+            survivors = self.screen(self.gen_candidates(self.n_candidates), n_full, evaluator)
+            self.base.hop_number = len(self.fidelities) + 1
+            objs = numpy.array(evaluator.evaluate(survivors.tolist()))
+        self.rungs.append({'fidelity' : 'full', 'n' : len(survivors), 'best' : float(objs.min())})
+        best = int(numpy.argmin(objs))
+        self.best_x = survivors[best].tolist()
+        self.best_obj = float(objs[best])
+        self.base.best_guesses = self.best_x
+        ## write a best from the first 15 evals that was never improved on ##
+        self.base.flush_best()
+        self.base.method = method
+        self.base.opti_seconds = float(time.time()) - opti_time_start
+
+    def save_to_logs(self, file_name=None):
+        '''
+        Pass-through to base. SuccessiveHalving owns no records of its own.
+        '''
+        return self.base.save_to_logs(file_name=file_name)
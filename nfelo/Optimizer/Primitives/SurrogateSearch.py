@@ -0,0 +1,207 @@
+import numpy
+import pandas as pd
+import time
+from scipy.stats import norm
+
+from .GaussianProcess import GaussianProcess
+from .ParallelEvaluator import ParallelEvaluator
+
+
+class SurrogateSearch():
+    '''
+    Composes a NfeloOptimizerBase and runs a surrogate-assisted (Bayesian)
+    search in normalized [0,1] space over the optimized features. Every model
+    run is expensive, so a GaussianProcess is fit to all evals seen so far and
+    only the points it expects to improve most are run.
+
+    The search starts from a latin hypercube of n_initial points that
+    includes the base's best guesses, plus any evals seeded from previous
+    results CSVs (see seed_from_logs). Each round then proposes a batch of
+    batch_size points by expected improvement, conditioning on each pick with
+    its predicted value (kriging believer) so a batch spreads out, and scores
+    the batch through a ParallelEvaluator across n_workers processes.
+
+    Every eval is recorded by the base (mid_opti_output and the runtime log)
+    with hop_number set to the round (the initial design is 1), so its rows
+    are interchangeable with SLSQP rows.
+
+    SurrogateSearch does not save anything itself -- base owns the save.
+    '''
+
+    def __init__(self,
+            ## composed primitive ##
+            base,
+            ## search params ##
+            max_evals=100, n_initial=None, batch_size=None,
+            n_candidates=2000, xi=0.01,
+            seed_logs=None,
+            ## parallel params ##
+            n_workers=1,
+            seed=None,
+        ):
+        self.base = base
+        self.n_features = len(base.features)
+        self.max_evals = max_evals
+        self.n_initial = n_initial if n_initial is not None else 2 * self.n_features + 1
+        self.batch_size = batch_size if batch_size is not None else max(int(n_workers), 1)
+        self.n_candidates = n_candidates
+        self.xi = xi
+        self.n_workers = n_workers
+        self.rng = numpy.random.default_rng(seed)
+        self.gp = GaussianProcess(seed=seed)
+        ## evals the surrogate is fit to ##
+        self.X = numpy.zeros((0, self.n_features))
+        self.y = numpy.zeros(0)
+        self.n_evals = 0
+        self.n_seeded = 0
+        if seed_logs:
+            self.seed_from_logs(seed_logs)
+        ## post optimization vars ##
+        self.best_x = None
+        self.best_obj = None
+
+    def seed_from_logs(self, paths):
+        '''
+        Adds the rows of previous results CSVs (as written by save_to_logs) to
+        the surrogate's data. Only rows for this objective with every
+        optimized feature are used. Seeded rows are not rerun and count
+        against no budget
+
+        Parameters:
+        * paths (list): results CSV paths
+        '''
+        for path in ([paths] if isinstance(paths, str) else paths):
+            df = pd.read_csv(path, index_col=0)
+            if 'objective' in df.columns:
+                df = df[df['objective'] == self.base.objective]
+            if not set(self.base.features).issubset(df.columns) or 'achieved_value' not in df.columns:
+                print('     Warning -- {0} has no usable rows to seed from'.format(path))
+                continue
+            df = df.dropna(subset=self.base.features + ['achieved_value'])
+            x = numpy.column_stack([
+                self.base.normalize_value(df[feature].to_numpy(dtype='float64'), feature)
+                for feature in self.base.features
+            ]) if len(df) > 0 else numpy.zeros((0, self.n_features))
+            y = numpy.array([
+                self.base.minimize_grade(v) for v in df['achieved_value'].to_numpy(dtype='float64')
+            ])
+            ## points outside the current bounds are clipped in ##
+            self.X = numpy.vstack([self.X, numpy.clip(x, 0, 1)])
+            self.y = numpy.concatenate([self.y, y])
+            self.n_seeded += len(df)
+        print('     Seeded surrogate with {0} previous evals'.format(self.n_seeded))
+
+    def init_design(self):
+        '''
+        Latin hypercube over [0,1] for each feature, with the base's best
+        guesses as the first point
+        '''
+        n = self.n_initial
+        strata = numpy.column_stack([
+            self.rng.permutation(n) for _ in range(self.n_features)
+        ])
+        design = (strata + self.rng.uniform(size=strata.shape)) / n
+        design[0] = numpy.clip(self.base.best_guesses, 0, 1)
+        return design
+
+    def gen_candidates(self):
+        '''
+        Uniform random points, plus local perturbations of the best evals so
+        the acquisition can refine around them
+        '''
+        n_local = self.n_candidates // 2
+        uniform = self.rng.uniform(size=(self.n_candidates - n_local, self.n_features))
+        top = self.X[numpy.argsort(self.y)[:5]]
+        centers = top[self.rng.integers(0, len(top), size=n_local)]
+        scales = self.rng.choice([0.01, 0.05, 0.15], size=(n_local, 1))
+        local = numpy.clip(centers + self.rng.normal(size=centers.shape) * scales, 0, 1)
+        return numpy.vstack([uniform, local])
+
+    def expected_improvement(self, candidates, best):
+        '''
+        Expected improvement below the best objective at each candidate
+        '''
+        mean, std = self.gp.predict(candidates)
+        improvement = best - mean - self.xi * abs(best)
+        z = improvement / std
+        return improvement * norm.cdf(z) + std * norm.pdf(z)
+
+    def propose(self, n):
+        '''
+        Proposes a batch of n points by expected improvement, conditioning the
+        surrogate on each pick at its predicted value (kriging believer)
+        '''
+        self.gp.fit(self.X, self.y)
+        best = self.y.min()
+        candidates = self.gen_candidates()
+        X = self.X
+        y = self.y
+        batch = []
+        for i in range(n):
+            ei = self.expected_improvement(candidates, best)
+            pick = int(numpy.argmax(ei))
+            x = candidates[pick]
+            batch.append(x)
+            ## drop the pick and its near duplicates (clipped perturbations ##
+            ## pile up on the bounds) ##
+            candidates = candidates[
+                numpy.abs(candidates - x).max(axis=1) > 1e-3
+            ]
+            if i < n - 1:
+                believed, _ = self.gp.predict(x[None, :])
+                X = numpy.vstack([X, x])
+                y = numpy.concatenate([y, believed])
+                self.gp.fit(X, y, optimize=False)
+        return numpy.array(batch)
+
+    def evaluate(self, evaluator, xs, hop):
+        '''
+        Scores a batch, trimmed to what is left of max_evals, and adds it to
+        the surrogate's data
+        '''
+        xs = xs[:max(self.max_evals - self.n_evals, 0)]
+        self.base.hop_number = hop
+        objs = numpy.array(evaluator.evaluate(xs.tolist()), dtype='float64')
+        self.X = numpy.vstack([self.X, xs])
+        self.y = numpy.concatenate([self.y, objs])
+        self.n_evals += len(xs)
+
+    def optimize(self):
+        '''
+        Run the search
+        '''
+        opti_time_start = float(time.time())
+        self.base.reset_run_state()
+        self.base.opti_vals = []
+        self.n_evals = 0
+        method = self.base.method
+        self.base.method = 'surrogate_ei'
+        ## a resume redraws the same design and candidates (see load_checkpoint) ##
+        self.base.resume_strategy(self.rng, self.gp.rng)
+        with ParallelEvaluator(self.base, n_workers=self.n_workers) as evaluator:
+            ## initial design ##
+            self.evaluate(evaluator, self.init_design(), 1)
+            hop = 2
+            while self.n_evals < self.max_evals:
+                batch = self.propose(min(self.batch_size, self.max_evals - self.n_evals))
+                self.evaluate(evaluator, batch, hop)
+                print('     Round {0} - best {1} after {2} evals'.format(
+                    hop, self.y.min(), self.n_evals
+                ))
+                hop += 1
+        ## best of the evals run here, not the seeded rows ##
+        run = self.y[self.n_seeded:]
+        best = int(numpy.argmin(run))
+        self.best_x = self.X[self.n_seeded + best].tolist()
+        self.best_obj = float(run[best])
+        self.base.best_guesses = self.best_x
+        ## write a best from the first 15 evals that was never improved on ##
+        self.base.flush_best()
+        self.base.method = method
+        self.base.opti_seconds = float(time.time()) - opti_time_start
+
+    def save_to_logs(self, file_name=None):
+        '''
+        Pass-through to base. SurrogateSearch owns no records of its own.
+        '''
+        return self.base.save_to_logs(file_name=file_name)
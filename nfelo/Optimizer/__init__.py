@@ -1 +1,3 @@
-from .NfeloOptimizer import NfeloOptimizer
\ No newline at end of file
+from .NfeloOptimizer import NfeloOptimizer
+from .NfeloCrossValidator import NfeloCrossValidator
+from .NfeloSweep import NfeloSweep
\ No newline at end of file
@@ -0,0 +1,294 @@
+import pandas as pd
+import numpy
+
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+class NfeloBootstrap:
+    '''
+    Bootstrap confidence intervals for the NfeloGrader metrics of every model
+
+    Each bootstrap resample is an index matrix of games, [n_boot, n_games],
+    drawn either over games or over whole weeks (every game of a drawn week
+    comes along, which keeps games played under the same conditions
+    together). A resample is reduced to how often it drew each game, so the
+    sums and non-null counts of every model's per game brier, se, su, ats and
+    ats_be come out of a single matrix product per chunk rather than a
+    pandas pass per model and resample.
+
+    Chunks of resamples run on a thread pool, each with its own random stream
+    spawned from the seed, so results are reproducible for a given seed and
+    chunk_size regardless of n_jobs. Every model is scored on the same
+    resamples, so model vs model differences are paired.
+
+    Parameters:
+    * graded_games (DataFrame): NfeloGrader.graded_games, or any frame with
+      game_id, season, week and the {model}_brier, _se, _su, _ats, _ats_be
+      columns
+    * models (list): model names to bootstrap. Defaults to every model with
+      graded columns in the frame
+    '''
+    ## per game columns and how each is reduced. sums are totals, means are ##
+    ## over non-null games, and play_pct is the non-null share of all games ##
+    metrics = {
+        'brier' : ('brier', 'sum'),
+        'brier_per_game' : ('brier', 'mean'),
+        'su' : ('su', 'mean'),
+        'ats' : ('ats', 'mean'),
+        'ats_be' : ('ats_be', 'mean'),
+        'ats_be_play_pct' : ('ats_be', 'play_pct'),
+        'se' : ('se', 'mean'),
+    }
+    graded_cols = ['brier', 'se', 'su', 'ats', 'ats_be']
+
+    def __init__(self, graded_games:pd.DataFrame, models:list=None):
+        if models is None:
+            models = [
+                col[:-len('_ats_be')] for col in graded_games.columns
+                if col.endswith('_ats_be')
+            ]
+        missing = [
+            '{0}_{1}'.format(model, col) for model in models for col in self.graded_cols
+            if '{0}_{1}'.format(model, col) not in graded_games.columns
+        ]
+        if len(missing) > 0:
+            raise Exception('BOOTSTRAP ERROR: Graded games are missing {0}'.format(
+                ', '.join(missing)
+            ))
+        self.models = list(models)
+        self.n_games = len(graded_games)
+        ## per game values as one [n_games, n_models * n_cols] matrix, with ##
+        ## nulls zeroed and tracked in a matching validity matrix ##
+        values = numpy.column_stack([
+            graded_games['{0}_{1}'.format(model, col)].to_numpy(dtype='float64')
+            for model in self.models for col in self.graded_cols
+        ]) if len(self.models) > 0 else numpy.zeros((self.n_games, 0))
+        self.valid = (~numpy.isnan(values)).astype('float64')
+        self.values = numpy.where(self.valid == 1, values, 0)
+        ## week of each game, for week resampling ##
+        week_key = graded_games['season'].to_numpy(dtype='int64') * 100 + graded_games['week'].to_numpy(dtype='int64')
+        _, self.game_week = numpy.unique(week_key, return_inverse=True)
+        self.game_week = self.game_week.ravel()
+        self.n_weeks = int(self.game_week.max()) + 1 if self.n_games > 0 else 0
+        ## point estimates on the full sample ##
+        self.estimates = self.reduce(
+            numpy.ones((1, self.n_games))
+        )
+        ## set by run() ##
+        self.distributions = None
+        self.n_boot = 0
+        self.unit = None
+
+    @classmethod
+    def from_grader(cls, grader, models:list=None):
+        '''
+        Bootstraps an NfeloGrader's models
+        '''
+        return cls(grader.graded_games, models=models if models is not None else list(grader.models.keys()))
+
+    @classmethod
+    def from_graders(cls, graders:dict, models:list=None):
+        '''
+        Bootstraps the models of several graders (ie the updated files of two
+        configs) over the games they share. Models are named {label}_{model}
+
+        Parameters:
+        * graders (dict): NfeloGrader by label
+        * models (list): grader models to include. Defaults to all
+
+        Returns:
+        * bootstrap (NfeloBootstrap)
+        '''
+        combined = None
+        names = []
+        for label, grader in graders.items():
+            grader_models = models if models is not None else list(grader.models.keys())
+            df = grader.graded_games[['game_id', 'season', 'week']].copy()
+            for model in grader_models:
+                for col in cls.graded_cols:
+                    df['{0}_{1}_{2}'.format(label, model, col)] = grader.graded_games[
+                        '{0}_{1}'.format(model, col)
+                    ].to_numpy()
+                names.append('{0}_{1}'.format(label, model))
+            combined = df if combined is None else pd.merge(
+                combined, df.drop(columns=['season', 'week']),
+                on=['game_id'], how='inner'
+            )
+        return cls(combined, models=names)
+
+    def resample_counts(self, n_boot:int, rng:numpy.random.Generator, unit:str='game') -> numpy.ndarray:
+        '''
+        Draws n_boot resamples and returns how many times each one drew each
+        game
+
+        Parameters:
+        * n_boot (int): number of resamples
+        * rng (Generator): random stream
+        * unit (str): 'game' to resample games, 'week' to resample whole weeks
+
+        Returns:
+        * counts (ndarray): [n_boot, n_games] draws of each game
+        '''
+        if unit == 'game':
+            idx = rng.integers(0, self.n_games, size=(n_boot, self.n_games))
+            offsets = numpy.arange(n_boot)[:, None] * self.n_games
+            return numpy.bincount(
+                (idx + offsets).ravel(), minlength=n_boot * self.n_games
+            ).reshape(n_boot, self.n_games).astype('float64')
+        elif unit == 'week':
+            idx = rng.integers(0, self.n_weeks, size=(n_boot, self.n_weeks))
+            offsets = numpy.arange(n_boot)[:, None] * self.n_weeks
+            week_counts = numpy.bincount(
+                (idx + offsets).ravel(), minlength=n_boot * self.n_weeks
+            ).reshape(n_boot, self.n_weeks).astype('float64')
+            return week_counts[:, self.game_week]
+        else:
+            raise Exception('BOOTSTRAP ERROR: unit must be game or week, not {0}'.format(unit))
+
+    def reduce(self, counts:numpy.ndarray) -> dict:
+        '''
+        Every model's metrics on each resample
+
+        Parameters:
+        * counts (ndarray): [n_boot, n_games] draws of each game
+
+        Returns:
+        * metrics (dict): [n_boot, n_models] array by metric
+        '''
+        n_models = len(self.models)
+        n_cols = len(self.graded_cols)
+        sums = (counts @ self.values).reshape(len(counts), n_models, n_cols)
+        valid = (counts @ self.valid).reshape(len(counts), n_models, n_cols)
+        games = counts.sum(axis=1)[:, None]
+        out = {}
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            for metric, (col, how) in self.metrics.items():
+                i = self.graded_cols.index(col)
+                if how == 'sum':
+                    out[metric] = sums[:, :, i]
+                elif how == 'mean':
+                    out[metric] = sums[:, :, i] / valid[:, :, i]
+                else:
+                    out[metric] = valid[:, :, i] / games
+        return out
+
+    def run_chunk(self, n_boot:int, stream:numpy.random.SeedSequence, unit:str) -> dict:
+        '''
+        Resamples and reduces one chunk from its own stream
+        '''
+        rng = numpy.random.default_rng(stream)
+        return self.reduce(self.resample_counts(n_boot, rng, unit))
+
+    def run(self, n_boot:int=10000, unit:str='game', seed:int=None, chunk_size:int=1000, n_jobs:int=None):
+        '''
+        Runs the bootstrap
+
+        Parameters:
+        * n_boot (int): number of resamples
+        * unit (str): 'game' or 'week'
+        * seed (int): seed for the resamples
+        * chunk_size (int): resamples per chunk, which bounds memory
+        * n_jobs (int): threads to run chunks on. Defaults to the cpu count
+
+        Returns:
+        * intervals (DataFrame): see intervals()
+        '''
+        chunks = [
+            min(chunk_size, n_boot - start) for start in range(0, n_boot, chunk_size)
+        ]
+        streams = numpy.random.SeedSequence(seed).spawn(len(chunks))
+        n_jobs = max(min(n_jobs or os.cpu_count() or 1, len(chunks)), 1)
+        if n_jobs == 1:
+            results = [self.run_chunk(size, stream, unit) for size, stream in zip(chunks, streams)]
+        else:
+            with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+                results = list(pool.map(
+                    self.run_chunk, chunks, streams, [unit] * len(chunks)
+                ))
+        self.distributions = {
+            metric : numpy.concatenate([result[metric] for result in results])
+            for metric in self.metrics.keys()
+        }
+        self.n_boot = n_boot
+        self.unit = unit
+        return self.intervals()
+
+    def check_run(self):
+        if self.distributions is None:
+            raise Exception('BOOTSTRAP ERROR: Run run() first')
+
+    def intervals(self, level:float=0.95) -> pd.DataFrame:
+        '''
+        Percentile intervals of every model's metrics
+
+        Parameters:
+        * level (float): interval coverage
+
+        Returns:
+        * intervals (DataFrame): model_name, metric, the full sample estimate,
+          bootstrap mean and std, and the lower and upper bounds
+        '''
+        self.check_run()
+        tail = (1 - level) / 2 * 100
+        rows = []
+        ## models without a metric (ie no ats bets) are all NaN ##
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for metric, dist in self.distributions.items():
+                lower, upper = numpy.nanpercentile(dist, [tail, 100 - tail], axis=0)
+                for i, model in enumerate(self.models):
+                    rows.append({
+                        'model_name' : model,
+                        'metric' : metric,
+                        'estimate' : self.estimates[metric][0, i],
+                        'boot_mean' : numpy.nanmean(dist[:, i]),
+                        'boot_std' : numpy.nanstd(dist[:, i]),
+                        'lower' : lower[i],
+                        'upper' : upper[i],
+                    })
+        return pd.DataFrame(rows)
+
+    def differences(self, reference:str=None, level:float=0.95) -> pd.DataFrame:
+        '''
+        Paired intervals of the difference between models on the same
+        resamples, model minus reference
+
+        Parameters:
+        * reference (str): model to compare every other model to. Defaults to
+          every pair of models
+        * level (float): interval coverage
+
+        Returns:
+        * differences (DataFrame): model_name, reference, metric, the full
+          sample difference, the lower and upper bounds, and prob_greater, the
+          share of resamples in which the model's metric is greater than the
+          reference's
+        '''
+        self.check_run()
+        if reference is not None and reference not in self.models:
+            raise Exception('BOOTSTRAP ERROR: {0} is not a bootstrapped model'.format(reference))
+        pairs = [
+            (a, b) for a in range(len(self.models)) for b in range(len(self.models))
+            if a != b and (
+                self.models[b] == reference if reference is not None else a < b
+            )
+        ]
+        tail = (1 - level) / 2 * 100
+        rows = []
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for metric, dist in self.distributions.items():
+                for a, b in pairs:
+                    dif = dist[:, a] - dist[:, b]
+                    lower, upper = numpy.nanpercentile(dif, [tail, 100 - tail])
+                    rows.append({
+                        'model_name' : self.models[a],
+                        'reference' : self.models[b],
+                        'metric' : metric,
+                        'estimate' : self.estimates[metric][0, a] - self.estimates[metric][0, b],
+                        'lower' : lower,
+                        'upper' : upper,
+                        'prob_greater' : numpy.mean(dif[~numpy.isnan(dif)] > 0),
+                    })
+        return pd.DataFrame(rows)
@@ -0,0 +1,113 @@
+import pandas as pd
+import numpy
+
+from .NfeloGrader import NfeloGrader
+from .NfeloGraderModel import NfeloGraderModel
+from ..Utilities import adj_brier, ats_adj_brier
+
+class NfeloFoldGrader:
+    '''
+    Grades any set of seasons of an updated model DF from per season totals
+    that are built once. Every score in a score record is a ratio of sums
+    (brier, squared error, su, ats, and the moments of the model and market
+    lines for the correlation), so the totals of a set of seasons give the
+    same record an NfeloGrader filtered to those seasons would, without
+    refiltering or regrading the games. Used to grade many train/test folds
+    of one model run
+
+    Parameters:
+    * df (DataFrame): an updated model DF (ie Nfelo.updated_file)
+    * models (dict): models to grade, in the NfeloGrader.models format.
+      Defaults to NfeloGrader.models
+    '''
+    def __init__(self, df:pd.DataFrame, models:dict=None):
+        if models is None:
+            models = NfeloGrader.models
+        self.seasons = sorted(df['season'].unique().tolist())
+        self.totals = {}
+        for k,v in models.items():
+            model = NfeloGraderModel(
+                df=df,
+                model_name=k,
+                model_line_col=v['model_line'],
+                market_line_col=v['market_line'],
+                model_probability_col=v['model_prob'],
+                home_ev_col=v['home_ev'],
+                away_ev_col=v['away_ev']
+            )
+            self.totals[k] = self.season_totals(model, df['season'])
+
+    def season_totals(self, model:NfeloGraderModel, season:pd.Series) -> pd.DataFrame:
+        '''
+        Sums and counts of a graded model's per game scores by season. Lines
+        are centered on their overall means before the moments are taken,
+        which leaves the correlation unchanged but keeps the sums small
+        '''
+        totals = pd.DataFrame({'n_games' : 1}, index=model.df.index)
+        for score in ['brier', 'se', 'su', 'ats', 'ats_be']:
+            col = model.df['{0}_{1}'.format(model.model_name, score)]
+            totals['{0}_sum'.format(score)] = col
+            totals['{0}_n'.format(score)] = col.notna().astype('int64')
+        ## pairwise complete lines, as Series.corr uses ##
+        both = model.model_line.notna() & model.market_line.notna()
+        x = model.model_line.where(both)
+        y = model.market_line.where(both)
+        x = x - x.mean()
+        y = y - y.mean()
+        totals['line_n'] = both.astype('int64')
+        totals['x'] = x
+        totals['y'] = y
+        totals['xx'] = x * x
+        totals['yy'] = y * y
+        totals['xy'] = x * y
+        ## NaNs are skipped in the sums ##
+        return totals.groupby(season.loc[totals.index]).sum()
+
+    def grade(self, seasons:list) -> list:
+        '''
+        Score records of every model over a set of seasons, in the format of
+        NfeloGrader.graded_records
+
+        Parameters:
+        * seasons (list): seasons to grade
+
+        Returns:
+        * graded_records (list): a score record per model
+        '''
+        records = []
+        for model_name, totals in self.totals.items():
+            t = totals[totals.index.isin(seasons)].sum()
+            records.append(self.score_record(model_name, t))
+        return records
+
+    def score_record(self, model_name:str, t:pd.Series) -> dict:
+        '''
+        Generates a score record from summed season totals, matching
+        NfeloGraderModel.gen_score_record
+        '''
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            n = t['line_n']
+            cov = n * t['xy'] - t['x'] * t['y']
+            var = (n * t['xx'] - t['x'] ** 2) * (n * t['yy'] - t['y'] ** 2)
+            correl = float(cov / numpy.sqrt(var)) if n > 1 and var > 0 else numpy.nan
+        brier = t['brier_sum']
+        ats_be = self._mean(t, 'ats_be')
+        play_pct = t['ats_be_n'] / t['n_games'] if t['n_games'] > 0 else numpy.nan
+        return {
+            'model_name' : model_name,
+            'n_games' : int(t['n_games']),
+            'brier' : brier,
+            'brier_per_game' : self._mean(t, 'brier'),
+            'su' : self._mean(t, 'su'),
+            'ats' : self._mean(t, 'ats'),
+            'ats_be' : ats_be,
+            'ats_be_play_pct' : play_pct,
+            'market_correl' : correl,
+            'brier_adj' : adj_brier(brier, correl),
+            'brier_ats_adj' : ats_adj_brier(brier, ats_be, play_pct),
+            'se' : self._mean(t, 'se')
+        }
+
+    def _mean(self, t:pd.Series, score:str) -> float:
+        n = t['{0}_n'.format(score)]
+        return t['{0}_sum'.format(score)] / n if n > 0 else numpy.nan
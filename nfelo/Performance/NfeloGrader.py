@@ -4,6 +4,7 @@ import numpy
 import pathlib
 
 from .NfeloGraderModel import NfeloGraderModel
+from .NfeloBootstrap import NfeloBootstrap
 
 class NfeloGrader:
     '''
@@ -76,14 +77,53 @@ class NfeloGrader:
         }
     }
 
-    def __init__(self, df:pd.DataFrame, season_filter=None):
+    ## ensemble projections (see NfeloEnsemble), graded when the df has them ##
+    ensemble_models = {
+        'nfelo_ensemble_unregressed' : {
+            'model_line' : 'ensemble_home_line_base',
+            'market_line' : 'home_line_close',
+            'model_prob' : 'ensemble_home_probability_base',
+            'home_ev' : None,
+            'away_ev' : None
+        },
+        'nfelo_ensemble_open' : {
+            'model_line' : 'ensemble_home_line_open',
+            'market_line' : 'home_line_open',
+            'model_prob' : 'ensemble_home_probability_open',
+            'home_ev' : 'ensemble_home_open_ev',
+            'away_ev' : 'ensemble_away_open_ev'
+        },
+        'nfelo_ensemble_close' : {
+            'model_line' : 'ensemble_home_line_close',
+            'market_line' : 'home_line_close',
+            'model_prob' : 'ensemble_home_probability_close',
+            'home_ev' : 'ensemble_home_close_ev',
+            'away_ev' : 'ensemble_away_close_ev'
+        }
+    }
+
+    def __init__(self, df:pd.DataFrame, season_filter=None, keep_games=True):
         ## season_filter, if a list of seasons, restricts grading to those seasons ##
         ## default None means grade every season in the df (existing behavior) ##
+        ## each NfeloGraderModel copies only the columns it needs, so the df ##
+        ## itself is not copied here ##
         if season_filter is not None:
-            df = df[df['season'].isin(season_filter)].copy()
-        self.df = df.copy()
+            df = df[df['season'].isin(season_filter)]
+        self.df = df
         self.season_filter = season_filter
-        self.graded_games = df[['game_id', 'season', 'week']].copy()
+        ## an ensemble's updated file (see NfeloEnsemble) grades the ensemble ##
+        ## models in place of the nfelo models, next to the markets and ##
+        ## benchmarks. Every other file grades the default models ##
+        if 'ensemble_home_line_base' in df.columns:
+            self.models = dict(
+                {k : v for k, v in self.models.items() if not k.startswith('nfelo_')},
+                **self.ensemble_models
+            )
+        ## keep_games=False only builds the score records, skipping the per ##
+        ## game merges (graded_games is None), for callers like the optimizer ##
+        ## that only read the records ##
+        self.keep_games = keep_games
+        self.graded_games = df[['game_id', 'season', 'week']].copy() if keep_games else None
         self.graded_records = []
         self.grade_models()
 
@@ -106,8 +146,16 @@ class NfeloGrader:
             ## append the record ##
             self.graded_records.append(model.score_record)
             ## add to graded games ##
-            self.graded_games = model.merge_with(self.graded_games)
+            if self.keep_games:
+                self.graded_games = model.merge_with(self.graded_games)
     
+    def check_games(self):
+        '''
+        Raises if the per game scores were not kept
+        '''
+        if self.graded_games is None:
+            raise Exception('GRADER ERROR: Graded with keep_games=False, so there are no graded games')
+
     def print_scores(self):
         '''
         Prints the graded df
@@ -119,10 +167,31 @@ class NfeloGrader:
         ).reset_index(drop=True)
         print(graded_summary)
     
+    def bootstrap(self, n_boot:int=10000, unit:str='game', seed:int=None, n_jobs:int=None):
+        '''
+        Bootstrap confidence intervals of every model's scores. See
+        NfeloBootstrap
+
+        Parameters:
+        * n_boot (int): number of resamples
+        * unit (str): 'game' to resample games, 'week' to resample whole weeks
+        * seed (int): seed for the resamples
+        * n_jobs (int): threads to run resample chunks on
+
+        Returns:
+        * bootstrap (NfeloBootstrap): a run bootstrap, with intervals() and
+          differences()
+        '''
+        self.check_games()
+        bootstrap = NfeloBootstrap.from_grader(self)
+        bootstrap.run(n_boot=n_boot, unit=unit, seed=seed, n_jobs=n_jobs)
+        return bootstrap
+
     def save_scores(self, loc=None):
         '''
         Saves the individual scores
         '''
+        self.check_games()
         if loc is None:
             loc = '{0}/Data/Intermediate Data/scored_individual_games.csv'.format(
                 pathlib.Path(__file__).parent.parent.resolve()
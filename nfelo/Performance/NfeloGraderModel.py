@@ -17,7 +17,15 @@ class NfeloGraderModel:
         model_name:str, model_line_col:str, market_line_col:str,
         model_probability_col:str, home_ev_col:str, away_ev_col:str
     ):
-        self.df = df.copy()
+        ## only copy the columns this model grades on rather than the full file ##
+        cols = ['game_id', 'home_margin']
+        for col in [
+            model_line_col, market_line_col, model_probability_col,
+            home_ev_col, away_ev_col
+        ]:
+            if col is not None and col not in cols:
+                cols.append(col)
+        self.df = df[cols].copy()
         self.model_name = model_name
         self.model_line = self.df[model_line_col]
         self.market_line = self.df[market_line_col]
@@ -1 +1,3 @@
-from .NfeloGrader import NfeloGrader
\ No newline at end of file
+from .NfeloGrader import NfeloGrader
+from .NfeloBootstrap import NfeloBootstrap
+from .NfeloFoldGrader import NfeloFoldGrader
\ No newline at end of file
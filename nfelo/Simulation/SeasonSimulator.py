@@ -0,0 +1,336 @@
+import pandas as pd
+import numpy
+
+from ..Model import Nfelo
+from ..Utilities import elo_to_prob_vector, calc_shift_vector, translator_pool
+
+class SeasonSimulator:
+    '''
+    Monte Carlo simulation of the remaining regular season from the current
+    Nfelo ratings. Every remaining game is drawn for all simulations at once
+    as a [n_sims, n_games] array, ratings update in simulation with the
+    vectorized calc_shift, and standings, division winners and seeds are
+    aggregated across the simulation axis.
+
+    Games are processed in rounds in which each team plays at most once (ie
+    weeks), so a round is a handful of array operations over every
+    simulation. Simulated margins are drawn from a logistic distribution
+    centered on the season's SpreadMapper spread with the mapper's slope as
+    the scale, so a game's simulated home win rate matches the model win
+    probability. Simulated games cannot tie (a margin that rounds to 0 goes
+    to the side of the unrounded draw).
+
+    Seeding uses the logos table's team_conf and team_division. Ties in the
+    standings are broken by point differential, then at random, rather than
+    by the full NFL tiebreakers.
+
+    Parameters:
+    * model (Nfelo): a model that has been run through the last completed week
+    * season (int): season to simulate. Defaults to the season of the next
+      unplayed game
+    * playoff_teams (int): playoff teams per conference
+    * update_ratings (bool): update ratings with each simulated result
+    '''
+
+    def __init__(self, model:Nfelo, season:int=None, playoff_teams:int=7, update_ratings:bool=True):
+        self.model = model
+        self.config = model.config
+        self.playoff_teams = playoff_teams
+        self.update_ratings = update_ratings
+        ## season and its games ##
+        unplayed = model.unplayed_games()
+        if season is None:
+            if len(unplayed) == 0:
+                raise Exception('SIMULATION ERROR: There are no unplayed games to simulate')
+            season = unplayed.iloc[0]['season']
+        self.season = int(season)
+        cf = model.data.current_file
+        season_games = cf[(cf['season'] == self.season) & (cf['is_playoffs'] == 0)]
+        self.played = season_games[~pd.isnull(season_games['home_margin'])]
+        self.remaining = season_games[pd.isnull(season_games['home_margin'])].sort_values(
+            by=['week'], kind='mergesort'
+        ).reset_index(drop=True)
+        if len(self.remaining) == 0:
+            raise Exception('SIMULATION ERROR: {0} has no remaining regular season games'.format(self.season))
+        ## teams, in name order, and their rating state ids ##
+        self.teams = sorted(pd.unique(
+            season_games[['home_team', 'away_team']].to_numpy().ravel()
+        ).tolist())
+        self.team_index = {team : i for i, team in enumerate(self.teams)}
+        self.home = self.remaining['home_team'].map(self.team_index).to_numpy()
+        self.away = self.remaining['away_team'].map(self.team_index).to_numpy()
+        self.rounds = self.gen_rounds()
+        self.init_ratings()
+        self.init_standings()
+        self.init_divisions()
+        ## results, set by simulate() ##
+        self.wins = None
+        self.margins = None
+        self.seed_counts = None
+        self.division_counts = None
+        self.n_sims = 0
+
+    def gen_rounds(self) -> list:
+        '''
+        Splits the remaining games, in order, into rounds in which each team
+        plays at most once
+
+        Returns:
+        * rounds (list): arrays of game positions
+        '''
+        rounds = []
+        current = []
+        seen = set()
+        for i, (home, away) in enumerate(zip(self.home, self.away)):
+            if home in seen or away in seen:
+                rounds.append(numpy.array(current))
+                current = []
+                seen = set()
+            current.append(i)
+            seen.update([home, away])
+        rounds.append(numpy.array(current))
+        return rounds
+
+    def init_ratings(self):
+        '''
+        Starting ratings from the model's team state, applying the offseason
+        reset first if the season has not started, and the fixed context of
+        each remaining game
+        '''
+        model = self.model
+        if self.season > model.state_season:
+            model.start_season(self.season)
+        state_ids = numpy.array([model.state.team_id(team) for team in self.teams], dtype='int64')
+        self.starting_ratings = model.state.ending_nfelo[state_ids].copy()
+        ## hfa and qb context, missing values treated as no adjustment ##
+        games = self.remaining
+        self.context = (
+            games['hfa_mod'].fillna(0).to_numpy(dtype='float64') +
+            self.config['qb_weight'] * (
+                games['home_538_qb_adj'].fillna(0).to_numpy(dtype='float64') -
+                games['away_538_qb_adj'].fillna(0).to_numpy(dtype='float64')
+            )
+        )
+        ## closing lines where posted. Future games without a line use the ##
+        ## model line as the market in the rating update ##
+        self.market_lines = games['home_line_close'].to_numpy(dtype='float64')
+        self.mapper = translator_pool.mapper(self.season)
+
+    def init_standings(self):
+        '''
+        Wins (ties as half wins), losses, ties and point differential from the
+        games already played this season
+        '''
+        n = len(self.teams)
+        self.current_wins = numpy.zeros(n)
+        self.current_losses = numpy.zeros(n)
+        self.current_ties = numpy.zeros(n)
+        self.current_point_dif = numpy.zeros(n)
+        if len(self.played) == 0:
+            return
+        home = self.played['home_team'].map(self.team_index).to_numpy()
+        away = self.played['away_team'].map(self.team_index).to_numpy()
+        margin = self.played['home_margin'].to_numpy(dtype='float64')
+        for teams, sign in [(home, 1), (away, -1)]:
+            self.current_wins += numpy.bincount(teams, weights=(sign * margin > 0).astype(float), minlength=n)
+            self.current_losses += numpy.bincount(teams, weights=(sign * margin < 0).astype(float), minlength=n)
+            self.current_ties += numpy.bincount(teams, weights=(margin == 0).astype(float), minlength=n)
+            self.current_point_dif += numpy.bincount(teams, weights=sign * margin, minlength=n)
+
+    def init_divisions(self):
+        '''
+        Conference and division of each team from the logos table. Teams without
+        one are simulated but not seeded
+        '''
+        logos = self.model.data.db.get('logos') if hasattr(self.model.data, 'db') else None
+        self.conferences = {}
+        self.team_conf = [None] * len(self.teams)
+        self.team_division = [None] * len(self.teams)
+        if logos is None or not {'team_conf', 'team_division'}.issubset(logos.columns):
+            print('     Warning -- no conference data, seeds will not be simulated')
+            return
+        meta = logos.groupby(['team_abbr']).head(1).set_index('team_abbr')
+        for i, team in enumerate(self.teams):
+            if team in meta.index and not pd.isnull(meta.loc[team, 'team_conf']):
+                conf = meta.loc[team, 'team_conf']
+                division = meta.loc[team, 'team_division']
+                self.team_conf[i] = conf
+                self.team_division[i] = division
+                self.conferences.setdefault(conf, {}).setdefault(division, []).append(i)
+        self.conferences = {
+            conf : {div : numpy.array(members) for div, members in divisions.items()}
+            for conf, divisions in self.conferences.items()
+        }
+
+    def simulate_chunk(self, n_sims:int, rng:numpy.random.Generator, keep_margins:bool=False):
+        '''
+        Simulates the remaining games n_sims times
+
+        Returns:
+        * wins (ndarray): [n_sims, n_teams] season wins
+        * point_dif (ndarray): [n_sims, n_teams] season point differential
+        * margins (ndarray): [n_sims, n_games] simulated home margins, or None
+        '''
+        ## every game's draw up front, clipped away from 0 and 1 for the logit. ##
+        ## Arrays are kept [games or teams, sims] so each round gathers rows ##
+        draws = numpy.clip(rng.random((len(self.remaining), n_sims)), 1e-12, 1 - 1e-12)
+        noise = self.mapper.params.slope * numpy.log(draws / (1 - draws))
+        del draws
+        ratings = numpy.repeat(self.starting_ratings[:, None], n_sims, axis=1)
+        wins = numpy.repeat((self.current_wins + self.current_ties / 2)[:, None], n_sims, axis=1)
+        point_dif = numpy.repeat(self.current_point_dif[:, None], n_sims, axis=1)
+        margins = numpy.zeros((len(self.remaining), n_sims), dtype='int16') if keep_margins else None
+        for games in self.rounds:
+            home = self.home[games]
+            away = self.away[games]
+            ## project ##
+            elo_dif = ratings[home] - ratings[away] + self.context[games][:, None]
+            win_prob = numpy.clip(
+                elo_to_prob_vector(elo_dif, z=self.config['z']), 0.001, 0.999
+            )
+            spread = self.mapper.win_prob_to_spread(win_prob)
+            ## draw home margins, with no ties ##
+            draw = spread.continuous + noise[games]
+            margin = numpy.rint(draw)
+            margin = numpy.where(margin == 0, numpy.where(draw < 0, -1, 1), margin)
+            if keep_margins:
+                margins[games] = margin
+            ## standings. Each team plays once per round, so fancy index ##
+            ## assignment does not drop repeated teams ##
+            wins[home] += margin > 0
+            wins[away] += margin < 0
+            point_dif[home] += margin
+            point_dif[away] -= margin
+            ## ratings, with the margin as the only observation. The away ##
+            ## shift is always the negative of the home shift ##
+            if self.update_ratings:
+                ## negate: nfelotranslation positive=home favored -> nfelo sportsbook ##
+                model_line = -spread.posted
+                market_lines = self.market_lines[games][:, None]
+                market_line = numpy.where(numpy.isnan(market_lines), model_line, market_lines)
+                shift = calc_shift_vector(
+                    margin, model_line, market_line,
+                    self.config['k'], self.config['b'],
+                    self.config['market_resist_factor'], True
+                )
+                ratings[home] += shift
+                ratings[away] -= shift
+        wins = wins.T
+        point_dif = point_dif.T
+        margins = margins.T if keep_margins else None
+        return wins, point_dif, margins
+
+    def seed_chunk(self, wins:numpy.ndarray, point_dif:numpy.ndarray, rng:numpy.random.Generator):
+        '''
+        Division winners and playoff seeds of each simulation
+
+        Returns:
+        * seeds (ndarray): [n_sims, n_teams] seed of each team, 0 if it missed
+        * division_winners (ndarray): [n_sims, n_teams] 1 if the team won its division
+        '''
+        ## wins, then point differential, then a random draw ##
+        key = wins + (
+            numpy.clip(point_dif, -4999, 4999) + 5000 +
+            rng.random(wins.shape)
+        ) / 10001 / 2
+        n_sims = len(wins)
+        rows = numpy.arange(n_sims)[:, None]
+        seeds = numpy.zeros(wins.shape, dtype='int8')
+        division_winners = numpy.zeros(wins.shape, dtype='int8')
+        for conf, divisions in self.conferences.items():
+            ## division winners, seeded by record ##
+            winners = numpy.column_stack([
+                members[numpy.argmax(key[:, members], axis=1)]
+                for members in divisions.values()
+            ])
+            division_winners[rows, winners] = 1
+            winner_order = numpy.argsort(-key[rows, winners], axis=1, kind='stable')
+            seeded = winners[rows, winner_order][:, :self.playoff_teams]
+            ## wild cards from the rest of the conference ##
+            members = numpy.concatenate(list(divisions.values()))
+            wild_key = key[:, members].copy()
+            wild_key[division_winners[:, members] == 1] = -numpy.inf
+            n_wild = max(min(self.playoff_teams - seeded.shape[1], len(members) - seeded.shape[1]), 0)
+            wild = members[numpy.argsort(-wild_key, axis=1, kind='stable')[:, :n_wild]]
+            seeded = numpy.concatenate([seeded, wild], axis=1)
+            seeds[rows, seeded] = numpy.arange(1, seeded.shape[1] + 1, dtype='int8')
+        return seeds, division_winners
+
+    def simulate(self, n_sims:int=10000, seed:int=None, chunk_size:int=25000, keep_margins:bool=False):
+        '''
+        Runs the simulations in chunks. Each chunk draws from its own stream
+        spawned from the seed, so results are reproducible for a given seed
+        and chunk_size
+
+        Parameters:
+        * n_sims (int): number of season simulations
+        * seed (int): seed for the random draws
+        * chunk_size (int): simulations per chunk, which bounds memory
+        * keep_margins (bool): keep the [n_sims, n_games] simulated home margins
+
+        Returns:
+        * summary (DataFrame): see summary()
+        '''
+        chunks = [
+            min(chunk_size, n_sims - start) for start in range(0, n_sims, chunk_size)
+        ]
+        streams = numpy.random.SeedSequence(seed).spawn(len(chunks))
+        wins = []
+        margins = []
+        n_seeds = self.playoff_teams + 1
+        self.seed_counts = numpy.zeros((len(self.teams), n_seeds), dtype='int64')
+        self.division_counts = numpy.zeros(len(self.teams), dtype='int64')
+        for size, stream in zip(chunks, streams):
+            rng = numpy.random.default_rng(stream)
+            chunk_wins, chunk_point_dif, chunk_margins = self.simulate_chunk(size, rng, keep_margins)
+            seeds, division_winners = self.seed_chunk(chunk_wins, chunk_point_dif, rng)
+            for seed_number in range(1, n_seeds):
+                self.seed_counts[:, seed_number] += (seeds == seed_number).sum(axis=0)
+            self.division_counts += division_winners.sum(axis=0)
+            wins.append(chunk_wins.astype('float32'))
+            if keep_margins:
+                margins.append(chunk_margins)
+        self.n_sims = n_sims
+        self.wins = numpy.concatenate(wins)
+        self.margins = numpy.concatenate(margins) if keep_margins else None
+        return self.summary()
+
+    def summary(self) -> pd.DataFrame:
+        '''
+        Per team win totals, division and playoff odds, and seed probabilities
+
+        Returns:
+        * summary (DataFrame): one row per team with its current record, the
+          mean and 10th/50th/90th percentile of simulated wins, division_prob,
+          playoff_prob, and seed_1 ... seed_N probabilities
+        '''
+        if self.wins is None:
+            raise Exception('SIMULATION ERROR: Run simulate() first')
+        summary = pd.DataFrame({
+            'team' : self.teams,
+            'team_conf' : self.team_conf,
+            'team_division' : self.team_division,
+            'wins' : self.current_wins,
+            'losses' : self.current_losses,
+            'ties' : self.current_ties,
+            'rating' : self.starting_ratings,
+            'mean_wins' : self.wins.mean(axis=0),
+            'wins_p10' : numpy.percentile(self.wins, 10, axis=0),
+            'wins_p50' : numpy.percentile(self.wins, 50, axis=0),
+            'wins_p90' : numpy.percentile(self.wins, 90, axis=0),
+            'division_prob' : self.division_counts / self.n_sims,
+            'playoff_prob' : self.seed_counts[:, 1:].sum(axis=1) / self.n_sims,
+        })
+        for seed_number in range(1, self.playoff_teams + 1):
+            summary['seed_{0}'.format(seed_number)] = self.seed_counts[:, seed_number] / self.n_sims
+        return summary.sort_values(
+            by=['team_conf', 'team_division', 'mean_wins'],
+            ascending=[True, True, False]
+        ).reset_index(drop=True)
+
+    def win_distribution(self, team:str) -> pd.Series:
+        '''
+        Share of simulations ending on each win total for a team
+        '''
+        wins = self.wins[:, self.team_index[team]]
+        return pd.Series(wins).value_counts(normalize=True).sort_index()
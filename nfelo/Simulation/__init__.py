@@ -0,0 +1 @@
+from .SeasonSimulator import SeasonSimulator
\ No newline at end of file
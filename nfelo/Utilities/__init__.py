@@ -1,13 +1,16 @@
 from .odds import american_to_prob, american_to_price, spread_to_prob_elo, american_to_hold_adj_prob
-from .spread_translation import elo_to_prob, prob_to_elo
+from .spread_translation import elo_to_prob, elo_to_prob_vector, prob_to_elo
 from .merge_check import merge_check
-from .offseason_regression import offseason_regression
-from .market_regression import regress_to_market
-from .elo_shift import calc_shift, calc_weighted_shift
+from .offseason_regression import offseason_regression, offseason_regression_vector
+from .market_regression import regress_to_market, regress_to_market_vector
+from .elo_shift import calc_shift, calc_shift_vector, calc_weighted_shift
 from .bet_size import kelly_bet_size, bet_size
 from .scoring_brier import brier_score, adj_brier, ats_adj_brier
 from .scoring_spread import grade_bet_vector
 from .scoring_su import grade_su_vector
 from .scoring_market_correl import market_correl
 from .scoring_se import grade_se_vector
-from .clv import calc_clv
\ No newline at end of file
+from .clv import calc_clv, calc_clv_series
+from .translator_pool import TranslatorPool, translator_pool
+from .memory import compact_frame, float64_upcasts, frame_memory, memory_report
+from .profiler import Profiler, SectionTimer, profiler
\ No newline at end of file
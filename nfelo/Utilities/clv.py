@@ -1,4 +1,7 @@
-from nfelotranslation import Translator
+import pandas as pd
+import numpy
+
+from .translator_pool import translator_pool
 
 def calc_clv(
     original_home_spread:float,
@@ -23,9 +26,21 @@ def calc_clv(
     '''
     ## negate spreads at the nfelo<->nfelotranslation boundary; nfelo uses ##
     ## sportsbook (negative=home favored), nfelotranslation uses positive=home ##
+    translator = translator_pool.get(-original_home_spread, 'spread', season)
+    return _clv_from_translator(translator, original_home_spread, current_home_spread)
+
+def _clv_from_translator(
+    translator,
+    original_home_spread:float,
+    current_home_spread:float,
+) -> tuple[float, float]:
+    '''
+    Shared body of calc_clv and calc_clv_series. The passed translator must
+    already be set to the (negated) opening spread for the game's season.
+    It is left set to the closing spread on return.
+    '''
     nt_open = -original_home_spread
     nt_close = -current_home_spread
-    translator = Translator(nt_open, 'spread', season=int(season), side='home')
     ## at open ##
     ## note this must be calculated to get an exact starting EV number to compare the
     ## current EV to ##
@@ -80,3 +95,64 @@ def calc_clv(
     ) / 1.1 ## div by risk to translate to a EV percentage ##
     ## return clvs ##
     return clv_home, clv_away
+
+def calc_clv_series(
+    original_home_spreads:pd.Series,
+    current_home_spreads:pd.Series,
+    seasons:pd.Series,
+) -> tuple[pd.Series, pd.Series]:
+    '''
+    Series version of calc_clv for a full schedule. Lines sit on half points
+    and repeat heavily, so CLV is calculated once per unique
+    (season, open, close) triple and broadcast back to every game. Within a
+    season one translator is reused via .update().
+
+    Parameters:
+    * original_home_spreads (series): home spreads at the start of the week
+      (nfelo sportsbook convention: negative = home favored)
+    * current_home_spreads (series): home spreads at the end of the week
+    * seasons (series): season of each game (index aligned)
+
+    Returns:
+    * clv_home (series): the CLV for the home team (index aligned, NaN when
+      any input is missing)
+    * clv_away (series): the CLV for the away team
+    '''
+    ## frame of inputs keyed on the original index ##
+    games = pd.DataFrame({
+        'season' : seasons.to_numpy(dtype=float),
+        'open' : original_home_spreads.to_numpy(dtype=float),
+        'close' : current_home_spreads.to_numpy(dtype=float),
+    }, index=original_home_spreads.index)
+    valid = games.notna().all(axis=1)
+    ## dedupe the triples and calc each once ##
+    pairs = games[valid].drop_duplicates().sort_values(
+        by=['season', 'open', 'close']
+    ).reset_index(drop=True)
+    clv_home = numpy.full(len(pairs), numpy.nan)
+    clv_away = numpy.full(len(pairs), numpy.nan)
+    for season, season_pairs in pairs.groupby('season'):
+        translator = None
+        for i, open_line, close_line in zip(
+            season_pairs.index, season_pairs['open'], season_pairs['close']
+        ):
+            if translator is None:
+                translator = translator_pool.get(-open_line, 'spread', season)
+            else:
+                translator.update(-open_line, 'spread')
+            clv_home[i], clv_away[i] = _clv_from_translator(
+                translator, open_line, close_line
+            )
+    pairs['clv_home'] = clv_home
+    pairs['clv_away'] = clv_away
+    ## broadcast back to every game (left merge preserves game order) ##
+    merged = pd.merge(
+        games,
+        pairs,
+        on=['season', 'open', 'close'],
+        how='left'
+    )
+    return (
+        pd.Series(merged['clv_home'].to_numpy(), index=games.index),
+        pd.Series(merged['clv_away'].to_numpy(), index=games.index)
+    )
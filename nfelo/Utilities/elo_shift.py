@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy
 import math
 
 def calc_shift(
@@ -127,4 +128,48 @@ def calc_weighted_shift(
     ## create weighted average from shift pairs ##
     weighted_avg = calc_weighted_avg(shift_pairs)
     ## return ##
-    return weighted_avg
\ No newline at end of file
+    return weighted_avg
+
+def calc_shift_vector(
+    margin_measure:numpy.ndarray, model_line:numpy.ndarray, market_line:numpy.ndarray,
+    k:(float or int), b:(float or int), market_resist_factor:(float or int),
+    is_home:bool
+) -> numpy.ndarray:
+    '''
+    Array version of calc_shift() for many games (or simulations) at once.
+    Arrays broadcast against each other, including k, b and
+    market_resist_factor (ie one value per config of an ensemble)
+
+    Parameters:
+    * see calc_shift(), with arrays in place of the per-game floats
+
+    Returns:
+    * elo_shift (ndarray): how much each team's elo should be shifted by
+    '''
+    margin_measure = numpy.asarray(margin_measure, dtype='float64')
+    model_line = numpy.asarray(model_line, dtype='float64')
+    market_line = numpy.asarray(market_line, dtype='float64')
+    k = numpy.asarray(k, dtype='float64')
+    market_resist_factor = numpy.asarray(market_resist_factor, dtype='float64')
+    ## flip lines for directionality, see calc_shift() ##
+    if is_home:
+        model_line = -model_line
+        market_line = -market_line
+    ## establish errors ##
+    model_error = numpy.abs(margin_measure - model_line)
+    market_error = numpy.abs(margin_measure - market_line)
+    ## adjusted k, more aggressive if the market was closer. No resist ##
+    ## factor means no adjustment ##
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        adj_k = numpy.where(
+            (model_error < 1) | (model_error <= market_error) | (market_resist_factor == 0),
+            k,
+            k * (1 + numpy.abs(model_error - market_error) / market_resist_factor)
+        )
+    ## shift is the log multiplier of the error times k ##
+    shift = numpy.log(numpy.maximum(model_error, 1) + 1) / numpy.log(b) * adj_k
+    ## direction ##
+    return numpy.where(
+        model_error == 0, 0,
+        numpy.where(model_line > margin_measure, -shift, shift)
+    )
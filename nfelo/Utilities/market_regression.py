@@ -1,3 +1,5 @@
+import numpy
+
 ## HELPERS ##
 def initial_mr_factor(
     model_line:float, market_line:float, spread_delta_base:(float or int)
@@ -164,3 +166,64 @@ def regress_to_market(
     regressed_dif = model_dif + regression_factor_used * (market_dif - model_dif)
     ## return ##
     return regressed_dif, regression_factor_used
+
+def regress_to_market_vector(
+    ## elo difs ##
+    model_dif:numpy.ndarray, market_dif:numpy.ndarray,
+    ## spreads ##
+    model_line:numpy.ndarray, market_line:numpy.ndarray,
+    ## config params ##
+    market_regression:(float),
+    min_regression:(float),
+    spread_delta_base:(float or int),
+    rmse_base:(float or int),
+    ll_inflator:(float or int),
+    hook_certainty:(float or int),
+    ## error context ##
+    model_se_home:numpy.ndarray, market_se_home:numpy.ndarray,
+    model_se_away:numpy.ndarray, market_se_away:numpy.ndarray
+):
+    '''
+    Array version of regress_to_market for many games at once. Games without
+    a market line get a NaN regressed dif and a regression factor of 1, as
+    they do in the scalar version
+
+    Parameters:
+    * see regress_to_market(), with arrays in place of the per-game floats
+
+    Returns:
+    * regressed_dif (ndarray): elo difs regressed to the market
+    * mr_factor_used (ndarray): the amount of regression used
+    '''
+    model_line = numpy.asarray(model_line, dtype='float64')
+    market_line = numpy.asarray(market_line, dtype='float64')
+    spread_dif = numpy.abs(model_line - market_line)
+    ## initial factor ##
+    mr_factor = (
+        4 / (
+            1 +
+            (spread_delta_base * spread_dif**2)
+        ) +
+        spread_dif / 14
+    )
+    ## rmse adj, only when the spread delta is meaningful ##
+    model_rmse = (numpy.asarray(model_se_home) ** (1/2) + numpy.asarray(model_se_away) ** (1/2)) / 2
+    market_rmse = (numpy.asarray(market_se_home) ** (1/2) + numpy.asarray(market_se_away) ** (1/2)) / 2
+    rmse_mod = numpy.where(spread_dif > 1, 1 + ((model_rmse - market_rmse) / rmse_base), 1)
+    ## long line adj ##
+    ll_mod = numpy.where((market_line < -7.5) & (model_line > market_line), 1 + ll_inflator, 1)
+    ## hook adj ##
+    hook_mod = numpy.where(
+        numpy.isnan(market_line) | (market_line == numpy.round(market_line)),
+        1, 1 + hook_certainty
+    )
+    ## combine ##
+    mr_factor = mr_factor * rmse_mod * ll_mod * hook_mod
+    ## fmin/fmax skip NaNs like the builtin min/max of the scalar version ##
+    regression_factor_used = numpy.fmax(
+        min_regression,
+        numpy.fmin(1, market_regression * mr_factor)
+    )
+    ## regress ##
+    regressed_dif = model_dif + regression_factor_used * (market_dif - model_dif)
+    return regressed_dif, regression_factor_used
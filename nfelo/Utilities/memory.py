@@ -0,0 +1,132 @@
+'''
+Compact schema and memory reporting for the wide game frames
+(current_file, updated_file).
+
+The compact schema stores repeated strings as categoricals, 0/1 flags as
+int8, and data-feed float columns (lines, prices, weather, wepa/pff
+margins, projections, hfa adjustments) as float32. Probabilities, implied
+elo difs, and model outputs are left as float64. Several float32 columns
+(lines, margins, projections, hfa) are model inputs, so a compact run's
+graded metrics differ from a full precision run's at about the 1e-6 level.
+'''
+import pandas as pd
+
+## team columns share one category set so flattened (home + away) frames ##
+## stay categorical on concat ##
+TEAM_COLUMNS = ['home_team', 'away_team']
+
+## other low cardinality strings ##
+CATEGORICAL_COLUMNS = [
+    'type', 'stadium', 'stadium_id', 'roof', 'surface', 'location',
+]
+
+## 0/1 flags ##
+FLAG_COLUMNS = [
+    'is_playoffs', 'is_neutral', 'div_game', 'home_bye', 'away_bye',
+    'dif_surface',
+]
+
+## data feed floats whose source precision fits in float32 ##
+FLOAT32_COLUMNS = [
+    ## scores ##
+    'home_score', 'away_score', 'home_margin', 'away_margin',
+    ## market ##
+    'home_line_open', 'home_line_close', 'home_spread_odds', 'away_spread_odds',
+    'home_moneyline', 'away_moneyline', 'ats_pct',
+    ## projections ##
+    'home_wt_rating', 'away_wt_rating', 'home_wt_rating_elo', 'away_wt_rating_elo',
+    'home_projected_dvoa', 'away_projected_dvoa',
+    ## wepa / epa / pff ##
+    'home_offensive_wepa', 'home_defensive_wepa', 'home_net_wepa',
+    'home_offensive_epa', 'home_defensive_epa', 'home_net_epa',
+    'away_offensive_wepa', 'away_defensive_wepa', 'away_net_wepa',
+    'away_offensive_epa', 'away_defensive_epa', 'away_net_epa',
+    'home_net_wepa_point_margin', 'away_net_wepa_point_margin',
+    'home_pff_point_margin', 'away_pff_point_margin',
+    ## hfa ##
+    'temperature', 'wind', 'home_time_advantage', 'hfa_base',
+    'home_bye_adj', 'away_bye_adj', 'home_time_advantage_adj',
+    'dif_surface_adj', 'div_game_adj', 'hfa_adj', 'hfa_base_mod',
+    'home_bye_mod', 'away_bye_mod', 'home_time_advantage_mod',
+    'dif_surface_mod', 'div_game_mod', 'hfa_mod',
+    ## 538 ##
+    'home_elo_pre', 'home_elo_post', 'away_elo_pre', 'away_elo_post',
+    'home_qbelo_pre', 'home_qbelo_post', 'away_qbelo_pre', 'away_qbelo_post',
+    'home_538_qb_adj', 'away_538_qb_adj',
+    '538_home_line_close', 'qbelo_home_line_close',
+    ## game numbers ##
+    'prev_week_home', 'next_week_home', 'prev_week_away', 'next_week_away',
+]
+
+def compact_frame(df:pd.DataFrame) -> pd.DataFrame:
+    '''
+    Returns a copy of a game frame in the compact schema. Columns that are
+    not present are skipped, and flags containing NaNs are left as is
+
+    Parameters:
+    * df (DataFrame): a current_file or updated_file style frame
+
+    Returns:
+    * compact (DataFrame): the same frame with compact dtypes
+    '''
+    dtypes = {}
+    ## teams ##
+    team_cols = [col for col in TEAM_COLUMNS if col in df.columns]
+    if len(team_cols) > 0:
+        teams = pd.CategoricalDtype(sorted(
+            pd.Series(df[team_cols].to_numpy().ravel()).dropna().unique().tolist()
+        ))
+        for col in team_cols:
+            dtypes[col] = teams
+    ## other strings ##
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            dtypes[col] = 'category'
+    ## flags ##
+    for col in FLAG_COLUMNS:
+        if col in df.columns and not df[col].isnull().any():
+            dtypes[col] = 'int8'
+    ## floats ##
+    for col in FLOAT32_COLUMNS:
+        if col in df.columns and df[col].dtype == 'float64':
+            dtypes[col] = 'float32'
+    return df.astype(dtypes)
+
+def float64_upcasts(df:pd.DataFrame) -> dict:
+    '''
+    Map of every float32 column in the frame to float64. Used to run model math
+    in full precision on a compact frame, ie df.astype(float64_upcasts(df))
+    '''
+    return {
+        col : 'float64' for col in df.columns
+        if df[col].dtype == 'float32'
+    }
+
+def frame_memory(df:pd.DataFrame, stage:str) -> dict:
+    '''
+    Creates a memory record for a frame at a given pipeline stage
+
+    Parameters:
+    * df (DataFrame): the frame to measure
+    * stage (str): name of the pipeline stage
+
+    Returns:
+    * record (dict): stage, rows, columns, and deep memory usage in MB
+    '''
+    return {
+        'stage' : stage,
+        'rows' : len(df),
+        'columns' : len(df.columns),
+        'memory_mb' : df.memory_usage(deep=True).sum() / 1024 ** 2,
+    }
+
+def memory_report(records:list) -> pd.DataFrame:
+    '''
+    Formats a list of frame_memory records into a table with the change in
+    memory from the previous stage
+    '''
+    report = pd.DataFrame(
+        records, columns=['stage', 'rows', 'columns', 'memory_mb']
+    )
+    report['memory_mb_delta'] = report['memory_mb'].diff()
+    return report
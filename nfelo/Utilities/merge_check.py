@@ -1,6 +1,8 @@
 import pandas as pd
 from typing import Callable
 
+from .profiler import profiler
+
 def merge_check(
     merge_func:Callable[[pd.DataFrame], pd.DataFrame],
     df:pd.DataFrame, 
@@ -20,7 +22,9 @@ def merge_check(
     '''
     print('     Merging {0}'.format(process_name))
     pre = len(df)
-    df = merge_func(df)
+    with profiler.span('merge {0}'.format(process_name)) as span:
+        df = merge_func(df)
+        span['rows'] = len(df)
     post = len(df)
     if post-pre > 0:
         print('          Warning: added {0} new records'.format(post-pre))
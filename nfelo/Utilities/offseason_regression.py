@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy
 
 def offseason_regression(
     league_elo:float,
@@ -55,4 +56,60 @@ def offseason_regression(
         wt_weight * wt_elo
     )
     ## return ##
-    return new_elo
\ No newline at end of file
+    return new_elo
+
+def offseason_regression_vector(
+    league_elo:float,
+    previous_elo:numpy.ndarray,
+    proj_dvoa:numpy.ndarray,
+    proj_wt_rating:numpy.ndarray,
+    reversion:float,
+    dvoa_weight:float,
+    wt_weight:float
+) -> dict:
+    '''
+    Array version of offseason_regression that regresses every team at a
+    season boundary at once, with the same NaN fallbacks
+
+    Parameters:
+    * league_elo (float): the previous year's league median elo
+    * previous_elo (ndarray): each team's ending elo from last year
+    * proj_dvoa (ndarray): each team's projected dvoa
+    * proj_wt_rating (ndarray): each team's projected wt rating
+    * reversion (float): season over season mean reversion
+    * dvoa_weight (float): the weighting of projected dvoa
+    * wt_weight (float) : the weighting of wt ratings
+
+    Returns:
+    * regression (dict): arrays of the mean_reverted_elo, dvoa_elo and
+      wt_elo (before NaN fallbacks) and the new_elo
+    '''
+    previous_elo = numpy.asarray(previous_elo, dtype='float64')
+    ## normalize the previous year elo ##
+    previous_elo_norm = 1505 + (previous_elo - league_elo)
+    ## calculate elos ##
+    mean_reverted_elo = (
+        reversion * 1505 +
+        (1 - reversion) * previous_elo_norm
+    )
+    dvoa_elo = 1505 + 484 * numpy.asarray(proj_dvoa, dtype='float64')
+    wt_elo = 1505 + 24.8 * numpy.asarray(proj_wt_rating, dtype='float64')
+    ## normalize the weights if over 1 ##
+    total_config_weight = dvoa_weight + wt_weight
+    if total_config_weight > 1:
+        dvoa_weight = dvoa_weight / total_config_weight
+        wt_weight = wt_weight / total_config_weight
+    ## calc implied reversion weight ##
+    reverted_weight = 1 - (dvoa_weight + wt_weight)
+    ## calc the weighted avg, with missing values falling back to the reverted elo ##
+    new_elo = (
+        reverted_weight * mean_reverted_elo +
+        dvoa_weight * numpy.where(numpy.isnan(dvoa_elo), mean_reverted_elo, dvoa_elo) +
+        wt_weight * numpy.where(numpy.isnan(wt_elo), mean_reverted_elo, wt_elo)
+    )
+    return {
+        'mean_reverted_elo' : mean_reverted_elo,
+        'dvoa_elo' : dvoa_elo,
+        'wt_elo' : wt_elo,
+        'new_elo' : new_elo,
+    }
@@ -0,0 +1,307 @@
+'''
+Lightweight span profiler for the update pipeline.
+
+Spans are opened with the span() context manager or the profile() decorator
+and nest per thread. Each span records wall time, CPU time, the process peak
+RSS at close (and how much the peak grew during the span), and an optional
+row count. Opening a span costs a few microseconds, so the shared profiler
+is left enabled and the spans are kept at the stage level.
+
+The trace can be saved as Chrome trace event JSON (viewable in
+chrome://tracing or Perfetto) and summarized as a table.
+
+SectionTimer covers the per-game hot path, where a span per section would
+cost more than the sections themselves. It keeps a single running mark and
+charges the time since the last lap to a named section.
+'''
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    ## not available on windows ##
+    resource = None
+
+def peak_rss_mb():
+    '''
+    Peak resident set size of the process in MB, or None where the
+    platform does not expose it
+    '''
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    ## linux reports KB, mac reports bytes ##
+    if sys.platform == 'darwin':
+        return peak / 1024 ** 2
+    return peak / 1024
+
+class Profiler:
+    '''
+    Records nested timing spans
+
+    Parameters:
+    * enabled (bool): when False, spans are no-ops
+    '''
+    def __init__(self, enabled:bool=True):
+        self.enabled = enabled
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        '''
+        Drops all recorded spans and restarts the trace clock
+        '''
+        with self._lock:
+            self.spans = []
+            self.origin = time.perf_counter()
+
+    def _stack(self) -> list:
+        '''
+        The open spans of the calling thread
+        '''
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextlib.contextmanager
+    def span(self, name:str, rows:int=None):
+        '''
+        Context manager that records a span. The yielded record is a dict,
+        so rows can be set once known, ie span['rows'] = len(df)
+
+        Parameters:
+        * name (str): name of the span
+        * rows (int): optional row count processed in the span
+        '''
+        if not self.enabled:
+            yield {}
+            return
+        stack = self._stack()
+        record = {
+            'name' : name,
+            'path' : '/'.join([s['name'] for s in stack] + [name]),
+            'depth' : len(stack),
+            'thread' : threading.get_ident(),
+            'rows' : rows,
+        }
+        stack.append(record)
+        peak_start = peak_rss_mb()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            wall_end = time.perf_counter()
+            cpu_end = time.process_time()
+            peak_end = peak_rss_mb()
+            stack.pop()
+            record['start_seconds'] = wall_start - self.origin
+            record['wall_seconds'] = wall_end - wall_start
+            record['cpu_seconds'] = cpu_end - cpu_start
+            record['peak_rss_mb'] = peak_end
+            record['peak_rss_growth_mb'] = (
+                peak_end - peak_start if peak_end is not None else None
+            )
+            with self._lock:
+                self.spans.append(record)
+
+    def profile(self, name:str=None):
+        '''
+        Decorator that records a span for every call of the function. If the
+        function returns a DataFrame, its length is recorded as the rows
+
+        Parameters:
+        * name (str): name of the span. Defaults to the function's qualname
+        '''
+        def decorator(func):
+            span_name = name if name is not None else func.__qualname__
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name) as record:
+                    result = func(*args, **kwargs)
+                    if isinstance(result, pd.DataFrame):
+                        record['rows'] = len(result)
+                    return result
+            return wrapper
+        return decorator
+
+    def summary(self) -> pd.DataFrame:
+        '''
+        Summarizes the recorded spans by path, in the order they were opened
+
+        Returns:
+        * summary (DataFrame): calls, total wall and cpu seconds, the max peak
+          rss and peak rss growth, and total rows for each span path
+        '''
+        columns = [
+            'path', 'depth', 'calls', 'wall_seconds', 'cpu_seconds',
+            'peak_rss_mb', 'peak_rss_growth_mb', 'rows'
+        ]
+        with self._lock:
+            spans = list(self.spans)
+        if len(spans) == 0:
+            return pd.DataFrame(columns=columns)
+        df = pd.DataFrame(spans).sort_values(by=['start_seconds'])
+        return df.groupby(['path'], sort=False).agg(
+            depth = ('depth', 'first'),
+            calls = ('name', 'count'),
+            wall_seconds = ('wall_seconds', 'sum'),
+            cpu_seconds = ('cpu_seconds', 'sum'),
+            peak_rss_mb = ('peak_rss_mb', 'max'),
+            peak_rss_growth_mb = ('peak_rss_growth_mb', 'sum'),
+            rows = ('rows', lambda r: r.sum(min_count=1)),
+        ).reset_index()[columns]
+
+    def trace(self) -> dict:
+        '''
+        The recorded spans as Chrome trace events
+        '''
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            'traceEvents' : [
+                {
+                    'name' : s['name'],
+                    'ph' : 'X',
+                    'ts' : s['start_seconds'] * 1e6,
+                    'dur' : s['wall_seconds'] * 1e6,
+                    'pid' : pid,
+                    'tid' : s['thread'],
+                    'args' : {
+                        'path' : s['path'],
+                        'cpu_seconds' : s['cpu_seconds'],
+                        'peak_rss_mb' : s['peak_rss_mb'],
+                        'peak_rss_growth_mb' : s['peak_rss_growth_mb'],
+                        'rows' : s['rows'],
+                    }
+                } for s in spans
+            ],
+            'displayTimeUnit' : 'ms',
+        }
+
+    def save_trace(self, loc:str):
+        '''
+        Writes the trace to a JSON file
+
+        Parameters:
+        * loc (str): path of the file to write
+        '''
+        with open(loc, 'w') as fp:
+            json.dump(self.trace(), fp, indent=2, default=str)
+
+
+class SectionTimer:
+    '''
+    Accumulates per-section timings for a repeated unit of work (ie a game)
+    with laps off of a single perf_counter mark. Only every sample_every-th
+    unit is timed
+
+    Parameters:
+    * sample_every (int): time every Nth unit. 1 times every unit
+    '''
+    def __init__(self, sample_every:int=1):
+        self.sample_every = max(int(sample_every), 1)
+        self.reset()
+
+    def reset(self):
+        '''
+        Zeros all sections and the unit counter
+        '''
+        self.units = 0
+        self.sampled = 0
+        self.active = False
+        self.seconds = {}
+        self.calls = {}
+        self.wall_seconds = 0.0
+        self._mark = 0.0
+
+    def start(self) -> bool:
+        '''
+        Begins a unit of work. Returns True if the unit is sampled, in which
+        case the caller should lap each section
+        '''
+        self.units += 1
+        self.active = (self.units - 1) % self.sample_every == 0
+        if self.active:
+            self.sampled += 1
+            self._mark = time.perf_counter()
+        return self.active
+
+    def mark(self):
+        '''
+        Resets the running mark without charging a section
+        '''
+        self._mark = time.perf_counter()
+
+    def lap(self, section:str):
+        '''
+        Charges the time since the last mark to a section
+        '''
+        now = time.perf_counter()
+        self.seconds[section] = self.seconds.get(section, 0.0) + now - self._mark
+        self.calls[section] = self.calls.get(section, 0) + 1
+        self._mark = now
+
+    def add_wall(self, seconds:float):
+        '''
+        Adds the wall time of the enclosing run, used to show the share of time
+        that falls outside the timed sections
+        '''
+        self.wall_seconds += seconds
+
+    def estimated_seconds(self) -> dict:
+        '''
+        Section seconds scaled up from the sampled units to all units
+        '''
+        scale = self.units / self.sampled if self.sampled > 0 else 0
+        return {k : v * scale for k, v in self.seconds.items()}
+
+    def report(self) -> pd.DataFrame:
+        '''
+        Per-section table of calls, sampled seconds, mean microseconds per
+        call, seconds estimated over all units, and share of the run wall time
+
+        Returns:
+        * report (DataFrame): one row per section plus an 'unattributed' row
+          for run time outside of the sections (ie pandas apply overhead)
+        '''
+        estimated = self.estimated_seconds()
+        rows = [
+            {
+                'section' : section,
+                'calls' : self.calls[section],
+                'sampled_seconds' : seconds,
+                'mean_us' : seconds / self.calls[section] * 1e6,
+                'estimated_seconds' : estimated[section],
+            } for section, seconds in self.seconds.items()
+        ]
+        if self.wall_seconds > 0:
+            rows.append({
+                'section' : 'unattributed',
+                'calls' : None,
+                'sampled_seconds' : None,
+                'mean_us' : None,
+                'estimated_seconds' : max(self.wall_seconds - sum(estimated.values()), 0),
+            })
+        report = pd.DataFrame(rows, columns=[
+            'section', 'calls', 'sampled_seconds', 'mean_us', 'estimated_seconds'
+        ])
+        report['share'] = (
+            report['estimated_seconds'] / self.wall_seconds if self.wall_seconds > 0
+            else report['estimated_seconds'] / report['estimated_seconds'].sum()
+        )
+        return report
+
+
+## shared process-wide profiler ##
+profiler = Profiler()
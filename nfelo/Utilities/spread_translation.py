@@ -47,4 +47,28 @@ def prob_to_elo(win_prob:(float), z:(int or float)=400):
             (1/win_prob) -
             1
         )
+    )
+
+def elo_to_prob_vector(elo_dif:numpy.ndarray, z:(int or float)=400):
+    '''
+    Array version of elo_to_prob()
+
+    Parameters:
+    * elo_dif (ndarray): elo differences between two teams
+    * z (int, float or ndarray): config param that determines confidence. An
+      array broadcasts against the elo difs (ie one z per config)
+
+    Returns:
+    * win_prob (ndarray): the win probabilities implied by the elo difs
+    '''
+    ## handle potential div 0 ##
+    if numpy.any(numpy.asarray(z) <= 0):
+        raise Exception('NFELO CONFIG ERROR: Z must be greater than 0')
+    ## return ##
+    return 1 / (
+        numpy.power(
+            10.0,
+            (-numpy.asarray(elo_dif, dtype='float64') / z)
+        ) +
+        1
     )
\ No newline at end of file
@@ -0,0 +1,180 @@
+'''
+Process-wide pool of loaded nfelotranslation Translators keyed by season.
+
+Constructing a Translator reads the season's SpreadMapper and KeyModel
+configs from disk. The pool builds one template per season, keeps it in a
+bounded LRU, and hands callers a shallow copy updated to their input. The
+copy shares the loaded (read-only) models with the template but owns its
+own per-input state, so copies can be used concurrently from multiple
+threads without locking.
+'''
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+import numpy
+from nfelotranslation import Translator, SpreadMapper
+
+class TranslatorPool:
+    '''
+    Thread-safe, LRU-bounded cache of per-season Translators.
+
+    Counters (builds, build_seconds, hits, evictions) are exposed via
+    counters() so Translator construction cost can be tracked across a run.
+    '''
+    ## clamp to the earliest season of the nfelotranslation package ##
+    earliest_season = 2007
+
+    def __init__(self, max_seasons:int=32):
+        self.max_seasons = max_seasons
+        self._templates = OrderedDict()
+        self._mappers = {}
+        self._lock = threading.Lock()
+        self.reset_counters()
+
+    def reset_counters(self):
+        '''
+        Zeros the build / hit / eviction counters. Loaded seasons are kept.
+        '''
+        self.builds = 0
+        self.build_seconds = 0.0
+        self.hits = 0
+        self.evictions = 0
+
+    def counters(self) -> dict:
+        '''
+        Snapshot of the pool counters
+
+        Returns:
+        * counters (dict): builds, build_seconds, hits, evictions, and the
+          seasons currently loaded
+        '''
+        with self._lock:
+            return {
+                'builds' : self.builds,
+                'build_seconds' : self.build_seconds,
+                'hits' : self.hits,
+                'evictions' : self.evictions,
+                'seasons_loaded' : list(self._templates.keys()),
+            }
+
+    def clamp_season(self, season) -> int:
+        '''
+        Converts a (possibly float) season to the int season the pool keys on
+        '''
+        return max(int(season), self.earliest_season)
+
+    def _template(self, season_int:int) -> Translator:
+        '''
+        Returns the loaded template for a season, building it if needed.
+        Must be called with the lock held.
+        '''
+        template = self._templates.get(season_int)
+        if template is not None:
+            self._templates.move_to_end(season_int)
+            self.hits += 1
+            return template
+        ## build and time the load ##
+        build_start = time.perf_counter()
+        template = Translator(0.5, 'win_prob', season=season_int, side='home')
+        self.build_seconds += time.perf_counter() - build_start
+        self.builds += 1
+        self._templates[season_int] = template
+        ## evict least recently used seasons past the bound ##
+        while len(self._templates) > self.max_seasons:
+            self._templates.popitem(last=False)
+            self.evictions += 1
+        return template
+
+    def get(self, value:float, input_type:str, season) -> Translator:
+        '''
+        Returns a Translator for the season, already updated to the passed input.
+        The returned object belongs to the caller and can be reused via .update()
+
+        Parameters:
+        * value (float): numeric input to translate
+        * input_type (str): one of 'win_prob', 'spread'
+        * season (int): NFL season (pre-2007 seasons clamp to 2007)
+
+        Returns:
+        * translator (Translator): caller-owned translator for the season
+        '''
+        season_int = self.clamp_season(season)
+        with self._lock:
+            template = self._template(season_int)
+        ## shallow copy shares the loaded models; update() only rebinds ##
+        ## per-input state on the copy, leaving the template untouched ##
+        translator = copy.copy(template)
+        translator.update(value, input_type)
+        return translator
+
+    def mapper(self, season) -> SpreadMapper:
+        '''
+        Returns the season's SpreadMapper, which maps arrays of win probabilities
+        to spreads in one call. Mappers are small and are kept for every season
+        requested
+
+        Parameters:
+        * season (int): NFL season (pre-2007 seasons clamp to 2007)
+
+        Returns:
+        * mapper (SpreadMapper): shared, read-only mapper for the season
+        '''
+        season_int = self.clamp_season(season)
+        with self._lock:
+            mapper = self._mappers.get(season_int)
+            if mapper is None:
+                mapper = SpreadMapper.from_file(season=season_int)
+                self._mappers[season_int] = mapper
+        return mapper
+
+    def posted_spreads(self, win_probs, seasons) -> numpy.ndarray:
+        '''
+        Posted (half point) home spreads for arrays of home win probabilities,
+        in the nfelotranslation convention (positive = home favored). Matches
+        Translator(win_prob, 'win_prob', season).spread.posted game by game.
+        NaN win probabilities return NaN
+
+        Parameters:
+        * win_probs (array): home win probabilities
+        * seasons (array): season of each game
+
+        Returns:
+        * spreads (ndarray): posted home spreads
+        '''
+        win_probs = numpy.asarray(win_probs, dtype='float64')
+        seasons = numpy.asarray(seasons)
+        out = numpy.full(len(win_probs), numpy.nan)
+        valid = ~numpy.isnan(win_probs)
+        for season in numpy.unique(seasons[valid]):
+            mask = valid & (seasons == season)
+            out[mask] = self.mapper(season).win_prob_to_spread(win_probs[mask]).posted
+        return out
+
+    def prewarm(self, seasons):
+        '''
+        Loads a template for every season passed so the first game of each
+        season does not pay the construction cost
+
+        Parameters:
+        * seasons (iterable): seasons to load. NaNs are skipped
+        '''
+        unique = sorted(set(
+            self.clamp_season(s) for s in seasons if s == s
+        ))
+        with self._lock:
+            for season_int in unique:
+                self._template(season_int)
+
+    def clear(self):
+        '''
+        Drops every loaded season. Counters are kept.
+        '''
+        with self._lock:
+            self._templates.clear()
+            self._mappers.clear()
+
+
+## shared process-wide pool ##
+translator_pool = TranslatorPool()
@@ -1,11 +1,12 @@
 __version__ = "4.1.0"
 
 from .Data import DataLoader
-from .Model import Nfelo
-from .scripts import update_nfelo
+from .Model import Nfelo, NfeloEnsemble
+from .Simulation import SeasonSimulator
+from .scripts import update_nfelo, snapshot_nfelodcm
 from .Development import (
     optimize_nfelo_core, optimize_nfelo_base,
     optimize_nfelo_mr, optimize_all, optimize_base_with_k,
-    market_resist_explore 
+    sweep_nfelo, market_resist_explore 
 )
 from .Formatting import NfeloFormatter
\ No newline at end of file
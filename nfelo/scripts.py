@@ -2,14 +2,44 @@ import pandas as pd
 import pathlib
 import json
 
-from .Data import DataLoader
+from .Data import DataLoader, DcmSource, FixtureSource
 from .Model import Nfelo
 from .Performance import NfeloGrader
 from .Formatting import NfeloFormatter
+from .Utilities import frame_memory, memory_report, profiler
 
-def update_nfelo():
+def default_fixture_dir():
+    '''
+    Default location of the local nfelodcm snapshot
+    '''
+    return '{0}/Data/Fixtures'.format(pathlib.Path(__file__).parent.resolve())
+
+def snapshot_nfelodcm(fixture_dir=None, file_format=None):
+    '''
+    Snapshots every table the DataLoader uses, along with the current season
+    state, from nfelodcm into a local fixture directory. Pass the directory to
+    update_nfelo(fixture_dir=...) to run offline against the snapshot
+
+    Parameters:
+    * fixture_dir (str): where to write the snapshot. Defaults to Data/Fixtures
+    * file_format (str): 'parquet' or 'pickle'. Defaults to parquet when an
+      engine (pyarrow) is installed
+    '''
+    fixture_dir = fixture_dir if fixture_dir is not None else default_fixture_dir()
+    print('Snapshotting nfelodcm to {0}...'.format(fixture_dir))
+    return FixtureSource.snapshot(
+        DcmSource(), DataLoader.tables, fixture_dir, file_format=file_format
+    )
+
+def update_nfelo(refresh=False, fixture_dir=None):
     '''
     Updates the nfelo model and saves the current file
+
+    Parameters:
+    * refresh (bool): only rebuild games that changed since the last update.
+      Defaults to a full rebuild of the data
+    * fixture_dir (str): optional snapshot from snapshot_nfelodcm() to load
+      instead of nfelodcm
     '''
     ## load config ##
     config_loc = '{0}/config.json'.format(
@@ -17,24 +47,57 @@ def update_nfelo():
     )
     with open(config_loc, 'r') as fp:
         config = json.load(fp)
+    ## stage spans are written to the trace at the end of the update ##
+    profiler.reset()
     ## load data ##
-    data = DataLoader()
+    with profiler.span('DataLoader') as span:
+        data = DataLoader(
+            refresh=refresh,
+            source=FixtureSource(fixture_dir) if fixture_dir is not None else None
+        )
+        span['rows'] = len(data.current_file)
     nfelo = Nfelo(
         data=data,
         config=config['models']['nfelo']
     )
-    nfelo.run()
-    nfelo.save_reversions()
+    with profiler.span('Nfelo.run') as span:
+        nfelo.run()
+        span['rows'] = len(nfelo.updated_file)
+    with profiler.span('Nfelo.save_reversions'):
+        nfelo.save_reversions()
     ## save some output ##
     nfelo.updated_file.to_csv(
         '{0}/Data/Intermediate Data/current_file_w_nfelo.csv'.format(
             pathlib.Path(__file__).parent.resolve()
         )
     )
+    with profiler.span('RatingsIndex') as span:
+        nfelo.ratings.save(
+            '{0}/Data/Intermediate Data/ratings_index.npz'.format(
+                pathlib.Path(__file__).parent.resolve()
+            )
+        )
+        span['rows'] = len(nfelo.ratings)
     ## grade #
-    graded = NfeloGrader(nfelo.updated_file)
+    with profiler.span('NfeloGrader') as span:
+        graded = NfeloGrader(nfelo.updated_file)
+        span['rows'] = len(graded.graded_games)
+    ## memory by pipeline stage ##
+    print(memory_report(data.memory_records + [
+        frame_memory(nfelo.updated_file, 'updated_file'),
+        frame_memory(graded.graded_games, 'graded_games'),
+    ]))
     ## format ##
-    nfelo.project_spreads()
-    formatting = NfeloFormatter(
-        data=data, model=nfelo, graded=graded
+    with profiler.span('Nfelo.project_spreads'):
+        nfelo.project_spreads()
+    with profiler.span('NfeloFormatter'):
+        formatting = NfeloFormatter(
+            data=data, model=nfelo, graded=graded
+        )
+    ## time and peak memory by pipeline stage ##
+    print(profiler.summary())
+    profiler.save_trace(
+        '{0}/Data/Intermediate Data/update_trace.json'.format(
+            pathlib.Path(__file__).parent.resolve()
+        )
     )
\ No newline at end of file
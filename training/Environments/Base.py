@@ -14,6 +14,9 @@ class Environment(ABC):
         self.config = config
         self.repo_root = repo_root
         self.max_seconds = config.get('max_seconds_per_shard')
+        ## shards stop themselves at max_seconds (see Runner); the hard kill ##
+        ## is a backstop that waits out one more eval and the final writes ##
+        self.kill_grace_seconds = config.get('kill_grace_seconds', 120)
 
     @abstractmethod
     def submit(self, shard_config: ShardConfig) -> Job:
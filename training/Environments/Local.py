@@ -101,4 +101,4 @@ class LocalEnvironment(Environment):
         if not self.max_seconds or not job.started_at:
             return False
         elapsed = (datetime.datetime.now() - job.started_at).total_seconds()
-        return elapsed > self.max_seconds
+        return elapsed > self.max_seconds + self.kill_grace_seconds
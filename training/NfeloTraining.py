@@ -1,12 +1,17 @@
 import datetime
 import json
+import pathlib
 import sys
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+import numpy
 
 from .Environments import environment_from_config
 from .Environments.Job import Job
 from .Primitives.RunPlan import RunPlan
+from .Primitives.ShardConfig import ShardConfig
+from .Primitives.RungScheduler import RungScheduler
 from .Primitives.ShardMerger import ShardMerger
 
 
@@ -14,6 +19,11 @@ class NfeloTraining():
     '''
     Orchestrates a parallel training run: queue shards, respect max_workers,
     poll the environment, merge finished shard CSVs to the run root.
+
+    With plan.rungs set, shards are culled by asynchronous successive halving
+    (see RungScheduler) and their slots refilled, while fewer than
+    plan.max_shards have been launched, with a fresh random start or a
+    continuation of the leading shard's best point (plan.refill).
     '''
 
     def __init__(self, plan: RunPlan):
@@ -24,16 +34,99 @@ class NfeloTraining():
         self.environment = environment_from_config(env_cfg, plan.repo_root)
         self.max_workers = plan.environment.get('max_workers', 1)
 
-    def run(self) -> Dict[str, Any]:
+    def progress(self, job: Job) -> Dict[str, Any]:
+        return self.scheduler.progress(job.output_dir, self.plan.opti_tag)
+
+    def refill_config(self, shard_id: int, progress: Dict[int, Dict[str, Any]]):
+        '''
+        Config for a shard taking a culled shard's slot. Continuations start
+        from the leader's best saved point, falling back to a fresh start if
+        no shard has saved a row yet
+        '''
+        if self.plan.refill == 'continue':
+            ranked = sorted(
+                [(p['best'], p['output_dir']) for p in progress.values() if p['best'] is not None]
+            )
+            for _, output_dir in ranked:
+                best = RungScheduler.best_features(
+                    output_dir, self.plan.opti_tag, self.plan.features
+                )
+                if best is not None:
+                    return self.plan.shard_config(shard_id, bg_overrides=best)
+        return self.plan.shard_config(shard_id)
+
+    def cull(self, job: Job, evals: int) -> Dict[str, Any]:
+        '''
+        Stops a shard and writes its meta, since the Runner never will
+        '''
+        self.environment.terminate(job)
+        meta = {
+            'run_id': self.plan.run_id,
+            'shard_id': job.shard_id,
+            'evals': evals,
+            'status': 'culled',
+        }
+        with open(pathlib.Path(job.output_dir) / 'shard_meta.json', 'w') as fp:
+            json.dump(meta, fp, indent=2)
+        return meta
+
+    def resume(self) -> Dict[str, Any]:
+        '''
+        Resumes an interrupted run in the plan's run directory. Shards the
+        manifest shows with a shard_meta.json (finished, budget exhausted or
+        culled) are kept. The rest are restarted from their shard.json, and
+        their optimizers resume from the checkpoint in the shard directory.
+        Shards that never launched are queued as in run()
+        '''
+        manifest = ShardMerger.write_manifest(self.plan.run_dir, self.plan.opti_tag)
+        done = set(manifest.loc[manifest['has_meta'], 'shard'])
+        launched = set(manifest['shard'])
+        shard_ids = set(range(1, self.plan.n_shards + 1)) | {
+            int(shard.split('_')[-1]) for shard in launched
+        }
+        queue = []
+        for shard_id in sorted(shard_ids):
+            shard = 'shard_{0:03d}'.format(shard_id)
+            if shard in done:
+                continue
+            config_path = self.plan.shards_dir / shard / 'shard.json'
+            if config_path.exists():
+                queue.append(ShardConfig.from_json_file(str(config_path)))
+            else:
+                queue.append(self.plan.shard_config(shard_id))
+        print('Resuming {0}: {1} shards done, {2} to run'.format(
+            self.plan.run_id, len(done), len(queue)
+        ))
+        return self.run(queue=queue, previously_done=len(done))
+
+    def run(self, queue: Optional[List[ShardConfig]] = None, previously_done: int = 0) -> Dict[str, Any]:
         ## write plan and build shard queue ##
         self.plan.write()
-        queue = [
-            self.plan.shard_config(i)
-            for i in range(1, self.plan.n_shards + 1)
+        if queue is None:
+            queue = [
+                self.plan.shard_config(i)
+                for i in range(1, self.plan.n_shards + 1)
+            ]
+        max_shards = max(self.plan.max_shards or self.plan.n_shards, self.plan.n_shards)
+        ## refills number on from every shard launched so far ##
+        launched = [
+            int(p.name.split('_')[-1]) for p in self.plan.shards_dir.glob('shard_*') if p.is_dir()
         ]
+        next_shard_id = max(
+            [self.plan.n_shards] + launched + [c.shard_id for c in queue]
+        ) + 1
+        self.scheduler = RungScheduler(
+            self.plan.rungs or [],
+            unit=self.plan.rung_unit,
+            cull_fraction=self.plan.cull_fraction,
+            min_shards=self.plan.min_rung_shards,
+        )
         active: List[Job] = []
         finished: List[Job] = []
         failed: List[Dict[str, Any]] = []
+        culled: List[Dict[str, Any]] = []
+        ## evals and best objective of every launched shard ##
+        progress: Dict[int, Dict[str, Any]] = {}
         ## submit and poll until every shard finishes ##
         while queue or active:
             while queue and len(active) < self.max_workers:
@@ -43,7 +136,18 @@ class NfeloTraining():
             still_active = []
             for job in active:
                 status = self.environment.poll(job)
+                if self.plan.rungs:
+                    progress[job.shard_id] = dict(self.progress(job), output_dir=job.output_dir)
                 if status == 'running':
+                    if self.plan.rungs:
+                        elapsed = (datetime.datetime.now() - job.started_at).total_seconds()
+                        shard = progress[job.shard_id]
+                        if self.scheduler.should_cull(job.shard_id, shard['evals'], elapsed, shard['best']):
+                            culled.append(self.cull(job, shard['evals']))
+                            if next_shard_id <= max_shards:
+                                queue.append(self.refill_config(next_shard_id, progress))
+                                next_shard_id += 1
+                            continue
                     still_active.append(job)
                     continue
                 if status == 'done':
@@ -61,7 +165,7 @@ class NfeloTraining():
                 time.sleep(0.2)
         ## merge finished shard CSVs to run root ##
         merge_error = None
-        if finished:
+        if finished or culled:
             try:
                 ShardMerger.merge(
                     self.plan.run_dir,
@@ -74,18 +178,56 @@ class NfeloTraining():
         summary = {
             'run_id': self.plan.run_id,
             'environment': self.plan.environment['type'],
-            'submitted': self.plan.n_shards,
+            'submitted': next_shard_id - 1,
             'finished': len(finished),
+            ## shards done before a resume (see resume) ##
+            'previously_finished': previously_done,
+            ## finished shards that stopped themselves at max_seconds_per_shard ##
+            'budget_exhausted': sum(
+                self.shard_status(job) == 'budget_exhausted' for job in finished
+            ),
             'failed': len(failed),
             'run_dir': str(self.plan.run_dir),
             'merge_error': merge_error,
             'failed_shards': failed,
+            'halving': self.halving_summary(finished, culled, progress),
             'completed_at': datetime.datetime.now().isoformat(),
         }
         with open(self.plan.details_dir / 'summary.json', 'w') as fp:
             json.dump(summary, fp, indent=2)
         return summary
 
+    def shard_status(self, job: Job) -> Any:
+        meta_path = pathlib.Path(job.output_dir) / 'shard_meta.json'
+        if not meta_path.exists():
+            return None
+        with open(meta_path, 'r') as fp:
+            return json.load(fp).get('status')
+
+    def halving_summary(self, finished, culled, progress) -> Dict[str, Any]:
+        '''
+        Evals saved by culling. A culled shard is assumed to have needed the
+        median evals of the shards that ran to completion, so the estimate is
+        0 until at least one shard finishes
+        '''
+        if not self.plan.rungs:
+            return None
+        full_evals = [progress[job.shard_id]['evals'] for job in finished]
+        median_evals = float(numpy.median(full_evals)) if full_evals else None
+        saved = 0.0
+        if median_evals is not None:
+            saved = sum(max(median_evals - shard['evals'], 0) for shard in culled)
+        return {
+            'rungs': self.plan.rungs,
+            'rung_unit': self.plan.rung_unit,
+            'refill': self.plan.refill,
+            'culled': len(culled),
+            'culled_shards': culled,
+            'evals_run': int(sum(p['evals'] for p in progress.values())),
+            'median_evals_to_finish': median_evals,
+            'evals_saved': int(round(saved)),
+        }
+
 
 def run_training(plan_path: str) -> Dict[str, Any]:
     '''
@@ -93,3 +235,12 @@ def run_training(plan_path: str) -> Dict[str, Any]:
     '''
     plan = RunPlan.from_json_file(plan_path)
     return NfeloTraining(plan).run()
+
+
+def resume_training(plan_path: str) -> Dict[str, Any]:
+    '''
+    Resume an interrupted parallel training job from its run_details/plan.json
+    path, rerunning only the unfinished shards.
+    '''
+    plan = RunPlan.from_json_file(plan_path)
+    return NfeloTraining(plan).resume()
@@ -28,6 +28,15 @@ class RunPlan:
     max_seconds_per_shard: Optional[int] = None
     tol: float = 0.000001
     step: float = 0.00001
+    ## local nfelodcm snapshot to load instead of nfelodcm (see snapshot_nfelodcm) ##
+    fixture_dir: Optional[str] = None
+    ## asynchronous successive halving across shards (see RungScheduler) ##
+    rungs: Optional[List[float]] = None
+    rung_unit: str = 'evals'
+    cull_fraction: float = 0.5
+    min_rung_shards: int = 3
+    refill: str = 'fresh'
+    max_shards: Optional[int] = None
 
     @property
     def run_dir(self) -> pathlib.Path:
@@ -41,7 +50,12 @@ class RunPlan:
     def shards_dir(self) -> pathlib.Path:
         return self.details_dir / 'shards'
 
-    def shard_config(self, shard_id: int) -> ShardConfig:
+    def shard_config(
+        self,
+        shard_id: int,
+        bg_overrides: Optional[Dict[str, float]] = None,
+    ) -> ShardConfig:
+        ## bg_overrides given = continuation of a leader from its best point ##
         return ShardConfig(
             run_id=self.run_id,
             shard_id=shard_id,
@@ -52,10 +66,12 @@ class RunPlan:
             features=self.features,
             objective=self.objective,
             test_seasons=self.test_seasons,
-            bg_overrides=self.bg_overrides,
+            bg_overrides=self.bg_overrides if bg_overrides is None else bg_overrides,
             max_seconds=self.max_seconds_per_shard,
             tol=self.tol,
             step=self.step,
+            fixture_dir=self.fixture_dir,
+            random_start=bg_overrides is None,
         )
 
     def write(self) -> pathlib.Path:
@@ -0,0 +1,105 @@
+import pathlib
+from typing import Any, Dict, List, Optional
+
+import numpy
+import pandas as pd
+
+
+class RungScheduler():
+    '''
+    Asynchronous successive halving over running shards. Each shard's best
+    objective is read from its runtime CSV as evals stream in. When a shard
+    reaches a rung (an eval count, or elapsed seconds), its best so far joins
+    every other shard's best at that rung, and the shard is culled if it is in
+    the bottom cull_fraction of them. Rungs are only judged once at least
+    min_shards shards have reached them, so early shards are never culled
+    against too small a field.
+    '''
+
+    def __init__(
+        self,
+        rungs: List[float],
+        unit: str = 'evals',
+        cull_fraction: float = 0.5,
+        min_shards: int = 3,
+    ):
+        if unit not in ('evals', 'seconds'):
+            raise ValueError('Unknown rung unit: {0}'.format(unit))
+        self.rungs = sorted(rungs)
+        self.unit = unit
+        self.cull_fraction = cull_fraction
+        self.min_shards = min_shards
+        self.rung_values: Dict[float, List[float]] = {rung: [] for rung in self.rungs}
+        self.judged: Dict[int, set] = {}
+        self._cache: Dict[str, Any] = {}
+
+    def progress(self, output_dir: str, opti_tag: str) -> Dict[str, Any]:
+        '''
+        Evals and best minimized objective of a shard so far, from its runtime
+        CSV. Cheaper fidelity evals count as evals but not toward the best.
+        Re-read only when the file changes.
+        '''
+        matches = list(pathlib.Path(output_dir).glob('{0}-*_runtime.csv'.format(opti_tag)))
+        if not matches:
+            return {'evals': 0, 'best': None}
+        path = matches[0]
+        mtime = path.stat().st_mtime
+        cached = self._cache.get(str(path))
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            df = pd.read_csv(path)
+        except Exception:
+            ## mid-write; try again next poll ##
+            return cached[1] if cached is not None else {'evals': 0, 'best': None}
+        full = df
+        if 'fidelity' in df.columns:
+            full = df[df['fidelity'].fillna('full') == 'full']
+        best = full['minimized_obj'].min() if len(full) > 0 else None
+        progress = {
+            'evals': len(df),
+            'best': None if best is None or pd.isnull(best) else float(best),
+        }
+        self._cache[str(path)] = (mtime, progress)
+        return progress
+
+    def should_cull(self, shard_id: int, evals: int, elapsed: float, best: Optional[float]) -> bool:
+        '''
+        Records the shard at any rungs it has newly reached and returns
+        whether it should be stopped
+        '''
+        if best is None:
+            return False
+        position = evals if self.unit == 'evals' else elapsed
+        judged = self.judged.setdefault(shard_id, set())
+        cull = False
+        for rung in self.rungs:
+            if position < rung or rung in judged:
+                continue
+            judged.add(rung)
+            values = self.rung_values[rung]
+            values.append(best)
+            if len(values) >= self.min_shards:
+                cutoff = numpy.quantile(values, 1 - self.cull_fraction)
+                if best > cutoff:
+                    cull = True
+        return cull
+
+    @staticmethod
+    def best_features(output_dir: str, opti_tag: str, features: List[str]) -> Optional[Dict[str, float]]:
+        '''
+        Feature values of a shard's best saved row (rows are written on each
+        new best, so the last row is the best), or None if it has none yet
+        '''
+        for path in pathlib.Path(output_dir).glob('{0}-*.csv'.format(opti_tag)):
+            if any(s in path.stem for s in ('_test', '_benchmarks', '_runtime', '_metrics', '_pareto')):
+                continue
+            try:
+                df = pd.read_csv(path, index_col=0)
+            except Exception:
+                return None
+            if len(df) == 0 or not set(features).issubset(df.columns):
+                return None
+            row = df.iloc[-1]
+            return {feature: float(row[feature]) for feature in features}
+        return None
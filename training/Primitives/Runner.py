@@ -1,6 +1,7 @@
 import json
 import pathlib
 import sys
+import time
 from typing import Any, Dict
 
 import numpy
@@ -10,23 +11,33 @@ from .ShardConfig import ShardConfig
 
 class Runner():
     '''
-    Executes one random-start SLSQP hop and writes optimizer output to the
-    shard directory. hop_number is set to shard_id so run_id values stay
-    unique across parallel shards (see TRAINING_PLAYBOOK.md).
+    Executes one random-start SLSQP hop (or a continuation from bg_overrides)
+    and writes optimizer output to the shard directory. hop_number is set to
+    shard_id so run_id values stay unique across parallel shards (see
+    TRAINING_PLAYBOOK.md).
+
+    With max_seconds set, the optimizer stops itself at the budget, saves its
+    best, and the meta is written with status budget_exhausted.
     '''
 
     @classmethod
     def run(cls, shard_config: ShardConfig) -> Dict[str, Any]:
+        ## the shard's time budget runs from here (see NfeloOptimizerBase.check_budget) ##
+        started = float(time.time())
         ## load config ##
         repo_root = pathlib.Path(shard_config.repo_root)
         config_loc = repo_root / 'config.json'
         with open(config_loc, 'r') as fp:
             config = json.load(fp)
         ## load data ##
-        from nfelo.Data import DataLoader
+        from nfelo.Data import DataLoader, FixtureSource
         from nfelo.Model import Nfelo
         from nfelo.Optimizer import NfeloOptimizer
-        data = DataLoader()
+        source = (
+            FixtureSource(shard_config.fixture_dir)
+            if shard_config.fixture_dir is not None else None
+        )
+        data = DataLoader(source=source)
         nfelo = Nfelo(data=data, config=config['models']['nfelo'])
         ## optimize ##
         optimizer = NfeloOptimizer(
@@ -36,6 +47,10 @@ class Runner():
             shard_config.objective,
             bg_overrides=shard_config.bg_overrides,
             test_seasons=shard_config.test_seasons,
+            ## a restarted shard resumes from here (see NfeloTraining.resume) ##
+            checkpoint_path=pathlib.Path(shard_config.output_dir) / '{0}-{1}_checkpoint.json'.format(
+                shard_config.opti_tag, shard_config.opti_date
+            ),
         )
         base = optimizer.base
         base.results_dir = pathlib.Path(shard_config.output_dir)
@@ -43,19 +58,24 @@ class Runner():
         base.tol = shard_config.tol
         base.step = shard_config.step
         base.opti_date = shard_config.opti_date
+        if shard_config.max_seconds is not None:
+            base.deadline = started + shard_config.max_seconds
         ## one random-start hop per shard; parallel shards replace RandomStarts' serial loop ##
         ## draw here so hop_number can stay shard_id (RandomStarts overwrites hop_number) ##
-        rng = numpy.random.default_rng()
-        base.best_guesses = rng.uniform(
-            0.0, 1.0, size=len(shard_config.features)
-        ).tolist()
+        ## continuations start from the leader's best, passed as bg_overrides ##
+        if shard_config.random_start:
+            rng = numpy.random.default_rng()
+            base.best_guesses = rng.uniform(
+                0.0, 1.0, size=len(shard_config.features)
+            ).tolist()
         optimizer.optimize()
         ## write shard meta ##
         meta = {
             'run_id': shard_config.run_id,
             'shard_id': shard_config.shard_id,
             'opti_seconds': base.opti_seconds,
-            'status': 'ok',
+            'evals': base.total_runs,
+            'status': 'budget_exhausted' if base.budget_exhausted else 'ok',
         }
         out = pathlib.Path(shard_config.output_dir)
         with open(out / 'shard_meta.json', 'w') as fp:
@@ -22,6 +22,11 @@ class ShardConfig:
     max_seconds: Optional[int] = None
     tol: float = 0.000001
     step: float = 0.00001
+    ## local nfelodcm snapshot to load instead of nfelodcm (see snapshot_nfelodcm) ##
+    fixture_dir: Optional[str] = None
+    ## False starts the hop from bg_overrides (a leader continuation) rather ##
+    ## than a fresh random start ##
+    random_start: bool = True
 
     def write(self) -> pathlib.Path:
         out = pathlib.Path(self.output_dir)
@@ -9,7 +9,7 @@ class ShardMerger():
     Concatenate per-shard optimizer CSVs into the run directory root.
     '''
 
-    _SKIP_SUFFIXES = ('_test', '_benchmarks', '_runtime')
+    _SKIP_SUFFIXES = ('_test', '_benchmarks', '_runtime', '_metrics', '_pareto')
 
     @classmethod
     def merge(cls, run_dir: pathlib.Path, opti_tag: str, opti_date: str) -> pathlib.Path:
@@ -29,6 +29,7 @@ class ShardMerger():
             dedupe=['split', 'model_name'],
         )
         cls._merge_suffix(shard_dirs, opti_tag, '_runtime', run_dir / '{0}_runtime.csv'.format(stem), dedupe=None)
+        cls._merge_suffix(shard_dirs, opti_tag, '_metrics', run_dir / '{0}_metrics.csv'.format(stem), dedupe=None)
         ## write manifest ##
         cls._write_manifest(details_dir, shard_dirs, opti_tag)
         return run_dir
@@ -76,6 +77,18 @@ class ShardMerger():
                 merged = merged.drop_duplicates(subset=keys, keep='last')
         merged.to_csv(out_path)
 
+    @classmethod
+    def write_manifest(cls, run_dir: pathlib.Path, opti_tag: str) -> pd.DataFrame:
+        '''
+        Writes manifest.csv for the shard directories as they are now, and
+        returns it. Used on its own to find the unfinished shards of an
+        interrupted run
+        '''
+        details_dir = run_dir / 'run_details'
+        shard_dirs = sorted([p for p in (details_dir / 'shards').glob('shard_*') if p.is_dir()])
+        cls._write_manifest(details_dir, shard_dirs, opti_tag)
+        return pd.read_csv(details_dir / 'manifest.csv')
+
     @classmethod
     def _write_manifest(cls, details_dir: pathlib.Path, shard_dirs: List[pathlib.Path], opti_tag: str) -> None:
         lines = ['shard,has_train,has_test,has_benchmarks,has_runtime,has_meta']